@@ -0,0 +1,81 @@
+"""Benchmark of dietary-tag filtering: the old per-recipe list comprehension vs bitmasks.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_dietary_filter [--recipes 1000000] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from services.recipe_features import DIETARY_TAG_VOCABULARY, dietary_mask
+from services.recipe_service import RecipeMatchingService
+
+
+def synthetic_recipes(count: int, seed: int = 42):
+    """Recipes with 0-4 random dietary tags each, in mixed case like LLM output"""
+    rng = random.Random(seed)
+    recipes = []
+    for i in range(count):
+        tags = rng.sample(DIETARY_TAG_VOCABULARY, rng.randint(0, 4))
+        recipes.append({
+            'id': str(i),
+            'dietary_tags': [tag.title() if rng.random() < 0.3 else tag for tag in tags],
+        })
+    return recipes
+
+
+def legacy_filter(recipes, dietary_tags):
+    """The list-comprehension filter this benchmark replaces (ANY semantics)"""
+    dietary_tags_lower = [tag.lower() for tag in dietary_tags]
+    return [
+        r for r in recipes
+        if any(tag.lower() in dietary_tags_lower for tag in r.get('dietary_tags', []))
+    ]
+
+
+def best_of(repeat: int, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def report(label: str, seconds: float, matched: int):
+    print(f"⏱️  {label:<38} {seconds * 1000:9.1f} ms  {matched} recipes")
+
+
+def main(count: int, repeat: int):
+    print(f"📝 Generating {count} synthetic recipes...")
+    recipes = synthetic_recipes(count)
+    # What the stored match features provide at query time
+    masks = [dietary_mask(r['dietary_tags']) for r in recipes]
+    mask_array = np.array(masks, dtype=np.int64)
+    requested = ['vegan', 'gluten-free']
+
+    legacy_time, legacy = best_of(repeat, lambda: legacy_filter(recipes, requested))
+    report('legacy list comprehension (any)', legacy_time, len(legacy))
+
+    for match in ('any', 'all'):
+        mask_time, keep = best_of(repeat, lambda: RecipeMatchingService.dietary_keep_mask(
+            mask_array, requested, match=match
+        ))
+        filter_time, filtered = best_of(repeat, lambda: RecipeMatchingService.filter_recipes_by_criteria(
+            recipes, dietary_tags=requested, dietary_match=match, dietary_masks=masks
+        ))
+        if match == 'any':
+            assert [r['id'] for r in filtered] == [r['id'] for r in legacy], "any-mode results differ from legacy"
+        report(f'mask operation ({match})', mask_time, int(keep.sum()))
+        report(f'filter_recipes_by_criteria ({match})', filter_time, len(filtered))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.recipes, args.repeat)
@@ -0,0 +1,140 @@
+"""Synthetic recipe catalogs for the benchmarks.
+
+Ingredient popularity follows a Zipf distribution over a fixed pantry, so that a few
+staples (salt, olive oil, garlic, onion) appear in most recipes and the long tail
+only rarely, as in real catalogs. Ingredient lines carry quantities and preparation
+words like LLM output does, which keeps normalization and quantity parsing honest.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+from services.recipe_features import DIETARY_TAG_VOCABULARY, with_match_features
+
+# Rough order of popularity; the Zipf weights follow list position
+PANTRY = [
+    'salt', 'olive oil', 'garlic', 'onion', 'black pepper', 'butter', 'water', 'sugar', 'flour', 'eggs',
+    'tomato', 'lemon juice', 'chicken breast', 'milk', 'soy sauce', 'ginger', 'carrot', 'rice', 'parsley',
+    'vegetable oil', 'bell pepper', 'parmesan cheese', 'cumin', 'paprika', 'basil', 'potato', 'honey',
+    'heavy cream', 'chicken broth', 'cilantro', 'green onion', 'celery', 'thyme', 'oregano', 'mushrooms',
+    'spinach', 'beef', 'lime juice', 'cheddar cheese', 'cinnamon', 'vanilla extract', 'baking powder',
+    'tomato paste', 'red pepper flakes', 'zucchini', 'chickpeas', 'coconut milk', 'pasta', 'bacon',
+    'shrimp', 'salmon', 'tofu', 'black beans', 'broccoli', 'cauliflower', 'sesame oil', 'rosemary',
+    'chili powder', 'avocado', 'cucumber', 'feta cheese', 'mozzarella cheese', 'yogurt', 'quinoa',
+    'lentils', 'sweet potato', 'kale', 'corn', 'peas', 'brown sugar', 'dijon mustard', 'mayonnaise',
+    'red wine vinegar', 'balsamic vinegar', 'fish sauce', 'curry powder', 'turmeric', 'coriander',
+    'cabbage', 'eggplant', 'pork', 'ground beef', 'lamb', 'cod', 'tuna', 'almonds', 'walnuts', 'peanuts',
+    'peanut butter', 'oats', 'maple syrup', 'cocoa powder', 'chocolate chips', 'bread crumbs', 'tortillas',
+    'noodles', 'bread', 'mint', 'dill', 'nutmeg', 'cardamom', 'saffron', 'miso paste', 'tahini',
+    'pine nuts', 'capers', 'olives', 'anchovies', 'artichoke hearts', 'leeks', 'shallots', 'fennel',
+    'asparagus', 'green beans', 'bok choy', 'bean sprouts', 'water chestnuts', 'kimchi', 'gochujang',
+    'harissa', 'sumac', "za'atar", 'pomegranate', 'mango', 'pineapple', 'coconut flakes', 'raisins',
+    'dates', 'apricots', 'cranberries', 'blueberries', 'strawberries', 'banana', 'apple', 'pear',
+]
+PANTRY_WEIGHTS = [1 / (rank + 1) ** 0.9 for rank in range(len(PANTRY))]
+
+UNITS = ['cup', 'cups', 'tbsp', 'tsp', 'g', 'oz', 'lb', 'cloves', '']
+PREPARATIONS = ['', '', '', 'diced', 'chopped', 'minced', 'sliced', 'fresh', 'grated']
+QUANTITIES = ['1', '2', '3', '1/2', '1/4', '3/4', '1 1/2', '200', '400']
+CUISINES = ['Italian', 'Mexican', 'Indian', 'Chinese', 'Japanese', 'Thai', 'French', 'Mediterranean',
+            'American', 'Korean', 'Middle Eastern', 'Greek', 'Spanish', 'Vietnamese']
+DIFFICULTIES = ['easy', 'medium', 'hard']
+
+
+def ingredient_line(rng: random.Random, name: str) -> str:
+    """An ingredient as an LLM writes it, e.g. "1 1/2 cups diced onion" """
+    if rng.random() < 0.15:
+        return name
+    parts = [rng.choice(QUANTITIES), rng.choice(UNITS), rng.choice(PREPARATIONS), name]
+    return ' '.join(part for part in parts if part)
+
+
+def synthetic_recipe(rng: random.Random, index: int, created_at: datetime) -> Dict:
+    size = rng.randint(4, 14)
+    names = set()
+    while len(names) < size:
+        names.update(rng.choices(PANTRY, weights=PANTRY_WEIGHTS, k=2))
+    names = list(names)
+    cuisine = rng.choice(CUISINES)
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        'name': f"{cuisine} {names[0].title()} and {names[-1].title()} #{index}",
+        'ingredients': [ingredient_line(rng, name) for name in names],
+        'instructions': [f"Prepare the {name}." for name in names[:3]] + ['Cook until done.', 'Serve.'],
+        'cuisine': cuisine,
+        'difficulty': rng.choices(DIFFICULTIES, weights=[5, 4, 1])[0],
+        'cooking_time': rng.choice([10, 15, 20, 25, 30, 40, 45, 60, 90, 120]),
+        'serving_size': rng.choice([1, 2, 4, 4, 6, 8]),
+        'dietary_tags': rng.sample(DIETARY_TAG_VOCABULARY, rng.choices([0, 1, 2, 3], weights=[4, 3, 2, 1])[0]),
+        'nutrition': {
+            'calories': rng.randint(120, 900), 'protein': rng.randint(2, 60), 'carbs': rng.randint(5, 120),
+            'fat': rng.randint(1, 50), 'fiber': rng.randint(0, 15),
+        },
+        'created_at': created_at.isoformat(),
+    }
+
+
+def synthetic_catalog(count: int, seed: int = 42) -> Iterator[Dict]:
+    """`count` recipe documents, identical for the same seed; match features are not included"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for index in range(count):
+        yield synthetic_recipe(rng, index, start + timedelta(seconds=index))
+
+
+def synthetic_query(rng: random.Random, size: int = 4) -> List[str]:
+    """Available ingredients as a user would type them"""
+    return rng.choices(PANTRY[:60], weights=PANTRY_WEIGHTS[:60], k=size)
+
+
+def recipe_response_text(recipe: Dict) -> str:
+    """A recipe in the text format OpenAIService asks the model for"""
+    nutrition = recipe['nutrition']
+    return '\n'.join([
+        f"NAME: {recipe['name']}",
+        f"CUISINE: {recipe['cuisine']}",
+        f"DIFFICULTY: {recipe['difficulty']}",
+        f"COOKING_TIME: {recipe['cooking_time']} minutes",
+        f"SERVING_SIZE: {recipe['serving_size']}",
+        f"DIETARY_TAGS: {', '.join(recipe['dietary_tags'])}",
+        '',
+        'INGREDIENTS:',
+        *[f"- {line}" for line in recipe['ingredients']],
+        '',
+        'INSTRUCTIONS:',
+        *[f"{step}. {text}" for step, text in enumerate(recipe['instructions'], start=1)],
+        '',
+        'NUTRITION (per serving):',
+        f"Calories: {nutrition['calories']}",
+        f"Protein: {nutrition['protein']}g",
+        f"Carbs: {nutrition['carbs']}g",
+        f"Fat: {nutrition['fat']}g",
+        f"Fiber: {nutrition['fiber']}g",
+    ])
+
+
+async def ensure_catalog(db, count: int, seed: int = 42, batch_size: int = 5000) -> bool:
+    """Load the synthetic catalog into `db.recipes` unless it already holds exactly it.
+
+    Returns True when the catalog was (re)loaded.
+    """
+    marker = {"_id": "catalog", "count": count, "seed": seed}
+    if await db.benchmark_meta.find_one(marker) and await db.recipes.estimated_document_count() == count:
+        return False
+
+    await db.recipes.drop()
+    await db.benchmark_meta.drop()
+    await db.recipes.create_index("id", unique=True)
+    await db.recipes.create_index([("created_at", 1), ("id", 1)])
+    batch = []
+    for recipe in synthetic_catalog(count, seed):
+        batch.append(with_match_features(recipe))
+        if len(batch) >= batch_size:
+            await db.recipes.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.recipes.insert_many(batch, ordered=False)
+    await db.benchmark_meta.insert_one(marker)
+    return True
+
@@ -0,0 +1,188 @@
+"""Load generator driving the API with concurrent mixed traffic.
+
+Run from the backend directory, against a running server:
+
+    LLM_PROVIDER=fake python server.py &
+    python -m benchmarks.load_test --url http://localhost:8001 [--concurrency 50] [--duration 30]
+
+or in-process, with the app and the load generator sharing one event loop (the
+fake LLM provider is selected unless LLM_PROVIDER is set):
+
+    python -m benchmarks.load_test [--concurrency 50] [--duration 30] [--output load.json]
+
+Traffic is drawn from --mix, e.g. "find=50,generate=10,recognize=5,recipe=15,save=5,saved=10,preferences=5".
+Throughput, p50/p95/p99 latency and the error rate (non-2xx or failed requests)
+are reported per endpoint.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.catalog import synthetic_query
+
+DEFAULT_MIX = "find=50,generate=10,recognize=5,recipe=15,save=5,saved=10,preferences=5"
+SESSIONS = 100
+# A 1x1 PNG; the fake provider does not look at the pixels
+TINY_PNG = base64.b64encode(bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360f8cf00000301010018dd8db00000000049454e44ae426082'
+)).decode()
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, int], seed: int):
+        self.client = client
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        self.rng = random.Random(seed)
+        self.recipe_ids: List[str] = []
+        self.latencies: Dict[str, List[float]] = {name: [] for name in self.endpoints}
+        self.errors: Dict[str, int] = {name: 0 for name in self.endpoints}
+
+    def session(self) -> str:
+        return f"load-test-{self.rng.randrange(SESSIONS)}"
+
+    async def prepare(self):
+        """Collect recipe ids for the endpoints that need one"""
+        for _ in range(5):
+            response = await self.client.post('/api/recipes/find', json={'ingredients': synthetic_query(self.rng), 'limit': 20})
+            response.raise_for_status()
+            self.recipe_ids.extend(recipe['id'] for recipe in response.json()['recipes'])
+        if not self.recipe_ids:
+            raise RuntimeError("No recipes found; seed the database first")
+
+    def request(self, endpoint: str):
+        rng = self.rng
+        if endpoint == 'find':
+            return self.client.post('/api/recipes/find', json={'ingredients': synthetic_query(rng), 'user_session': self.session()})
+        if endpoint == 'generate':
+            return self.client.post('/api/recipes/generate', json={'ingredients': synthetic_query(rng, 3)})
+        if endpoint == 'recognize':
+            return self.client.post('/api/ingredients/recognize', json={'image_base64': TINY_PNG})
+        if endpoint == 'recipe':
+            return self.client.get(f"/api/recipes/{rng.choice(self.recipe_ids)}")
+        if endpoint == 'save':
+            return self.client.post('/api/user/saved-recipes', json={
+                'user_session': self.session(), 'recipe_id': rng.choice(self.recipe_ids), 'rating': rng.randint(1, 5)
+            })
+        if endpoint == 'saved':
+            return self.client.get(f"/api/user/saved-recipes/{self.session()}")
+        if endpoint == 'preferences':
+            return self.client.post('/api/user/preferences', json={
+                'user_session': self.session(),
+                'dietary_restrictions': rng.sample(['vegetarian', 'vegan', 'gluten-free'], rng.randint(0, 1)),
+                'favorite_cuisines': rng.sample(['Italian', 'Mexican', 'Indian', 'Thai'], rng.randint(0, 2)),
+                'allergies': rng.sample(['peanuts', 'shellfish', 'dairy'], rng.randint(0, 1)),
+            })
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+    async def worker(self, deadline: float, budget: List[int]):
+        while time.perf_counter() < deadline and budget[0] > 0:
+            budget[0] -= 1
+            endpoint = self.rng.choices(self.endpoints, weights=self.weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await self.request(endpoint)
+                ok = response.is_success
+            except httpx.HTTPError:
+                ok = False
+            self.latencies[endpoint].append(time.perf_counter() - started)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    async def run(self, concurrency: int, duration: float, max_requests: Optional[int]) -> Dict:
+        await self.prepare()
+        budget = [max_requests or sys.maxsize]
+        started = time.perf_counter()
+        await asyncio.gather(*(self.worker(started + duration, budget) for _ in range(concurrency)))
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for name in self.endpoints:
+            latencies = sorted(self.latencies[name])
+            if not latencies:
+                continue
+            endpoints[name] = {
+                "requests": len(latencies),
+                "throughput_rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+                "error_rate": round(self.errors[name] / len(latencies), 4),
+            }
+        total = sum(result["requests"] for result in endpoints.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "error_rate": round(sum(self.errors.values()) / total, 4) if total else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = int(weight or 1)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def print_report(report: Dict):
+    print(f"\n{'endpoint':<12} {'requests':>9} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    for name, result in report['endpoints'].items():
+        print(f"{name:<12} {result['requests']:>9} {result['throughput_rps']:>8.1f} {result['p50_ms']:>9.1f} "
+              f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['error_rate']:>8.2%}")
+    print(f"\n✅ {report['requests']} requests in {report['elapsed_s']}s: {report['throughput_rps']} req/s, "
+          f"{report['error_rate']:.2%} errors")
+
+
+async def main(args) -> Dict:
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+            return await LoadTest(client, mix, args.seed).run(args.concurrency, args.duration, args.requests)
+
+    os.environ.setdefault('LLM_PROVIDER', 'fake')
+    import server
+    await server.startup_db_client()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://load-test', timeout=120) as client:
+            return await LoadTest(client, mix, args.seed).run(args.concurrency, args.duration, args.requests)
+    finally:
+        await server.shutdown_db_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='base URL of a running server; in-process when omitted')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--requests', type=int, help='stop after this many requests')
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args()
+    report = asyncio.run(main(args))
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
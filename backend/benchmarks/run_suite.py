@@ -0,0 +1,269 @@
+"""Benchmark suite for the matching and parsing hot paths, with JSON results.
+
+Run from the backend directory:
+
+    python -m benchmarks.run_suite [--sizes 1000 100000 1000000] [--repeat 5] [--output results.json]
+                                   [--compare baseline.json] [--tolerance 1.2] [--skip-mongo]
+
+Pure-Python benchmarks, including the search and nutrition indexes, run on a synthetic
+catalog (see benchmarks/catalog.py) of each size. The end-to-end benchmarks (find_matching_recipes, get_saved_recipes)
+need a local MongoDB at MONGO_URL; each size gets its own `recipe_benchmark_<size>`
+database, loaded once and reused by later runs.
+
+Results are keyed by "<benchmark>[<size>]". With --compare, medians are checked
+against an earlier results file and the exit status is 1 if any benchmark got
+slower by more than --tolerance.
+"""
+import os
+import tempfile
+
+# /find must take the streaming path: a snapshot of the production catalog says
+# nothing about the benchmark databases
+os.environ['RECIPE_SNAPSHOT_PATH'] = os.path.join(tempfile.gettempdir(), 'recipe_benchmark_no_snapshot.bin')
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks.catalog import CUISINES, PANTRY, ensure_catalog, recipe_response_text, synthetic_catalog, synthetic_query
+from controllers.recipe_controller import RecipeController
+from controllers.user_controller import UserController
+from services.llm_provider import FakeLLMProvider
+from services.openai_service import OpenAIService
+from services.recipe_facets import FacetCounts
+from services.recipe_features import dietary_mask, normalize_ingredient, with_match_features
+from services.recipe_service import RecipeMatchingService
+from services.search_index import SearchIndex
+from services.nutrition_index import NutritionIndex
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+SEED = 42
+QUERIES = 20
+PARSED_RESPONSES = 1000
+SAVED_RECIPES = 25
+ADDED_RECIPES = 2000
+BENCHMARK_SESSION = 'benchmark-session'
+
+
+def summarize(timings: List[float], items: int) -> Dict:
+    median = statistics.median(timings)
+    return {
+        "runs": len(timings),
+        "items": items,
+        "min_ms": round(min(timings) * 1000, 4),
+        "median_ms": round(median * 1000, 4),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 4),
+        "per_item_us": round(median / items * 1e6, 4) if items else None,
+    }
+
+
+def measure(repeat: int, fn, items: int) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings, items)
+
+
+async def measure_async(repeat: int, fn, items: int) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - started)
+    return summarize(timings, items)
+
+
+def report(results: Dict, key: str, result: Dict):
+    results[key] = result
+    print(f"⏱️  {key:<44} median {result['median_ms']:10.2f} ms  ({result['per_item_us']:.2f} µs/item)")
+
+
+def bench_in_memory(results: Dict, size: int, repeat: int):
+    recipes = list(synthetic_catalog(size, SEED))
+    rng = random.Random(SEED)
+    available = synthetic_query(rng)
+
+    report(results, f"calculate_match_score[{size}]", measure(repeat, lambda: [
+        RecipeMatchingService.calculate_match_score(recipe['ingredients'], available) for recipe in recipes
+    ], size))
+
+    # The stored bitmasks the controller passes in
+    masks = [dietary_mask(recipe['dietary_tags']) for recipe in recipes]
+    report(results, f"filter_recipes_by_criteria[{size}]", measure(repeat, lambda: RecipeMatchingService.filter_recipes_by_criteria(
+        recipes, difficulty='easy', max_cooking_time=45, dietary_tags=['vegetarian'], dietary_masks=masks
+    ), size))
+
+
+def bench_search(results: Dict, size: int, repeat: int):
+    recipes = list(synthetic_catalog(size, SEED))
+    report(results, f"SearchIndex.build[{size}]", measure(1, lambda: SearchIndex.build(recipes), size))
+
+    index = SearchIndex.build(recipes)
+    rng = random.Random(SEED)
+    # One or two words, from rare ingredient names to cuisines that match a large part of the catalog
+    queries = [
+        ' '.join(rng.choice([rng.choice(PANTRY), rng.choice(CUISINES)]) for _ in range(rng.randint(1, 2)))
+        for _ in range(QUERIES)
+    ]
+    report(results, f"SearchIndex.search[{size}]", measure(repeat, lambda: [
+        index.search(query, 10) for query in queries
+    ], len(queries)))
+
+    # Incremental adds, including the merges they trigger
+    extra = list(synthetic_catalog(ADDED_RECIPES, SEED + 1))
+    report(results, f"SearchIndex.add[{size}]", measure(1, lambda: [index.add(recipe) for recipe in extra], len(extra)))
+
+
+def bench_nutrition(results: Dict, size: int, repeat: int):
+    index = NutritionIndex.build([with_match_features(recipe) for recipe in synthetic_catalog(size, SEED)])
+    rng = random.Random(SEED)
+    targets = [{'calories': rng.randint(200, 800), 'protein': rng.randint(10, 50)} for _ in range(QUERIES)]
+    report(results, f"NutritionIndex.nearest[{size}]", measure(repeat, lambda: [
+        index.search(target=target, limit=10) for target in targets
+    ], len(targets)))
+    report(results, f"NutritionIndex.range[{size}]", measure(repeat, lambda: [
+        index.search(ranges={'calories': (target['calories'] - 50, target['calories'] + 50), 'protein': (30, None)}, limit=10)
+        for target in targets
+    ], len(targets)))
+    available = [normalize_ingredient(ingredient) for ingredient in synthetic_query(rng)]
+    report(results, f"NutritionIndex.nearest_matching[{size}]", measure(repeat, lambda: [
+        index.search(target=target, available_normalized=available, min_score=30, limit=10) for target in targets
+    ], len(targets)))
+
+
+def bench_parse(results: Dict, repeat: int):
+    responses = [recipe_response_text(recipe) for recipe in synthetic_catalog(PARSED_RESPONSES, SEED)]
+    service = OpenAIService(FakeLLMProvider(latency_median=0))
+    report(results, "_parse_recipe_response", measure(repeat, lambda: [
+        service._parse_recipe_response(response) for response in responses
+    ], len(responses)))
+
+
+async def bench_mongo(results: Dict, client, size: int, repeat: int):
+    db = client[f"recipe_benchmark_{size}"]
+    started = time.perf_counter()
+    if await ensure_catalog(db, size, SEED):
+        print(f"📝 Loaded {size} synthetic recipes in {time.perf_counter() - started:.1f}s")
+    saved_ids = [recipe['id'] for recipe in await db.recipes.find({}, {"_id": 0, "id": 1}).limit(SAVED_RECIPES).to_list(None)]
+    await db.saved_recipes.delete_many({"user_session": BENCHMARK_SESSION})
+    await db.saved_recipes.insert_many([
+        {"id": f"saved-{recipe_id}", "user_session": BENCHMARK_SESSION, "recipe_id": recipe_id, "rating": 4, "notes": ""}
+        for recipe_id in saved_ids
+    ])
+
+    recipe_controller = RecipeController(db)
+    user_controller = UserController(db)
+    rng = random.Random(SEED)
+    queries = [synthetic_query(rng) for _ in range(QUERIES)]
+
+    async def find(**filters):
+        for query in queries:
+            await recipe_controller.find_matching_recipes(query, **filters)
+
+    report(results, f"find_matching_recipes[{size}]", await measure_async(repeat, find, len(queries)))
+    report(results, f"find_matching_recipes_filtered[{size}]", await measure_async(
+        repeat, lambda: find(difficulty='easy', max_cooking_time=45, dietary_tags=['vegetarian']), len(queries)
+    ))
+    # Facets turn off the filter pushdown, so the filtered query scores the whole catalog
+    report(results, f"find_matching_recipes_facets[{size}]", await measure_async(
+        repeat, lambda: find(difficulty='easy', max_cooking_time=45, dietary_tags=['vegetarian'], facets=FacetCounts()),
+        len(queries)
+    ))
+    report(results, f"get_saved_recipes[{size}]", await measure_async(
+        repeat, lambda: user_controller.get_saved_recipes(BENCHMARK_SESSION), len(saved_ids)
+    ))
+
+
+async def mongo_client() -> Optional[AsyncIOMotorClient]:
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=2000)
+    try:
+        await client.admin.command('ping')
+        return client
+    except Exception as e:
+        print(f"⚠️  Skipping MongoDB benchmarks, no server at {mongo_url} ({type(e).__name__})")
+        client.close()
+        return None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline_path: Path, tolerance: float) -> bool:
+    """Print median ratios against a baseline; False if anything regressed beyond `tolerance`"""
+    baseline = json.loads(baseline_path.read_text())
+    print(f"\n📊 Compared with {baseline_path} ({(baseline.get('commit') or 'unknown')[:12]})")
+    ok = True
+    for key, result in results.items():
+        before = baseline['results'].get(key)
+        if not before:
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        regressed = ratio > tolerance
+        ok = ok and not regressed
+        print(f"{'❌' if regressed else '✅'} {key:<44} {before['median_ms']:10.2f} -> {result['median_ms']:10.2f} ms  x{ratio:.2f}")
+    return ok
+
+
+async def main(args) -> int:
+    results: Dict[str, Dict] = {}
+    bench_parse(results, args.repeat)
+    for size in args.sizes:
+        print(f"\n🍲 {size} recipes")
+        bench_in_memory(results, size, args.repeat)
+        bench_search(results, size, args.repeat)
+        bench_nutrition(results, size, args.repeat)
+
+    if not args.skip_mongo:
+        client = await mongo_client()
+        if client is not None:
+            for size in args.sizes:
+                await bench_mongo(results, client, size, args.repeat)
+            client.close()
+
+    output = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": SEED,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(output, indent=2))
+        print(f"\n✅ Wrote {len(results)} results to {args.output}")
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--compare', type=Path, help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=1.2, help='allowed median slowdown ratio')
+    parser.add_argument('--skip-mongo', action='store_true')
+    sys.exit(asyncio.run(main(parser.parse_args())))
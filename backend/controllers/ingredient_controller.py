@@ -1,12 +1,22 @@
-from typing import List
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from services.openai_service import OpenAIService
+from services.ingredient_suggest import get_ingredient_suggester
 import logging
 
 logger = logging.getLogger(__name__)
 
 class IngredientController:
-    def __init__(self):
-        self.openai_service = OpenAIService()
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._openai_service: Optional[OpenAIService] = None
+    
+    @property
+    def openai_service(self) -> OpenAIService:
+        """The LLM service, created on the first image upload rather than at startup"""
+        if self._openai_service is None:
+            self._openai_service = OpenAIService()
+        return self._openai_service
     
     async def recognize_ingredients_from_image(self, image_base64: str) -> List[str]:
         """Process image and recognize ingredients"""
@@ -15,4 +25,13 @@ class IngredientController:
             return ingredients
         except Exception as e:
             logger.error(f"Error recognizing ingredients: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    async def suggest_ingredients(self, query: str, limit: int = 10) -> List[str]:
+        """Catalog ingredient names starting with (a word starting with) `query`, most used first"""
+        try:
+            suggester = await get_ingredient_suggester(self.db)
+            return suggester.suggest(query, limit)
+        except Exception as e:
+            logger.error(f"Error suggesting ingredients: {str(e)}")
+            raise
@@ -1,107 +1,641 @@
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from services.openai_service import OpenAIService
+from bson import ObjectId
+from services.openai_service import OpenAIService, TokenUsage
 from services.recipe_service import RecipeMatchingService
+from services.recipe_features import DIETARY_TAG_BITS, INDEX_PROJECTION, SCORING_PROJECTION, catalog_cutoff, get_match_features, normalize_ingredient, with_match_features
+from services.quantity_parser import format_ingredient_line, scale_nutrition, scale_quantities_batch
+from services.substitution_service import get_substitution_engine
+from services.trigram_index import TrigramIndex
+from services.similarity_index import SIMILARITY_INDEX_PATH, SimilarityIndex
+from services.preference_service import PreferenceService
+from services.recipe_snapshot import get_recipe_snapshot
+from services.recipe_facets import FacetCounts
+from services.search_index import SEARCH_PROJECTION, SEARCH_SYNC_INTERVAL, SearchIndex
+from services.nutrition_index import NUTRITION_PROJECTION, NutritionIndex, Ranges
+from services.recipe_writer import RecipeWriter
+from services.dedup_index import DEDUP_PROJECTION, DedupIndex, recipe_signature
+from services.metrics import track_operation
+from services.combo_tracker import ComboTracker, generation_key
+from services.ingredient_suggest import loaded_ingredient_suggester
 from models.recipe import Recipe
+import numpy as np
+import asyncio
+import heapq
+import json
 import logging
+import re
+import time
 
 logger = logging.getLogger(__name__)
 
+# Recipes matching less than this percentage of their ingredients are never suggested
+MIN_MATCH_SCORE = 30
+
+# Recipes scored per round trip while streaming the catalog in /find
+FIND_BATCH_SIZE = 500
+
+# Recipes per round trip, and per response chunk, of a catalog export
+EXPORT_BATCH_SIZE = 1000
+
+
+async def _iter_batches(cursor, size: int):
+    """Group the documents of an async cursor into lists of up to `size`"""
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 class RecipeController:
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncIOMotorDatabase, recipe_writer: Optional[RecipeWriter] = None,
+                 combo_tracker: Optional[ComboTracker] = None):
         self.db = db
-        self.openai_service = OpenAIService()
+        self.recipe_writer = recipe_writer
+        self.combo_tracker = combo_tracker
+        self._openai_service: Optional[OpenAIService] = None
         self.matching_service = RecipeMatchingService()
+        self.preference_service = PreferenceService(db)
+        self._ingredient_index: Optional[TrigramIndex] = None
+        self._ingredient_index_lock = asyncio.Lock()
+        self._similarity_index: Optional[SimilarityIndex] = None
+        self._similarity_index_lock = asyncio.Lock()
+        self._dedup_index: Optional[DedupIndex] = None
+        self._dedup_index_lock = asyncio.Lock()
+        self._search_index: Optional[SearchIndex] = None
+        self._search_index_lock = asyncio.Lock()
+        self._search_index_synced = 0.0
+        self._nutrition_index: Optional[NutritionIndex] = None
+        self._nutrition_index_lock = asyncio.Lock()
+        self._nutrition_index_synced = 0.0
+    
+    @property
+    def openai_service(self) -> OpenAIService:
+        """Created on first use, so that startup never waits for the LLM client"""
+        if self._openai_service is None:
+            self._openai_service = OpenAIService()
+        return self._openai_service
+    
+    async def get_ingredient_index(self) -> TrigramIndex:
+        """Trigram index over the catalog's ingredient vocabulary, built on first use"""
+        if self._ingredient_index is None:
+            async with self._ingredient_index_lock:
+                if self._ingredient_index is None:
+                    tokens = await self.db.recipes.distinct('match_features.ingredient_tokens')
+                    index = TrigramIndex()
+                    index.add_phrases(tokens)
+                    index.add_phrases(get_substitution_engine().ingredients)
+                    logger.info(f"Built ingredient trigram index with {len(index)} words")
+                    self._ingredient_index = index
+        return self._ingredient_index
+    
+    async def get_dedup_index(self) -> DedupIndex:
+        """MinHash LSH index of the catalog used to catch near-duplicate generations"""
+        if self._dedup_index is None:
+            async with self._dedup_index_lock:
+                if self._dedup_index is None:
+                    index = DedupIndex()
+                    async for recipe in self.db.recipes.find({}, DEDUP_PROJECTION):
+                        index.add(recipe['id'], recipe_signature(recipe))
+                    logger.info(f"Built near-duplicate index with {len(index)} recipes")
+                    self._dedup_index = index
+        return self._dedup_index
+    
+    async def _catch_up(self, index, projection: Dict):
+        """Add the recipes inserted since the index's cutoff, then move the cutoff forward.
+
+        Insertion order rather than created_at, which imported recipes can have in
+        the past; recipes seen again within the cutoff margin are skipped by add().
+        """
+        cutoff_id = catalog_cutoff()
+        async for recipe in self.db.recipes.find({"_id": {"$gte": ObjectId(index.cutoff_id)}}, projection):
+            index.add(recipe)
+        index.cutoff_id = cutoff_id
+    
+    async def get_search_index(self) -> SearchIndex:
+        """BM25 full-text index over the catalog, built on first use and kept up to date"""
+        if self._search_index is None:
+            async with self._search_index_lock:
+                if self._search_index is None:
+                    cutoff_id = catalog_cutoff()
+                    recipes = await self.db.recipes.find({}, SEARCH_PROJECTION).to_list(None)
+                    index = SearchIndex.build(recipes, cutoff_id)
+                    logger.info(f"Built search index with {len(index)} recipes")
+                    self._search_index = index
+                    self._search_index_synced = time.monotonic()
+        elif time.monotonic() - self._search_index_synced > SEARCH_SYNC_INTERVAL:
+            # Recipes written by other workers; the ones already indexed are skipped
+            self._search_index_synced = time.monotonic()
+            await self._catch_up(self._search_index, SEARCH_PROJECTION)
+        return self._search_index
+    
+    async def get_nutrition_index(self) -> NutritionIndex:
+        """Nutrition range and nearest-neighbour index, built on first use and kept up to date"""
+        if self._nutrition_index is None:
+            async with self._nutrition_index_lock:
+                if self._nutrition_index is None:
+                    cutoff_id = catalog_cutoff()
+                    recipes = await self.db.recipes.find({}, NUTRITION_PROJECTION).to_list(None)
+                    index = NutritionIndex.build(recipes, cutoff_id)
+                    logger.info(f"Built nutrition index with {len(index)} recipes")
+                    self._nutrition_index = index
+                    self._nutrition_index_synced = time.monotonic()
+        elif time.monotonic() - self._nutrition_index_synced > SEARCH_SYNC_INTERVAL:
+            self._nutrition_index_synced = time.monotonic()
+            await self._catch_up(self._nutrition_index, NUTRITION_PROJECTION)
+        return self._nutrition_index
+    
+    async def get_similarity_index(self) -> SimilarityIndex:
+        """TF-IDF similarity index, loaded from its offline build or built on first use"""
+        if self._similarity_index is None:
+            async with self._similarity_index_lock:
+                if self._similarity_index is None:
+                    if SIMILARITY_INDEX_PATH.exists():
+                        index = SimilarityIndex.load(SIMILARITY_INDEX_PATH)
+                        # Catch up with recipes inserted since the offline build; add() skips known ids
+                        query = {"_id": {"$gte": ObjectId(index.cutoff_id)}} if index.cutoff_id else {}
+                        async for recipe in self.db.recipes.find(query, INDEX_PROJECTION):
+                            index.add(recipe)
+                    else:
+                        cutoff_id = catalog_cutoff()
+                        recipes = await self.db.recipes.find({}, INDEX_PROJECTION).to_list(None)
+                        index = SimilarityIndex.build(recipes, cutoff_id)
+                    logger.info(f"Similarity index ready with {len(index)} recipes")
+                    self._similarity_index = index
+        return self._similarity_index
+    
+    @track_operation
+    async def correct_ingredients(self, ingredients: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """Map misspelled query words to their nearest known ingredient words"""
+        try:
+            index = await self.get_ingredient_index()
+            corrected = []
+            corrections = {}
+            for ingredient in ingredients:
+                phrase, phrase_corrections = index.correct_phrase(normalize_ingredient(ingredient))
+                corrected.append(phrase)
+                corrections.update(phrase_corrections)
+            return corrected, corrections
+        except Exception as e:
+            logger.error(f"Error correcting ingredients: {str(e)}")
+            raise
     
+    @track_operation
     async def generate_recipe_from_ingredients(
         self, 
         ingredients: List[str],
         dietary_preferences: List[str] = [],
         cuisine_preference: Optional[str] = None,
-        difficulty: Optional[str] = None
+        difficulty: Optional[str] = None,
+        usage: Optional[TokenUsage] = None,
+        record_combo: bool = True
     ) -> Dict:
-        """Generate a new recipe using AI"""
+        """Generate a new recipe using AI.
+
+        Without preferences, a recipe generated earlier for the same ingredient set
+        (by a previous request or by the pre-generation worker) is returned instead.
+        The tokens of the LLM call are added to `usage`; `record_combo` is off for
+        generations that are not user requests, so they do not count as demand.
+        """
         try:
+            if record_combo and self.combo_tracker is not None:
+                self.combo_tracker.record(ingredients, 'generate')
+            key = None if (dietary_preferences or cuisine_preference or difficulty) else generation_key(ingredients)
+            if key:
+                # A recipe generated moments ago may still be queued for writing
+                cached = self.recipe_writer.get_pending_by_key(key) if self.recipe_writer is not None else None
+                if cached is None:
+                    cached = await self.db.recipes.find_one({"generation_keys": key}, {"_id": 0, "match_features": 0})
+                if cached is not None:
+                    return {**cached, "cached": True}
+            
             recipe_data = await self.openai_service.generate_recipe(
                 ingredients=ingredients,
                 dietary_preferences=dietary_preferences,
                 cuisine_preference=cuisine_preference,
-                difficulty=difficulty
+                difficulty=difficulty,
+                usage=usage
             )
             
-            # Save to database
+            # Save to database; the id is assigned here, so with a write-behind queue
+            # the recipe is returned before it has been written
             recipe_obj = Recipe(**recipe_data)
             doc = recipe_obj.model_dump()
             doc['created_at'] = doc['created_at'].isoformat()
+            if key:
+                doc['generation_keys'] = [key]
+            with_match_features(doc)
+            response = {field: value for field, value in doc.items() if field != 'match_features'}
+            
+            # A near-duplicate of a known recipe is linked to it instead of being stored again
+            dedup_index = await self.get_dedup_index()
+            signature = recipe_signature(doc)
+            duplicate = dedup_index.find_duplicate(signature)
+            if duplicate is not None:
+                existing = await self.get_recipe_by_id(duplicate[0])
+                if existing is not None:
+                    logger.info(f"Generated recipe '{doc['name']}' is a near-duplicate of {duplicate[0]} "
+                                f"(similarity {duplicate[1]:.2f})")
+                    links = {}
+                    if doc['name'] != existing['name']:
+                        links['aliases'] = doc['name']
+                    if key:
+                        links['generation_keys'] = key
+                    # A canonical recipe still queued for writing gets its links once written
+                    queued = self.recipe_writer is not None and self.recipe_writer.link(duplicate[0], links)
+                    if links and not queued:
+                        await self.db.recipes.update_one({"id": duplicate[0]}, {"$addToSet": links})
+                    return {**existing, "deduplicated": True}
             
-            await self.db.recipes.insert_one(doc)
+            if self.recipe_writer is not None:
+                await self.recipe_writer.put(doc)
+            else:
+                await self.db.recipes.insert_one(doc)
+            if self._ingredient_index is not None:
+                self._ingredient_index.add_phrases(doc['match_features']['ingredient_tokens'])
+            if self._similarity_index is not None:
+                self._similarity_index.add(doc)
+            if self._search_index is not None:
+                self._search_index.add(doc)
+            if self._nutrition_index is not None:
+                self._nutrition_index.add(doc)
+            dedup_index.add(doc['id'], signature)
+            suggester = loaded_ingredient_suggester()
+            if suggester is not None:
+                suggester.add(doc['match_features']['ingredient_tokens'])
             
-            return recipe_data
+            return response
         except Exception as e:
             logger.error(f"Error generating recipe: {str(e)}")
             raise
     
+    @track_operation
     async def find_matching_recipes(
         self,
         ingredients: List[str],
         difficulty: Optional[str] = None,
         max_cooking_time: Optional[int] = None,
         dietary_tags: Optional[List[str]] = None,
-        limit: int = 10
+        limit: int = 10,
+        include_substitutions: bool = False,
+        user_session: Optional[str] = None,
+        dietary_match: str = 'all',
+        facets: Optional[FacetCounts] = None
     ) -> List[Dict]:
-        """Find recipes from database that match available ingredients"""
+        """Find recipes from database that match available ingredients.
+
+        The catalog is streamed in batches and only the best `limit` candidates are kept
+        in a bounded heap; full documents are fetched for those alone. When `facets` is
+        given, every matched candidate is also counted into it in the same pass.
+        """
         try:
-            # Get all recipes from database
-            recipes = await self.db.recipes.find({}, {"_id": 0}).to_list(1000)
-            
-            # Calculate match scores
-            for recipe in recipes:
-                recipe['match_score'] = self.matching_service.calculate_match_score(
-                    recipe.get('ingredients', []),
-                    ingredients
+            if self.combo_tracker is not None:
+                self.combo_tracker.record(ingredients, 'find')
+            if limit <= 0:
+                return []
+            
+            # Plain field filters are left to the database, unless the facets need the
+            # recipes they would exclude
+            query = {}
+            projection = SCORING_PROJECTION
+            if facets is not None:
+                projection = {**SCORING_PROJECTION, "difficulty": 1, "cooking_time": 1}
+            elif difficulty:
+                query['difficulty'] = {"$regex": f"^{re.escape(difficulty)}$", "$options": "i"}
+            if facets is None and max_cooking_time:
+                query['cooking_time'] = {"$lte": max_cooking_time}
+            
+            profile = await self.preference_service.get_profile(user_session) if user_session else None
+            available_normalized = [normalize_ingredient(ing) for ing in ingredients]
+            
+            # Min-heap of (rank, -position, id, match_score, tokens): the worst kept candidate
+            # is on top, and among equal ranks the one seen later loses
+            heap: List[Tuple[float, int, str, float, List[str]]] = []
+            position = 0
+            
+            # Rank the memory-mapped snapshot first and only stream recipes inserted after it.
+            # The snapshot has no raw tag lists, so tags outside the vocabulary need the stream.
+            snapshot = get_recipe_snapshot()
+            if snapshot is not None and all(normalize_ingredient(tag) in DIETARY_TAG_BITS for tag in dietary_tags or []):
+                heap = snapshot.rank(
+                    available_normalized, limit, MIN_MATCH_SCORE,
+                    difficulty=difficulty,
+                    max_cooking_time=max_cooking_time,
+                    dietary_tags=dietary_tags,
+                    dietary_match=dietary_match,
+                    profile=profile,
+                    facets=facets
                 )
+                heapq.heapify(heap)
+                position = len(snapshot)
+                query['_id'] = {"$gte": ObjectId(snapshot.cutoff_id)}
             
-            # Filter recipes
-            filtered = self.matching_service.filter_recipes_by_criteria(
-                recipes=recipes,
-                difficulty=difficulty,
-                max_cooking_time=max_cooking_time,
-                dietary_tags=dietary_tags,
-                min_match_score=30  # At least 30% match
-            )
+            cursor = self.db.recipes.find(query, projection).batch_size(FIND_BATCH_SIZE)
+            async for batch in _iter_batches(cursor, FIND_BATCH_SIZE):
+                if snapshot is not None and '_id' in query:
+                    # Recipes inserted just before the cutoff are ranked in the snapshot already
+                    batch = [recipe for recipe in batch if recipe['id'] not in snapshot]
+                    if not batch:
+                        continue
+                features_list = [get_match_features(recipe) for recipe in batch]
+                
+                # Personalize: drop recipes with the user's allergens or outside their
+                # dietary restrictions, and boost their favorite cuisines
+                if profile:
+                    keep, boost = profile.apply(features_list)
+                else:
+                    keep, boost = np.ones(len(batch), dtype=bool), np.zeros(len(batch))
+                dietary_masks = np.fromiter((f['dietary_mask'] for f in features_list), dtype=np.int64, count=len(batch))
+                dietary_ok = np.ones(len(batch), dtype=bool)
+                if dietary_tags:
+                    dietary_ok = self.matching_service.dietary_keep_mask(
+                        dietary_masks,
+                        dietary_tags,
+                        match=dietary_match,
+                        recipe_tags=[recipe.get('dietary_tags', []) for recipe in batch]
+                    )
+                
+                if facets is not None:
+                    # The facets count every matched candidate, not only those that could
+                    # enter the heap, so the whole batch is scored against the minimum
+                    scores = np.full(len(batch), np.nan)
+                    for row in np.flatnonzero(keep):
+                        score = self.matching_service.calculate_match_score_at_least(
+                            features_list[row]['ingredient_tokens'], available_normalized, MIN_MATCH_SCORE
+                        )
+                        if score is not None:
+                            scores[row] = score
+                    difficulties = np.array(
+                        [normalize_ingredient(recipe.get('difficulty') or '') for recipe in batch], dtype=object
+                    )
+                    cooking_times = np.array([
+                        recipe['cooking_time'] if isinstance(recipe.get('cooking_time'), (int, float)) else np.inf
+                        for recipe in batch
+                    ])
+                    difficulty_ok = difficulties == normalize_ingredient(difficulty) if difficulty else np.ones(len(batch), dtype=bool)
+                    time_ok = cooking_times <= max_cooking_time if max_cooking_time else np.ones(len(batch), dtype=bool)
+                    keep &= ~np.isnan(scores)
+                    facets.add(
+                        keep, difficulty_ok, time_ok, dietary_ok,
+                        np.array([normalize_ingredient(recipe.get('cuisine') or '') for recipe in batch], dtype=object),
+                        difficulties, cooking_times, dietary_masks
+                    )
+                    keep &= difficulty_ok & time_ok
+                keep &= dietary_ok
+                
+                for row in np.flatnonzero(keep):
+                    # A candidate has to reach the minimum match score and, once the heap
+                    # is full, beat the current k-th best
+                    min_score = MIN_MATCH_SCORE
+                    if len(heap) >= limit:
+                        min_score = max(min_score, round(heap[0][0] - boost[row] + 0.01, 2))
+                    tokens = features_list[row]['ingredient_tokens']
+                    if facets is None:
+                        score = self.matching_service.calculate_match_score_at_least(
+                            tokens, available_normalized, min_score
+                        )
+                    else:
+                        score = float(scores[row]) if scores[row] >= min_score else None
+                    if score is None:
+                        continue
+                    entry = (score + float(boost[row]), -(position + row), batch[row]['id'], score, tokens)
+                    if len(heap) < limit:
+                        heapq.heappush(heap, entry)
+                    else:
+                        heapq.heapreplace(heap, entry)
+                position += len(batch)
             
-            # Sort by match score
-            filtered.sort(key=lambda x: x.get('match_score', 0), reverse=True)
+            ranked = sorted(heap, reverse=True)
+            ids = [entry[2] for entry in ranked]
+            docs = await self.db.recipes.find(
+                {"id": {"$in": ids}}, {"_id": 0, "match_features": 0}
+            ).to_list(len(ids))
+            docs_by_id = {doc['id']: doc for doc in docs}
             
-            return filtered[:limit]
+            top = []
+            for _, _, recipe_id, score, tokens in ranked:
+                recipe = docs_by_id.get(recipe_id)
+                if recipe is None:
+                    continue
+                recipe['match_score'] = score
+                if include_substitutions:
+                    missing = self.matching_service.find_missing_ingredients(tokens, available_normalized)
+                    recipe['missing_ingredients'] = missing
+                    recipe['substitutions'] = self.matching_service.suggest_substitutions(missing, dietary_tags)
+                top.append(recipe)
+            
+            return top
         except Exception as e:
             logger.error(f"Error finding matching recipes: {str(e)}")
             raise
     
+    async def export_recipes(
+        self,
+        cuisine: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        dietary_tags: Optional[List[str]] = None,
+        max_cooking_time: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        after_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream matching recipes as NDJSON chunks ordered by (created_at, id).
+
+        An interrupted export is resumed by passing the created_at and id of the last
+        recipe received as `since` and `after_id`; `since` alone exports newer recipes.
+        """
+        query = {}
+        if cuisine:
+            query['cuisine'] = {"$regex": f"^{re.escape(cuisine)}$", "$options": "i"}
+        if difficulty:
+            query['difficulty'] = {"$regex": f"^{re.escape(difficulty)}$", "$options": "i"}
+        if dietary_tags:
+            query['$and'] = [
+                {"dietary_tags": {"$regex": f"^{re.escape(tag)}$", "$options": "i"}} for tag in dietary_tags
+            ]
+        if max_cooking_time:
+            query['cooking_time'] = {"$lte": max_cooking_time}
+        if since and after_id:
+            query['$or'] = [
+                {"created_at": {"$gt": since}},
+                {"created_at": since, "id": {"$gt": after_id}}
+            ]
+        elif since:
+            query['created_at'] = {"$gt": since}
+        
+        # The sort keys are always exported so that every line can serve as a checkpoint
+        if fields:
+            projection = {"_id": 0, "id": 1, "created_at": 1, **{field: 1 for field in fields}}
+        else:
+            projection = {"_id": 0, "match_features": 0}
+        
+        cursor = self.db.recipes.find(query, projection).sort(
+            [("created_at", 1), ("id", 1)]
+        ).batch_size(EXPORT_BATCH_SIZE)
+        try:
+            async for batch in _iter_batches(cursor, EXPORT_BATCH_SIZE):
+                yield ''.join(json.dumps(recipe, default=str) + '\n' for recipe in batch)
+        except Exception as e:
+            logger.error(f"Error exporting recipes: {str(e)}")
+            raise
+    
+    @track_operation
     async def get_recipe_by_id(self, recipe_id: str) -> Optional[Dict]:
         """Get a specific recipe by ID"""
         try:
-            recipe = await self.db.recipes.find_one({"id": recipe_id}, {"_id": 0})
+            if self.recipe_writer is not None:
+                pending = self.recipe_writer.get_pending(recipe_id)
+                if pending is not None:
+                    return pending
+            recipe = await self.db.recipes.find_one({"id": recipe_id}, {"_id": 0, "match_features": 0})
             return recipe
         except Exception as e:
             logger.error(f"Error getting recipe: {str(e)}")
             raise
     
+    @track_operation
+    async def get_similar_recipes(self, recipe_id: str, limit: int = 5) -> Optional[List[Dict]]:
+        """Recipes most similar to the given one, or None if it does not exist"""
+        try:
+            index = await self.get_similarity_index()
+            vector = index.vector(recipe_id)
+            if vector is None:
+                # Recipes written by another worker are not in this worker's index yet
+                recipe = await self.db.recipes.find_one({"id": recipe_id}, INDEX_PROJECTION)
+                if not recipe:
+                    return None
+                index.add(recipe)
+                vector = index.vector(recipe_id)
+            
+            neighbours = index.most_similar(vector, k=limit, exclude=recipe_id)
+            scores = dict(neighbours)
+            docs = await self.db.recipes.find(
+                {"id": {"$in": list(scores)}},
+                {"_id": 0, "match_features": 0}
+            ).to_list(len(scores))
+            for doc in docs:
+                doc['similarity'] = scores[doc['id']]
+            docs.sort(key=lambda x: x['similarity'], reverse=True)
+            return docs
+        except Exception as e:
+            logger.error(f"Error getting similar recipes: {str(e)}")
+            raise
+    
+    @track_operation
+    async def search_recipes(self, query: str, limit: int = 10) -> List[Dict]:
+        """Recipes ranked by the BM25 relevance of their name, cuisine and instructions"""
+        try:
+            index = await self.get_search_index()
+            scores = dict(index.search(query, limit))
+            docs = await self.db.recipes.find(
+                {"id": {"$in": list(scores)}},
+                {"_id": 0, "match_features": 0}
+            ).to_list(len(scores))
+            for doc in docs:
+                doc['search_score'] = scores[doc['id']]
+            docs.sort(key=lambda x: x['search_score'], reverse=True)
+            return docs
+        except Exception as e:
+            logger.error(f"Error searching recipes: {str(e)}")
+            raise
+    
+    @track_operation
+    async def search_by_nutrition(
+        self,
+        ranges: Optional[Ranges] = None,
+        target: Optional[Dict[str, float]] = None,
+        ingredients: Optional[List[str]] = None,
+        limit: int = 10
+    ) -> List[Dict]:
+        """Recipes within per-serving nutrient ranges, nearest to a nutrition target first.
+
+        With ingredients, only recipes reaching the minimum match score are returned,
+        best matches first when there is no target.
+        """
+        try:
+            index = await self.get_nutrition_index()
+            available_normalized = [normalize_ingredient(ing) for ing in ingredients] if ingredients else None
+            entries = index.search(ranges, target, available_normalized, MIN_MATCH_SCORE, limit)
+            docs = await self.db.recipes.find(
+                {"id": {"$in": [entry[0] for entry in entries]}},
+                {"_id": 0, "match_features": 0}
+            ).to_list(len(entries))
+            docs_by_id = {doc['id']: doc for doc in docs}
+            
+            recipes = []
+            for recipe_id, distance, score in entries:
+                recipe = docs_by_id.get(recipe_id)
+                if recipe is None:
+                    continue
+                if distance is not None:
+                    recipe['nutrition_distance'] = distance
+                if score is not None:
+                    recipe['match_score'] = score
+                recipes.append(recipe)
+            return recipes
+        except Exception as e:
+            logger.error(f"Error searching recipes by nutrition: {str(e)}")
+            raise
+    
+    @track_operation
     async def adjust_serving_size(self, recipe_id: str, new_serving_size: int) -> Dict:
         """Adjust recipe quantities for different serving sizes"""
         try:
-            recipe = await self.get_recipe_by_id(recipe_id)
-            if not recipe:
+            recipes = await self.adjust_serving_sizes([(recipe_id, new_serving_size)])
+            return recipes[0]
+        except Exception as e:
+            logger.error(f"Error adjusting serving size: {str(e)}")
+            raise
+    
+    @track_operation
+    async def adjust_serving_sizes(self, servings: List[Tuple[str, int]]) -> List[Dict]:
+        """Scale several recipes (e.g. a whole meal plan) in one query and one vectorized pass"""
+        try:
+            if any(new_serving_size <= 0 for _, new_serving_size in servings):
+                raise ValueError("Serving size must be positive")
+            
+            recipe_ids = list({recipe_id for recipe_id, _ in servings})
+            # Recipes still queued for writing are not in the database yet
+            by_id = {}
+            if self.recipe_writer is not None:
+                for recipe_id in recipe_ids:
+                    pending = self.recipe_writer.get_pending(recipe_id)
+                    if pending is not None:
+                        by_id[recipe_id] = pending
+            stored_ids = [recipe_id for recipe_id in recipe_ids if recipe_id not in by_id]
+            if stored_ids:
+                docs = await self.db.recipes.find({"id": {"$in": stored_ids}}, {"_id": 0}).to_list(len(stored_ids))
+                by_id.update((doc['id'], doc) for doc in docs)
+            missing = [recipe_id for recipe_id in recipe_ids if recipe_id not in by_id]
+            if missing:
                 raise ValueError("Recipe not found")
             
-            original_serving = recipe['serving_size']
-            multiplier = new_serving_size / original_serving
+            quantity_lists = []
+            multipliers = []
+            for recipe_id, new_serving_size in servings:
+                recipe = by_id[recipe_id]
+                if not recipe.get('serving_size') or recipe['serving_size'] <= 0:
+                    raise ValueError(f"Recipe {recipe_id} has no serving size to scale from")
+                quantity_lists.append(get_match_features(recipe)['quantities'])
+                multipliers.append(new_serving_size / recipe['serving_size'])
             
-            # Note: This is a simplified version. In production, you'd parse and adjust ingredient quantities
-            recipe['serving_size'] = new_serving_size
-            recipe['note'] = f"Recipe adjusted from {original_serving} to {new_serving_size} servings"
+            scaled_lists = scale_quantities_batch(quantity_lists, multipliers)
             
-            return recipe
+            result = []
+            for (recipe_id, new_serving_size), scaled, multiplier in zip(servings, scaled_lists, multipliers):
+                recipe = {k: v for k, v in by_id[recipe_id].items() if k != 'match_features'}
+                original_serving = recipe['serving_size']
+                recipe['ingredients'] = [format_ingredient_line(q) for q in scaled]
+                recipe['serving_size'] = new_serving_size
+                # Nutrition is stored per serving, so only the whole-dish totals change
+                recipe['total_nutrition'] = scale_nutrition(recipe['nutrition'], new_serving_size)
+                recipe['note'] = f"Recipe adjusted from {original_serving} to {new_serving_size} servings"
+                result.append(recipe)
+            
+            return result
         except Exception as e:
-            logger.error(f"Error adjusting serving size: {str(e)}")
+            logger.error(f"Error adjusting serving sizes: {str(e)}")
             raise
\ No newline at end of file
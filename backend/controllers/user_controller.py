@@ -1,7 +1,11 @@
 from typing import List, Dict, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from models.user_preference import UserPreference, UserPreferenceCreate
 from models.saved_recipe import SavedRecipe, SavedRecipeCreate
+from services.preference_service import PreferenceService
+from services.metrics import track_operation
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,33 +14,46 @@ class UserController:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
     
+    async def _upsert(self, collection, key: Dict, update: Dict) -> Dict:
+        """Update or create the document with `key` in one round trip and return it.
+
+        The unique index on `key` makes concurrent upserts of a new key fail with a
+        duplicate key error on all but one writer; retrying turns them into updates.
+        """
+        for attempt in range(2):
+            try:
+                return await collection.find_one_and_update(
+                    key,
+                    update,
+                    projection={"_id": 0},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                if attempt:
+                    raise
+    
+    @track_operation
     async def save_user_preferences(self, preferences: UserPreferenceCreate) -> Dict:
         """Save or update user preferences"""
         try:
-            # Check if preferences exist for this session
-            existing = await self.db.user_preferences.find_one(
+            new_doc = UserPreference(**preferences.model_dump()).model_dump()
+            saved = await self._upsert(
+                self.db.user_preferences,
                 {"user_session": preferences.user_session},
-                {"_id": 0}
+                {
+                    "$set": preferences.model_dump(exclude={"user_session"}),
+                    "$setOnInsert": {"id": new_doc['id'], "created_at": new_doc['created_at'].isoformat()}
+                }
             )
-            
-            if existing:
-                # Update existing
-                await self.db.user_preferences.update_one(
-                    {"user_session": preferences.user_session},
-                    {"$set": preferences.model_dump()}
-                )
-                return {**existing, **preferences.model_dump()}
-            else:
-                # Create new
-                pref_obj = UserPreference(**preferences.model_dump())
-                doc = pref_obj.model_dump()
-                doc['created_at'] = doc['created_at'].isoformat()
-                await self.db.user_preferences.insert_one(doc)
-                return doc
+            # After the write, so that a concurrent /find cannot cache the old profile again
+            PreferenceService.invalidate(preferences.user_session)
+            return saved
         except Exception as e:
             logger.error(f"Error saving preferences: {str(e)}")
             raise
     
+    @track_operation
     async def get_user_preferences(self, user_session: str) -> Optional[Dict]:
         """Get user preferences"""
         try:
@@ -49,39 +66,24 @@ class UserController:
             logger.error(f"Error getting preferences: {str(e)}")
             raise
     
+    @track_operation
     async def save_recipe(self, saved_recipe: SavedRecipeCreate) -> Dict:
-        """Save a recipe to user's favorites"""
+        """Save a recipe to user's favorites, or update its rating/notes if already saved"""
         try:
-            # Check if already saved
-            existing = await self.db.saved_recipes.find_one(
+            new_doc = SavedRecipe(**saved_recipe.model_dump()).model_dump()
+            return await self._upsert(
+                self.db.saved_recipes,
+                {"user_session": saved_recipe.user_session, "recipe_id": saved_recipe.recipe_id},
                 {
-                    "user_session": saved_recipe.user_session,
-                    "recipe_id": saved_recipe.recipe_id
-                },
-                {"_id": 0}
+                    "$set": {"rating": saved_recipe.rating, "notes": saved_recipe.notes},
+                    "$setOnInsert": {"id": new_doc['id'], "created_at": new_doc['created_at'].isoformat()}
+                }
             )
-            
-            if existing:
-                # Update rating/notes
-                await self.db.saved_recipes.update_one(
-                    {
-                        "user_session": saved_recipe.user_session,
-                        "recipe_id": saved_recipe.recipe_id
-                    },
-                    {"$set": {"rating": saved_recipe.rating, "notes": saved_recipe.notes}}
-                )
-                return {**existing, "rating": saved_recipe.rating, "notes": saved_recipe.notes}
-            else:
-                # Create new
-                saved_obj = SavedRecipe(**saved_recipe.model_dump())
-                doc = saved_obj.model_dump()
-                doc['created_at'] = doc['created_at'].isoformat()
-                await self.db.saved_recipes.insert_one(doc)
-                return doc
         except Exception as e:
             logger.error(f"Error saving recipe: {str(e)}")
             raise
     
+    @track_operation
     async def get_saved_recipes(self, user_session: str) -> List[Dict]:
         """Get user's saved recipes with full recipe details"""
         try:
@@ -95,7 +97,7 @@ class UserController:
             for saved_recipe in saved:
                 recipe = await self.db.recipes.find_one(
                     {"id": saved_recipe['recipe_id']},
-                    {"_id": 0}
+                    {"_id": 0, "match_features": 0}
                 )
                 if recipe:
                     result.append({
@@ -109,6 +111,7 @@ class UserController:
             logger.error(f"Error getting saved recipes: {str(e)}")
             raise
     
+    @track_operation
     async def delete_saved_recipe(self, user_session: str, recipe_id: str) -> bool:
         """Remove a recipe from favorites"""
         try:
@@ -1,22 +1,44 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel
+from typing import Optional
 from controllers.ingredient_controller import IngredientController
+from services.query_log import QueryLog
+from services.ingredient_suggest import MAX_SUGGESTIONS
+import time
 
 router = APIRouter(prefix="/ingredients", tags=["ingredients"])
 
 class RecognizeImageRequest(BaseModel):
     image_base64: str
 
-def init_ingredient_routes():
-    controller = IngredientController()
+def init_ingredient_routes(db: AsyncIOMotorDatabase, query_log: Optional[QueryLog] = None):
+    controller = IngredientController(db)
     
     @router.post("/recognize")
     async def recognize_ingredients(request: RecognizeImageRequest):
         """Recognize ingredients from an uploaded image"""
+        started = time.perf_counter()
+        ingredients = None
         try:
             ingredients = await controller.recognize_ingredients_from_image(request.image_base64)
             return {"success": True, "ingredients": ingredients}
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            if query_log is not None:
+                query_log.record(
+                    'recognize', ingredients or [], (time.perf_counter() - started) * 1000,
+                    results=len(ingredients or []), error=ingredients is None
+                )
+    
+    @router.get("/suggest")
+    async def suggest_ingredients(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)):
+        """Autocomplete ingredient names from the recipe catalog"""
+        try:
+            suggestions = await controller.suggest_ingredients(q, limit)
+            return {"success": True, "suggestions": suggestions}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
     
     return router
\ No newline at end of file
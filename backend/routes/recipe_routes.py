@@ -1,12 +1,22 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Literal, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from controllers.recipe_controller import RecipeController
+from services.recipe_writer import RecipeWriter
+from services.combo_tracker import ComboTracker
+from services.query_log import QueryLog
+from services.recipe_facets import FacetCounts
+import time
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
 # Request/Response Models
+
+# Matching looks up the substrings of every query ingredient, so their length is bounded
+Ingredient = Annotated[str, Field(max_length=100)]
+
 class GenerateRecipeRequest(BaseModel):
     ingredients: List[str]
     dietary_preferences: List[str] = []
@@ -14,21 +24,46 @@ class GenerateRecipeRequest(BaseModel):
     difficulty: Optional[str] = None
 
 class FindRecipesRequest(BaseModel):
-    ingredients: List[str]
+    ingredients: List[Ingredient]
     difficulty: Optional[str] = None
     max_cooking_time: Optional[int] = None
     dietary_tags: Optional[List[str]] = None
+    dietary_match: Literal['any', 'all'] = 'all'
+    include_substitutions: bool = False
+    user_session: Optional[str] = None
+    # Also return cuisine, difficulty, cooking-time and dietary tag counts of the matches
+    facets: bool = False
+
+class NutrientRange(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+Nutrient = Literal['calories', 'protein', 'carbs', 'fat', 'fiber']
+
+class NutritionSearchRequest(BaseModel):
+    # Per serving, e.g. {"protein": {"min": 30}}
+    ranges: Dict[Nutrient, NutrientRange] = {}
+    # Nearest recipes to these values first, e.g. {"calories": 500}
+    target: Dict[Nutrient, float] = {}
+    ingredients: List[Ingredient] = []
+    limit: int = Field(10, ge=1, le=50)
 
 class AdjustServingRequest(BaseModel):
     recipe_id: str
     new_serving_size: int
 
-def init_recipe_routes(db: AsyncIOMotorDatabase):
-    controller = RecipeController(db)
+class AdjustMealPlanRequest(BaseModel):
+    recipes: List[AdjustServingRequest]
+
+def init_recipe_routes(db: AsyncIOMotorDatabase, recipe_writer: Optional[RecipeWriter] = None,
+                       combo_tracker: Optional[ComboTracker] = None, query_log: Optional[QueryLog] = None):
+    controller = RecipeController(db, recipe_writer=recipe_writer, combo_tracker=combo_tracker)
     
     @router.post("/generate")
     async def generate_recipe(request: GenerateRecipeRequest):
         """Generate a new recipe using AI based on ingredients"""
+        started = time.perf_counter()
+        recipe = None
         try:
             recipe = await controller.generate_recipe_from_ingredients(
                 ingredients=request.ingredients,
@@ -39,17 +74,98 @@ def init_recipe_routes(db: AsyncIOMotorDatabase):
             return {"success": True, "recipe": recipe}
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            if query_log is not None:
+                query_log.record(
+                    'generate', request.ingredients, (time.perf_counter() - started) * 1000,
+                    results=1 if recipe else 0,
+                    filters={"dietary_preferences": request.dietary_preferences,
+                             "cuisine": request.cuisine_preference, "difficulty": request.difficulty},
+                    cache_hit=bool(recipe and (recipe.get('cached') or recipe.get('deduplicated'))),
+                    error=recipe is None
+                )
     
     @router.post("/find")
     async def find_recipes(request: FindRecipesRequest):
         """Find matching recipes from database"""
+        started = time.perf_counter()
+        ingredients, recipes = request.ingredients, None
         try:
+            ingredients, corrections = await controller.correct_ingredients(request.ingredients)
+            facets = FacetCounts() if request.facets else None
             recipes = await controller.find_matching_recipes(
-                ingredients=request.ingredients,
+                ingredients=ingredients,
                 difficulty=request.difficulty,
                 max_cooking_time=request.max_cooking_time,
-                dietary_tags=request.dietary_tags
+                dietary_tags=request.dietary_tags,
+                include_substitutions=request.include_substitutions,
+                user_session=request.user_session,
+                dietary_match=request.dietary_match,
+                facets=facets
             )
+            response = {"success": True, "recipes": recipes, "count": len(recipes), "corrections": corrections}
+            if facets is not None:
+                response["facets"] = facets.to_dict()
+            return response
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            if query_log is not None:
+                query_log.record(
+                    'find', ingredients, (time.perf_counter() - started) * 1000,
+                    results=len(recipes) if recipes is not None else 0,
+                    filters={"difficulty": request.difficulty, "max_cooking_time": request.max_cooking_time,
+                             "dietary_tags": request.dietary_tags,
+                             "dietary_match": request.dietary_match if request.dietary_tags else None},
+                    error=recipes is None
+                )
+    
+    @router.post("/nutrition-search")
+    async def search_by_nutrition(request: NutritionSearchRequest):
+        """Find recipes by per-macro ranges and/or a nutrition target, optionally matching ingredients"""
+        try:
+            ingredients, corrections = request.ingredients, {}
+            if ingredients:
+                ingredients, corrections = await controller.correct_ingredients(ingredients)
+            recipes = await controller.search_by_nutrition(
+                ranges={nutrient: (bounds.min, bounds.max) for nutrient, bounds in request.ranges.items()},
+                target=request.target,
+                ingredients=ingredients,
+                limit=request.limit
+            )
+            return {"success": True, "recipes": recipes, "count": len(recipes), "corrections": corrections}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    @router.get("/export")
+    async def export_recipes(
+        cuisine: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        dietary_tags: Optional[List[str]] = Query(None),
+        max_cooking_time: Optional[int] = None,
+        fields: Optional[str] = None,
+        since: Optional[str] = None,
+        after_id: Optional[str] = None
+    ):
+        """Stream the recipe catalog as NDJSON, ordered by created_at and id"""
+        if after_id and not since:
+            raise HTTPException(status_code=400, detail="after_id requires since")
+        lines = controller.export_recipes(
+            cuisine=cuisine,
+            difficulty=difficulty,
+            dietary_tags=dietary_tags,
+            max_cooking_time=max_cooking_time,
+            fields=[field.strip() for field in fields.split(',') if field.strip()] if fields else None,
+            since=since,
+            after_id=after_id
+        )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    
+    @router.get("/search")
+    async def search_recipes(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(10, ge=1, le=50)):
+        """Full-text search over recipe names, cuisines and instructions"""
+        try:
+            recipes = await controller.search_recipes(q, limit)
             return {"success": True, "recipes": recipes, "count": len(recipes)}
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
@@ -67,6 +183,19 @@ def init_recipe_routes(db: AsyncIOMotorDatabase):
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
+    @router.get("/{recipe_id}/similar")
+    async def get_similar_recipes(recipe_id: str, limit: int = Query(5, ge=1, le=50)):
+        """Get recipes similar to a specific recipe"""
+        try:
+            recipes = await controller.get_similar_recipes(recipe_id, limit=limit)
+            if recipes is None:
+                raise HTTPException(status_code=404, detail="Recipe not found")
+            return {"success": True, "recipes": recipes, "count": len(recipes)}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
     @router.post("/adjust-serving")
     async def adjust_serving(request: AdjustServingRequest):
         """Adjust recipe serving size"""
@@ -79,4 +208,15 @@ def init_recipe_routes(db: AsyncIOMotorDatabase):
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
+    @router.post("/adjust-serving/batch")
+    async def adjust_serving_batch(request: AdjustMealPlanRequest):
+        """Adjust serving sizes of a whole meal plan in one call"""
+        try:
+            recipes = await controller.adjust_serving_sizes(
+                [(item.recipe_id, item.new_serving_size) for item in request.recipes]
+            )
+            return {"success": True, "recipes": recipes, "count": len(recipes)}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    
     return router
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""One-off migration that writes the current match features onto existing recipes.
+
+Run from the backend directory:
+
+    python -m scripts.backfill_match_features [--batch-size 500] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from services.recipe_features import FEATURES_VERSION, compute_match_features
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+
+async def backfill(batch_size: int, dry_run: bool):
+    """Recompute match features for every recipe whose stored version is missing or stale"""
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get('DB_NAME', 'recipe_generator_db')]
+
+    stale_query = {"match_features.version": {"$ne": FEATURES_VERSION}}
+    print(f"🔍 Recipes with stale match features: {await db.recipes.count_documents(stale_query)}")
+
+    cursor = db.recipes.find(stale_query, {"_id": 1, "ingredients": 1, "cuisine": 1, "dietary_tags": 1})
+    updated = 0
+    pending = []
+    async for recipe in cursor:
+        pending.append(UpdateOne(
+            {"_id": recipe['_id']},
+            {"$set": {"match_features": compute_match_features(recipe)}}
+        ))
+        if len(pending) >= batch_size:
+            updated += await _flush(db, pending, dry_run)
+            pending = []
+    if pending:
+        updated += await _flush(db, pending, dry_run)
+
+    print(f"✅ {'Would update' if dry_run else 'Updated'} {updated} recipes to features v{FEATURES_VERSION}")
+    client.close()
+
+
+async def _flush(db, operations, dry_run: bool) -> int:
+    if dry_run:
+        return len(operations)
+    result = await db.recipes.bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.dry_run))
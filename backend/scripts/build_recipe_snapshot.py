@@ -0,0 +1,50 @@
+"""Offline build of the memory-mapped recipe snapshot used by POST /api/recipes/find.
+
+Run from the backend directory:
+
+    python -m scripts.build_recipe_snapshot [--output data/recipe_snapshot.bin]
+
+Running workers pick up the new file within a few seconds; it replaces the old
+one with an atomic rename, so it can be rebuilt while the server is running.
+"""
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.recipe_features import SCORING_PROJECTION, catalog_cutoff
+from services.recipe_snapshot import RECIPE_SNAPSHOT_PATH, RecipeSnapshot
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+# _id tells the recipes inserted from the cutoff on, which /find may stream again
+SNAPSHOT_PROJECTION = {**SCORING_PROJECTION, "_id": 1, "difficulty": 1, "cooking_time": 1}
+
+
+async def build(output: Path):
+    """Build the snapshot over every recipe and write it atomically to `output`"""
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get('DB_NAME', 'recipe_generator_db')]
+
+    started = time.perf_counter()
+    cutoff_id = catalog_cutoff()
+    recipes = await db.recipes.find({}, SNAPSHOT_PROJECTION).to_list(None)
+    print(f"📝 Loaded {len(recipes)} recipes in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    RecipeSnapshot.write(output, recipes, cutoff_id)
+    print(f"✅ Wrote recipe snapshot to {output} ({output.stat().st_size / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', type=Path, default=RECIPE_SNAPSHOT_PATH)
+    args = parser.parse_args()
+    asyncio.run(build(args.output))
@@ -0,0 +1,45 @@
+"""Offline build of the recipe similarity index served by GET /api/recipes/{id}/similar.
+
+Run from the backend directory:
+
+    python -m scripts.build_similarity_index [--output data/similarity_index.npz]
+"""
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.recipe_features import INDEX_PROJECTION, catalog_cutoff
+from services.similarity_index import SIMILARITY_INDEX_PATH, SimilarityIndex
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+
+async def build(output: Path):
+    """Build the index over every recipe and write it atomically to `output`"""
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get('DB_NAME', 'recipe_generator_db')]
+
+    started = time.perf_counter()
+    cutoff_id = catalog_cutoff()
+    recipes = await db.recipes.find({}, INDEX_PROJECTION).to_list(None)
+    print(f"📝 Loaded {len(recipes)} recipes in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    index = SimilarityIndex.build(recipes, cutoff_id)
+    index.save(output)
+    print(f"✅ Wrote similarity index to {output} in {time.perf_counter() - started:.1f}s")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', type=Path, default=SIMILARITY_INDEX_PATH)
+    args = parser.parse_args()
+    asyncio.run(build(args.output))
@@ -0,0 +1,91 @@
+"""One-off job that merges near-duplicate recipes already in the collection.
+
+Run from the backend directory:
+
+    python -m scripts.dedupe_recipes [--threshold 0.8] [--batch-size 500] [--dry-run]
+
+Recipes are visited oldest first; a recipe that is a near-duplicate of an earlier
+one is deleted, its name is kept in the earlier recipe's aliases and saved
+favorites pointing at it are moved over to the earlier recipe.
+"""
+import argparse
+import asyncio
+import os
+from pathlib import Path
+from typing import Dict
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from services.dedup_index import DEDUP_PROJECTION, DUPLICATE_THRESHOLD, DedupIndex, recipe_signature
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+
+async def dedupe(threshold: float, batch_size: int, dry_run: bool):
+    """Find near-duplicates with the LSH index and merge them into the earliest recipe"""
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get('DB_NAME', 'recipe_generator_db')]
+
+    index = DedupIndex()
+    duplicates: Dict[str, str] = {}  # duplicate id -> canonical id
+    names: Dict[str, str] = {}
+    cursor = db.recipes.find({}, DEDUP_PROJECTION).sort([("created_at", 1), ("id", 1)])
+    async for recipe in cursor:
+        signature = recipe_signature(recipe)
+        match = index.find_duplicate(signature, threshold)
+        if match is None:
+            index.add(recipe['id'], signature)
+        else:
+            duplicates[recipe['id']] = match[0]
+            names[recipe['id']] = recipe.get('name', '')
+    print(f"🔍 {len(duplicates)} near-duplicates among {len(index) + len(duplicates)} recipes")
+
+    if dry_run or not duplicates:
+        client.close()
+        return
+
+    duplicate_ids = list(duplicates)
+    for start in range(0, len(duplicate_ids), batch_size):
+        chunk = duplicate_ids[start:start + batch_size]
+        await _merge(db, {recipe_id: duplicates[recipe_id] for recipe_id in chunk}, names)
+        print(f"🧹 Merged {min(start + batch_size, len(duplicate_ids))}/{len(duplicate_ids)}")
+
+    print(f"✅ Removed {len(duplicates)} near-duplicate recipes")
+    client.close()
+
+
+async def _merge(db, duplicates: Dict[str, str], names: Dict[str, str]):
+    # Keep the duplicates' names as aliases of the recipes they were merged into
+    alias_updates = [
+        UpdateOne({"id": canonical}, {"$addToSet": {"aliases": names[duplicate]}})
+        for duplicate, canonical in duplicates.items() if names[duplicate]
+    ]
+    if alias_updates:
+        await db.recipes.bulk_write(alias_updates, ordered=False)
+
+    # Point favorites at the canonical recipe; a user who already saved it keeps that
+    # favorite, and the duplicate's rating and notes are dropped
+    saved = await db.saved_recipes.find({"recipe_id": {"$in": list(duplicates)}}, {"_id": 1, "recipe_id": 1}).to_list(None)
+    for favorite in saved:
+        try:
+            await db.saved_recipes.update_one(
+                {"_id": favorite['_id']}, {"$set": {"recipe_id": duplicates[favorite['recipe_id']]}}
+            )
+        except DuplicateKeyError:
+            await db.saved_recipes.delete_one({"_id": favorite['_id']})
+
+    await db.recipes.bulk_write([DeleteOne({"id": duplicate}) for duplicate in duplicates], ordered=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(dedupe(args.threshold, args.batch_size, args.dry_run))
@@ -0,0 +1,182 @@
+"""Bulk import of recipes from JSONL or CSV files.
+
+Run from the backend directory:
+
+    python -m scripts.import_recipes recipes.jsonl [more.csv ...] [--batch-size 1000] [--workers 4] [--restart]
+
+JSONL files hold one recipe object per line, with the fields of models.recipe.Recipe.
+CSV files have one column per scalar field; the list fields (ingredients, instructions,
+dietary_tags) are separated by "|" and nutrition is given in calories, protein, carbs,
+fat and fiber columns.
+
+Records are validated in a process pool and written with unordered insert_many
+batches. Progress is checkpointed next to each input file after every batch, so an
+interrupted import picks up where it stopped when run again; recipes without an id
+get one derived from their file and line, which makes re-inserting a batch harmless.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from models.recipe import Recipe
+from services.recipe_features import with_match_features
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+LIST_FIELDS = ('ingredients', 'instructions', 'dietary_tags')
+NUTRITION_FIELDS = ('calories', 'protein', 'carbs', 'fat', 'fiber')
+DUPLICATE_KEY_ERROR = 11000
+REPORT_INTERVAL = 2.0  # seconds
+
+
+def read_records(path: Path, start_line: int) -> Iterator[Tuple[int, object]]:
+    """Yield (line number, raw record) after `start_line`; JSONL lines are parsed by the workers"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.suffix.lower() == '.csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                if reader.line_num > start_line:
+                    yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if line_number > start_line and line.strip():
+                    yield line_number, line
+
+
+def csv_to_record(row: Dict[str, str]) -> Dict:
+    record = {key: value for key, value in row.items() if value not in (None, '')}
+    for field in LIST_FIELDS:
+        record[field] = [item.strip() for item in row.get(field, '').split('|') if item.strip()]
+    record['nutrition'] = {field: record.pop(field) for field in NUTRITION_FIELDS if field in record}
+    return record
+
+
+def prepare_batch(source: str, batch: List[Tuple[int, object]]) -> Tuple[List[Dict], List[Tuple[int, str]]]:
+    """Validate raw records and turn them into recipe documents with match features (runs in a worker)"""
+    docs, errors = [], []
+    for line_number, raw in batch:
+        try:
+            record = csv_to_record(raw) if isinstance(raw, dict) else json.loads(raw)
+            record.setdefault('id', str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{line_number}")))
+            doc = Recipe(**record).model_dump()
+            doc['created_at'] = doc['created_at'].isoformat()
+            docs.append(with_match_features(doc))
+        except (ValueError, TypeError, AttributeError, ValidationError) as e:
+            errors.append((line_number, str(e).splitlines()[0]))
+    return docs, errors
+
+
+def load_checkpoint(path: Path) -> Dict:
+    if path.exists():
+        return json.loads(path.read_text())
+    return {'line': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0}
+
+
+def save_checkpoint(path: Path, checkpoint: Dict):
+    tmp_path = Path(f"{path}.tmp")
+    tmp_path.write_text(json.dumps(checkpoint))
+    os.replace(tmp_path, path)
+
+
+async def insert_batch(db, docs: List[Dict]) -> Tuple[int, int]:
+    """Insert a batch unordered; returns (inserted, already present)"""
+    if not docs:
+        return 0, 0
+    try:
+        result = await db.recipes.insert_many(docs, ordered=False)
+        return len(result.inserted_ids), 0
+    except BulkWriteError as e:
+        write_errors = e.details.get('writeErrors', [])
+        if any(error['code'] != DUPLICATE_KEY_ERROR for error in write_errors):
+            raise
+        return e.details.get('nInserted', 0), len(write_errors)
+
+
+async def import_file(db, pool: ProcessPoolExecutor, path: Path, batch_size: int, workers: int, restart: bool):
+    """Stream one file through the worker pool into the database, checkpointing after each batch"""
+    checkpoint_path = Path(f"{path}.checkpoint.json")
+    if restart and checkpoint_path.exists():
+        checkpoint_path.unlink()
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint['line']:
+        print(f"↩️  Resuming {path.name} after line {checkpoint['line']} ({checkpoint['imported']} already imported)")
+
+    loop = asyncio.get_running_loop()
+    source = path.resolve().as_posix()
+    started = last_report = time.perf_counter()
+    imported_now = 0
+    pending = []  # (last line of the batch, future), oldest first
+
+    async def complete_oldest():
+        nonlocal imported_now, last_report
+        last_line, future = pending.pop(0)
+        docs, errors = await future
+        inserted, duplicates = await insert_batch(db, docs)
+        for line_number, message in errors[:3]:
+            print(f"⚠️  {path.name}:{line_number}: {message}")
+        checkpoint['line'] = last_line
+        checkpoint['imported'] += inserted
+        checkpoint['duplicates'] += duplicates
+        checkpoint['invalid'] += len(errors)
+        save_checkpoint(checkpoint_path, checkpoint)
+
+        imported_now += inserted
+        now = time.perf_counter()
+        if now - last_report >= REPORT_INTERVAL:
+            last_report = now
+            print(f"⏱️  {path.name}: line {last_line}, {checkpoint['imported']} imported "
+                  f"({imported_now / (now - started):,.0f} recipes/sec)")
+
+    batch = []
+    for line_number, raw in read_records(path, checkpoint['line']):
+        batch.append((line_number, raw))
+        if len(batch) >= batch_size:
+            pending.append((line_number, loop.run_in_executor(pool, prepare_batch, source, batch)))
+            batch = []
+            # Keep every worker busy while bounding how many batches are held in memory
+            if len(pending) >= workers * 2:
+                await complete_oldest()
+    if batch:
+        pending.append((batch[-1][0], loop.run_in_executor(pool, prepare_batch, source, batch)))
+    while pending:
+        await complete_oldest()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {path.name}: {checkpoint['imported']} imported, {checkpoint['duplicates']} already present, "
+          f"{checkpoint['invalid']} invalid ({imported_now / elapsed if elapsed else 0:,.0f} recipes/sec)")
+
+
+async def run(paths: List[Path], batch_size: int, workers: int, restart: bool):
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get('DB_NAME', 'recipe_generator_db')]
+    # Re-inserting a batch after a crash must not duplicate recipes
+    await db.recipes.create_index('id', unique=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path in paths:
+            await import_file(db, pool, path, batch_size, workers, restart)
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', type=Path)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--restart', action='store_true', help='ignore existing checkpoints')
+    args = parser.parse_args()
+    asyncio.run(run(args.paths, args.batch_size, args.workers, args.restart))
@@ -0,0 +1,149 @@
+"""Rolls query events up into ingredient frequencies and co-occurrence counts.
+
+Run from the backend directory, e.g. hourly from cron:
+
+    python -m scripts.rollup_query_events [--reset] [--batch-size 1000]
+
+Each run adds the events logged since the previous one to ingredient_stats
+({_id: ingredient, count, kinds: {find, generate, recognize}}) and ingredient_pairs
+({_id: "a|b", a, b, count}). Events from the last minute are left for the next run,
+so that batches still being flushed by other server processes are not skipped.
+Events are added --batch-size at a time, with a checkpoint after each batch, and
+rerunning after a failure never counts an event twice.
+"""
+import argparse
+import asyncio
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+
+STATE_ID = "query_events_rollup"
+SETTLE_SECONDS = 60
+# Pairs grow quadratically; longer ingredient lists only count their first items
+MAX_PAIR_INGREDIENTS = 12
+
+
+def once_per_batch(key: str, batch_end: ObjectId) -> Dict:
+    """Filter for the document `key` unless it already counts the batch ending at `batch_end`"""
+    return {"_id": key, "last_batch": {"$not": {"$gte": batch_end}}}
+
+
+async def write_updates(collection, updates: List[UpdateOne], batch_size: int):
+    for start in range(0, len(updates), batch_size):
+        try:
+            await collection.bulk_write(updates[start:start + batch_size], ordered=False)
+        except BulkWriteError as e:
+            # An upsert whose document already counts the batch collides on _id;
+            # anything else is a real failure
+            if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                raise
+
+
+async def rollup_batch(db, events: List[Dict], batch_size: int) -> Tuple[Set[str], int]:
+    """Add one batch of events to the statistics, then checkpoint after it.
+
+    Every updated document records the batch in last_batch and is skipped by a
+    rerun of the same batch, so a run that stops between the writes and the
+    checkpoint does not count anything twice.
+    """
+    batch_end = events[-1]['_id']
+    kinds: Dict[str, Counter] = {}
+    pairs: Counter = Counter()
+    for event in events:
+        names = event.get('ingredients') or []
+        for name in names:
+            kinds.setdefault(name, Counter())[event.get('kind', 'unknown')] += 1
+        pairs.update(combinations(names[:MAX_PAIR_INGREDIENTS], 2))
+
+    await write_updates(db.ingredient_stats, [
+        UpdateOne(
+            once_per_batch(name, batch_end),
+            {
+                "$inc": {"count": sum(counts.values()), **{f"kinds.{kind}": count for kind, count in counts.items()}},
+                "$set": {"last_batch": batch_end},
+            },
+            upsert=True
+        )
+        for name, counts in kinds.items()
+    ], batch_size)
+    # Event ingredients are sorted, so each pair has one key
+    await write_updates(db.ingredient_pairs, [
+        UpdateOne(
+            once_per_batch(f"{a}|{b}", batch_end),
+            {"$inc": {"count": count}, "$set": {"last_batch": batch_end}, "$setOnInsert": {"a": a, "b": b}},
+            upsert=True
+        )
+        for (a, b), count in pairs.items()
+    ], batch_size)
+    await db.analytics_state.update_one(
+        {"_id": STATE_ID}, {"$set": {"last_id": batch_end, "updated_at": datetime.now(timezone.utc).isoformat()}}, upsert=True
+    )
+    return set(kinds), len(pairs)
+
+
+async def rollup(reset: bool, batch_size: int):
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ.get('DB_NAME', 'recipe_generator_db')]
+
+    if reset:
+        await db.ingredient_stats.drop()
+        await db.ingredient_pairs.drop()
+        await db.analytics_state.delete_one({"_id": STATE_ID})
+        print("🧹 Cleared ingredient statistics")
+
+    state = await db.analytics_state.find_one({"_id": STATE_ID}) or {}
+    id_range = {"$lt": ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=SETTLE_SECONDS))}
+    if state.get('last_id'):
+        id_range["$gt"] = state['last_id']
+
+    events = 0
+    ingredients: Set[str] = set()
+    pairs = 0
+    batch: List[Dict] = []
+    cursor = db.query_events.find({"_id": id_range}, {"kind": 1, "ingredients": 1}).sort("_id", 1)
+    async for event in cursor:
+        batch.append(event)
+        if len(batch) < batch_size:
+            continue
+        names, pair_count = await rollup_batch(db, batch, batch_size)
+        events, ingredients, pairs = events + len(batch), ingredients | names, pairs + pair_count
+        batch = []
+    if batch:
+        names, pair_count = await rollup_batch(db, batch, batch_size)
+        events, ingredients, pairs = events + len(batch), ingredients | names, pairs + pair_count
+
+    if not events:
+        print("✅ No new query events")
+        client.close()
+        return
+
+    await db.ingredient_pairs.create_index([("count", -1)])
+    await db.ingredient_stats.create_index([("count", -1)])
+
+    print(f"📊 Rolled up {events} events: {len(ingredients)} ingredients, {pairs} pair updates")
+    top = await db.ingredient_stats.find({}, {"count": 1}).sort("count", -1).limit(10).to_list(10)
+    print("🥕 Top ingredients: " + ', '.join(f"{doc['_id']} ({doc['count']})" for doc in top))
+    top_pairs = await db.ingredient_pairs.find({}, {"a": 1, "b": 1, "count": 1}).sort("count", -1).limit(10).to_list(10)
+    print("🍽️  Top pairs: " + ', '.join(f"{doc['a']} + {doc['b']} ({doc['count']})" for doc in top_pairs))
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reset', action='store_true', help='recompute from the events still in the capped collection')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(rollup(args.reset, args.batch_size))
@@ -1,8 +1,20 @@
-from fastapi import FastAPI, APIRouter
+import cProfile
+import sys
+import time
+
+# `python server.py --profile-startup` profiles the imports below and the startup
+# hooks, prints the report and exits without serving
+_startup_began = time.perf_counter()
+_startup_profiler = cProfile.Profile() if __name__ == "__main__" and '--profile-startup' in sys.argv else None
+if _startup_profiler is not None:
+    _startup_profiler.enable()
+
+from fastapi import FastAPI, APIRouter, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import json
 import logging
 from pathlib import Path
 
@@ -10,15 +22,42 @@ from pathlib import Path
 from routes.recipe_routes import init_recipe_routes
 from routes.ingredient_routes import init_ingredient_routes
 from routes.user_routes import init_user_routes
+from services.substitution_service import get_substitution_engine
+from services.recipe_snapshot import get_recipe_snapshot
+from services.recipe_writer import RecipeWriter
+from services.combo_tracker import ComboTracker
+from services.pregeneration_worker import PREGENERATION_ENABLED, PregenerationWorker
+from services.query_log import QUERY_LOG_ENABLED, QueryLog
+from controllers.recipe_controller import RecipeController
+from services.metrics import (
+    CONTENT_TYPE, METRICS_ENABLED, RECIPE_WRITE_QUEUE_DEPTH, MetricsMiddleware, MongoCommandMetrics, render_metrics
+)
+from services.request_profiler import PROFILE_REQUESTS, RequestProfilerMiddleware
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+SEED_RECIPES_PATH = ROOT_DIR / 'data' / 'seed_recipes.json'
+
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
+# Command timings feed /metrics; the listener is left out entirely when metrics are off
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics()] if METRICS_ENABLED else [])
 db = client[os.environ.get('DB_NAME', 'recipe_generator_db')]
 
+# Generated recipes are written in batches behind the request path
+recipe_writer = RecipeWriter(db)
+
+# Ingredient sets asked for by /find and /generate; the most popular ones get
+# recipes generated ahead of time during off-peak hours when enabled
+combo_tracker = ComboTracker(db)
+pregeneration_worker = PregenerationWorker(
+    db, RecipeController(db, recipe_writer=recipe_writer), combo_tracker
+) if PREGENERATION_ENABLED else None
+
+# What /find, /generate and /recognize are asked for, for scripts/rollup_query_events.py
+query_log = QueryLog(db) if QUERY_LOG_ENABLED else None
+
 # Create the main app
 app = FastAPI(title="Smart Recipe Generator API")
 
@@ -31,13 +70,21 @@ async def root():
     return {"message": "Smart Recipe Generator API is running", "status": "healthy"}
 
 # Include all route modules
-api_router.include_router(init_recipe_routes(db))
-api_router.include_router(init_ingredient_routes())
+api_router.include_router(init_recipe_routes(db, recipe_writer, combo_tracker, query_log))
+api_router.include_router(init_ingredient_routes(db, query_log))
 api_router.include_router(init_user_routes(db))
 
 # Include the main router in the app
 app.include_router(api_router)
 
+# Prometheus scrape endpoint, outside /api like the usual scrape configs expect
+if METRICS_ENABLED:
+    RECIPE_WRITE_QUEUE_DEPTH.set_function(lambda: recipe_writer.queued)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -46,6 +93,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in: profiles sampled requests, and requests sent with the X-Profile-Token header
+if PROFILE_REQUESTS:
+    app.add_middleware(RequestProfilerMiddleware)
+
+# Outermost, so that latencies include the CORS handling
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -56,420 +111,95 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_db_client():
     logger.info("Starting up Smart Recipe Generator API...")
-    # Seed initial recipes if database is empty
-    count = await db.recipes.count_documents({})
+    # Seed initial recipes if database is empty; the estimate comes from collection
+    # metadata instead of a scan, and is exact enough to tell empty from not
+    count = await db.recipes.estimated_document_count()
     if count == 0:
         logger.info("Seeding initial recipes...")
         await seed_recipes()
+    # Catalog exports page through recipes by (created_at, id)
+    await db.recipes.create_index([("created_at", 1), ("id", 1)])
+    # Generation cache lookups, and the popularity ranking of ingredient sets
+    await db.recipes.create_index("generation_keys")
+    await db.ingredient_combos.create_index("key", unique=True)
+    await db.ingredient_combos.create_index([("log_score", -1)])
+    # Unique keys behind the atomic upserts in UserController, and behind retried
+    # recipe batch writes. Each is created on its own, so duplicates in one collection
+    # never leave the others unprotected.
+    for collection, keys in [
+        (db.recipes, [("id", 1)]),
+        (db.user_preferences, [("user_session", 1)]),
+        (db.saved_recipes, [("user_session", 1), ("recipe_id", 1)]),
+    ]:
+        try:
+            await collection.create_index(keys, unique=True)
+        except Exception as e:
+            key = ', '.join(field for field, _ in keys)
+            logger.error(f"Error creating unique index on {collection.name} ({key}), "
+                         f"remove duplicate documents first: {str(e)}")
+    recipe_writer.start()
+    combo_tracker.start()
+    if query_log is not None:
+        await query_log.ensure_collection()
+        query_log.start()
+    if pregeneration_worker is not None:
+        pregeneration_worker.start()
+    # Compile the substitution automaton now rather than on the first /find request
+    get_substitution_engine()
+    # Map the recipe snapshot, if one has been built, so that /find can use it right away
+    get_recipe_snapshot()
+    logger.info(f"Startup finished in {(time.perf_counter() - _startup_began) * 1000:.0f} ms")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if pregeneration_worker is not None:
+        await pregeneration_worker.close()
+    await combo_tracker.close()
+    if query_log is not None:
+        await query_log.close()
+    # Write the recipes still queued before the connection goes away
+    await recipe_writer.close()
     client.close()
     logger.info("Shutting down Smart Recipe Generator API...")
 
 
 async def seed_recipes():
-    """Seed the database with initial recipes"""
-    from models.recipe import Recipe, NutritionInfo
-    from datetime import datetime, timezone
+    """Seed the database with the initial recipes in data/seed_recipes.json"""
+    from models.recipe import Recipe
+    from services.recipe_features import with_match_features
     
-    initial_recipes = [
-        {
-            "name": "Classic Margherita Pizza",
-            "ingredients": ["pizza dough", "tomato sauce", "mozzarella cheese", "fresh basil", "olive oil", "salt"],
-            "instructions": [
-                "Preheat oven to 475°F (245°C)",
-                "Roll out pizza dough into a circle",
-                "Spread tomato sauce evenly",
-                "Add mozzarella cheese",
-                "Bake for 12-15 minutes until crust is golden",
-                "Top with fresh basil and drizzle with olive oil"
-            ],
-            "cuisine": "Italian",
-            "difficulty": "easy",
-            "cooking_time": 25,
-            "serving_size": 4,
-            "dietary_tags": ["vegetarian"],
-            "nutrition": {"calories": 285, "protein": 12, "carbs": 36, "fat": 10, "fiber": 2}
-        },
-        {
-            "name": "Chicken Stir Fry",
-            "ingredients": ["chicken breast", "soy sauce", "garlic", "ginger", "bell peppers", "broccoli", "carrots", "sesame oil", "rice"],
-            "instructions": [
-                "Cut chicken into bite-sized pieces",
-                "Heat sesame oil in wok",
-                "Stir fry chicken until cooked",
-                "Add vegetables and stir fry for 5 minutes",
-                "Add soy sauce, garlic, and ginger",
-                "Serve over cooked rice"
-            ],
-            "cuisine": "Asian",
-            "difficulty": "easy",
-            "cooking_time": 20,
-            "serving_size": 4,
-            "dietary_tags": ["high-protein"],
-            "nutrition": {"calories": 320, "protein": 28, "carbs": 38, "fat": 6, "fiber": 4}
-        },
-        {
-            "name": "Vegetable Curry",
-            "ingredients": ["coconut milk", "curry paste", "potatoes", "carrots", "peas", "onions", "garlic", "ginger", "cilantro"],
-            "instructions": [
-                "Sauté onions, garlic, and ginger",
-                "Add curry paste and cook for 2 minutes",
-                "Add chopped vegetables",
-                "Pour in coconut milk",
-                "Simmer for 20 minutes until vegetables are tender",
-                "Garnish with cilantro"
-            ],
-            "cuisine": "Indian",
-            "difficulty": "medium",
-            "cooking_time": 35,
-            "serving_size": 6,
-            "dietary_tags": ["vegetarian", "vegan", "gluten-free"],
-            "nutrition": {"calories": 245, "protein": 6, "carbs": 32, "fat": 12, "fiber": 6}
-        },
-        {
-            "name": "Grilled Salmon with Asparagus",
-            "ingredients": ["salmon fillets", "asparagus", "lemon", "olive oil", "garlic", "salt", "pepper", "dill"],
-            "instructions": [
-                "Preheat grill to medium-high",
-                "Season salmon with salt, pepper, and dill",
-                "Toss asparagus with olive oil and garlic",
-                "Grill salmon for 4-5 minutes per side",
-                "Grill asparagus for 6-8 minutes",
-                "Serve with lemon wedges"
-            ],
-            "cuisine": "American",
-            "difficulty": "easy",
-            "cooking_time": 20,
-            "serving_size": 2,
-            "dietary_tags": ["high-protein", "low-carb", "gluten-free"],
-            "nutrition": {"calories": 340, "protein": 35, "carbs": 8, "fat": 18, "fiber": 4}
-        },
-        {
-            "name": "Spaghetti Carbonara",
-            "ingredients": ["spaghetti", "eggs", "parmesan cheese", "bacon", "black pepper", "salt"],
-            "instructions": [
-                "Cook spaghetti according to package",
-                "Fry bacon until crispy",
-                "Beat eggs with parmesan cheese",
-                "Drain pasta, reserving pasta water",
-                "Mix hot pasta with egg mixture",
-                "Add bacon and pasta water to create creamy sauce",
-                "Season with black pepper"
-            ],
-            "cuisine": "Italian",
-            "difficulty": "medium",
-            "cooking_time": 25,
-            "serving_size": 4,
-            "dietary_tags": [],
-            "nutrition": {"calories": 485, "protein": 22, "carbs": 52, "fat": 20, "fiber": 2}
-        },
-        {
-            "name": "Greek Salad",
-            "ingredients": ["cucumber", "tomatoes", "red onion", "feta cheese", "olives", "olive oil", "lemon juice", "oregano"],
-            "instructions": [
-                "Chop cucumber, tomatoes, and onion",
-                "Combine in large bowl",
-                "Add crumbled feta cheese and olives",
-                "Drizzle with olive oil and lemon juice",
-                "Sprinkle with oregano",
-                "Toss gently and serve"
-            ],
-            "cuisine": "Greek",
-            "difficulty": "easy",
-            "cooking_time": 10,
-            "serving_size": 4,
-            "dietary_tags": ["vegetarian", "gluten-free", "low-carb"],
-            "nutrition": {"calories": 180, "protein": 6, "carbs": 12, "fat": 14, "fiber": 3}
-        },
-        {
-            "name": "Beef Tacos",
-            "ingredients": ["ground beef", "taco shells", "lettuce", "tomatoes", "cheese", "sour cream", "taco seasoning", "onions"],
-            "instructions": [
-                "Brown ground beef in skillet",
-                "Add taco seasoning and water",
-                "Simmer for 10 minutes",
-                "Warm taco shells",
-                "Fill shells with beef",
-                "Top with lettuce, tomatoes, cheese, and sour cream"
-            ],
-            "cuisine": "Mexican",
-            "difficulty": "easy",
-            "cooking_time": 20,
-            "serving_size": 6,
-            "dietary_tags": [],
-            "nutrition": {"calories": 325, "protein": 18, "carbs": 28, "fat": 16, "fiber": 3}
-        },
-        {
-            "name": "Mushroom Risotto",
-            "ingredients": ["arborio rice", "mushrooms", "white wine", "vegetable broth", "parmesan cheese", "butter", "onions", "garlic"],
-            "instructions": [
-                "Sauté onions and garlic in butter",
-                "Add mushrooms and cook until soft",
-                "Add rice and toast for 2 minutes",
-                "Add wine and stir until absorbed",
-                "Add broth one ladle at a time, stirring constantly",
-                "Cook for 20 minutes until creamy",
-                "Stir in parmesan cheese"
-            ],
-            "cuisine": "Italian",
-            "difficulty": "hard",
-            "cooking_time": 45,
-            "serving_size": 4,
-            "dietary_tags": ["vegetarian"],
-            "nutrition": {"calories": 380, "protein": 12, "carbs": 54, "fat": 12, "fiber": 2}
-        },
-        {
-            "name": "Pad Thai",
-            "ingredients": ["rice noodles", "shrimp", "eggs", "bean sprouts", "peanuts", "lime", "fish sauce", "tamarind paste", "garlic"],
-            "instructions": [
-                "Soak rice noodles in warm water",
-                "Heat oil and scramble eggs",
-                "Add shrimp and cook until pink",
-                "Add drained noodles",
-                "Add fish sauce and tamarind paste",
-                "Toss with bean sprouts",
-                "Serve with peanuts and lime wedges"
-            ],
-            "cuisine": "Thai",
-            "difficulty": "medium",
-            "cooking_time": 30,
-            "serving_size": 4,
-            "dietary_tags": ["high-protein"],
-            "nutrition": {"calories": 420, "protein": 24, "carbs": 58, "fat": 12, "fiber": 3}
-        },
-        {
-            "name": "Caprese Salad",
-            "ingredients": ["tomatoes", "mozzarella cheese", "fresh basil", "olive oil", "balsamic vinegar", "salt", "pepper"],
-            "instructions": [
-                "Slice tomatoes and mozzarella",
-                "Arrange alternating slices on plate",
-                "Tuck basil leaves between slices",
-                "Drizzle with olive oil and balsamic vinegar",
-                "Season with salt and pepper"
-            ],
-            "cuisine": "Italian",
-            "difficulty": "easy",
-            "cooking_time": 5,
-            "serving_size": 4,
-            "dietary_tags": ["vegetarian", "gluten-free", "low-carb"],
-            "nutrition": {"calories": 220, "protein": 12, "carbs": 8, "fat": 16, "fiber": 2}
-        },
-        {
-            "name": "Chicken Caesar Salad",
-            "ingredients": ["romaine lettuce", "grilled chicken", "parmesan cheese", "croutons", "caesar dressing"],
-            "instructions": [
-                "Grill and slice chicken breast",
-                "Chop romaine lettuce",
-                "Toss lettuce with caesar dressing",
-                "Top with sliced chicken",
-                "Add parmesan cheese and croutons"
-            ],
-            "cuisine": "American",
-            "difficulty": "easy",
-            "cooking_time": 15,
-            "serving_size": 2,
-            "dietary_tags": ["high-protein"],
-            "nutrition": {"calories": 450, "protein": 38, "carbs": 22, "fat": 24, "fiber": 3}
-        },
-        {
-            "name": "Vegetable Stir Fry",
-            "ingredients": ["broccoli", "bell peppers", "carrots", "snap peas", "soy sauce", "garlic", "ginger", "sesame oil"],
-            "instructions": [
-                "Heat sesame oil in wok",
-                "Add garlic and ginger",
-                "Add hardest vegetables first (carrots, broccoli)",
-                "Stir fry for 3 minutes",
-                "Add softer vegetables (peppers, peas)",
-                "Add soy sauce and toss",
-                "Cook until vegetables are tender-crisp"
-            ],
-            "cuisine": "Asian",
-            "difficulty": "easy",
-            "cooking_time": 15,
-            "serving_size": 4,
-            "dietary_tags": ["vegan", "vegetarian", "gluten-free"],
-            "nutrition": {"calories": 120, "protein": 4, "carbs": 18, "fat": 4, "fiber": 5}
-        },
-        {
-            "name": "Beef Stroganoff",
-            "ingredients": ["beef sirloin", "mushrooms", "onions", "sour cream", "beef broth", "egg noodles", "flour", "butter"],
-            "instructions": [
-                "Cut beef into strips",
-                "Brown beef in butter",
-                "Sauté mushrooms and onions",
-                "Sprinkle flour and stir",
-                "Add beef broth and simmer",
-                "Stir in sour cream",
-                "Serve over cooked egg noodles"
-            ],
-            "cuisine": "Russian",
-            "difficulty": "medium",
-            "cooking_time": 40,
-            "serving_size": 6,
-            "dietary_tags": [],
-            "nutrition": {"calories": 520, "protein": 32, "carbs": 42, "fat": 24, "fiber": 2}
-        },
-        {
-            "name": "Quinoa Buddha Bowl",
-            "ingredients": ["quinoa", "chickpeas", "avocado", "kale", "sweet potato", "tahini", "lemon", "olive oil"],
-            "instructions": [
-                "Cook quinoa according to package",
-                "Roast chickpeas and sweet potato cubes",
-                "Massage kale with olive oil",
-                "Assemble bowl with quinoa as base",
-                "Add roasted vegetables and kale",
-                "Top with sliced avocado",
-                "Drizzle with tahini-lemon dressing"
-            ],
-            "cuisine": "American",
-            "difficulty": "easy",
-            "cooking_time": 35,
-            "serving_size": 2,
-            "dietary_tags": ["vegan", "vegetarian", "gluten-free"],
-            "nutrition": {"calories": 485, "protein": 16, "carbs": 68, "fat": 18, "fiber": 14}
-        },
-        {
-            "name": "French Onion Soup",
-            "ingredients": ["onions", "beef broth", "white wine", "french bread", "gruyere cheese", "butter", "thyme"],
-            "instructions": [
-                "Slice onions thinly",
-                "Caramelize onions in butter for 40 minutes",
-                "Add wine and reduce",
-                "Add beef broth and thyme",
-                "Simmer for 30 minutes",
-                "Toast bread slices",
-                "Top soup with bread and cheese",
-                "Broil until cheese melts"
-            ],
-            "cuisine": "French",
-            "difficulty": "hard",
-            "cooking_time": 90,
-            "serving_size": 4,
-            "dietary_tags": [],
-            "nutrition": {"calories": 380, "protein": 18, "carbs": 42, "fat": 16, "fiber": 4}
-        },
-        {
-            "name": "Shakshuka",
-            "ingredients": ["eggs", "tomatoes", "bell peppers", "onions", "garlic", "cumin", "paprika", "feta cheese", "parsley"],
-            "instructions": [
-                "Sauté onions, peppers, and garlic",
-                "Add tomatoes and spices",
-                "Simmer until thickened",
-                "Make wells in sauce",
-                "Crack eggs into wells",
-                "Cover and cook until eggs set",
-                "Top with feta and parsley"
-            ],
-            "cuisine": "Middle Eastern",
-            "difficulty": "medium",
-            "cooking_time": 30,
-            "serving_size": 4,
-            "dietary_tags": ["vegetarian", "gluten-free"],
-            "nutrition": {"calories": 240, "protein": 14, "carbs": 18, "fat": 14, "fiber": 4}
-        },
-        {
-            "name": "Teriyaki Chicken Bowl",
-            "ingredients": ["chicken thighs", "teriyaki sauce", "rice", "edamame", "carrots", "sesame seeds", "green onions"],
-            "instructions": [
-                "Marinate chicken in teriyaki sauce",
-                "Grill or pan-fry chicken",
-                "Cook rice",
-                "Steam edamame",
-                "Julienne carrots",
-                "Assemble bowl with rice, chicken, and vegetables",
-                "Garnish with sesame seeds and green onions"
-            ],
-            "cuisine": "Japanese",
-            "difficulty": "easy",
-            "cooking_time": 25,
-            "serving_size": 4,
-            "dietary_tags": ["high-protein"],
-            "nutrition": {"calories": 420, "protein": 32, "carbs": 52, "fat": 8, "fiber": 4}
-        },
-        {
-            "name": "Lentil Soup",
-            "ingredients": ["red lentils", "carrots", "celery", "onions", "garlic", "vegetable broth", "cumin", "turmeric", "lemon"],
-            "instructions": [
-                "Sauté onions, carrots, and celery",
-                "Add garlic and spices",
-                "Add lentils and broth",
-                "Simmer for 25 minutes",
-                "Blend half the soup for creaminess",
-                "Season with lemon juice"
-            ],
-            "cuisine": "Mediterranean",
-            "difficulty": "easy",
-            "cooking_time": 35,
-            "serving_size": 6,
-            "dietary_tags": ["vegan", "vegetarian", "gluten-free"],
-            "nutrition": {"calories": 210, "protein": 12, "carbs": 38, "fat": 2, "fiber": 8}
-        },
-        {
-            "name": "Chicken Fajitas",
-            "ingredients": ["chicken breast", "bell peppers", "onions", "fajita seasoning", "tortillas", "lime", "sour cream", "cilantro"],
-            "instructions": [
-                "Slice chicken and vegetables",
-                "Season chicken with fajita seasoning",
-                "Sauté chicken until cooked",
-                "Add peppers and onions",
-                "Cook until vegetables are tender",
-                "Warm tortillas",
-                "Serve with lime, sour cream, and cilantro"
-            ],
-            "cuisine": "Mexican",
-            "difficulty": "easy",
-            "cooking_time": 20,
-            "serving_size": 4,
-            "dietary_tags": ["high-protein"],
-            "nutrition": {"calories": 380, "protein": 32, "carbs": 42, "fat": 10, "fiber": 5}
-        },
-        {
-            "name": "Coconut Curry Shrimp",
-            "ingredients": ["shrimp", "coconut milk", "red curry paste", "bell peppers", "onions", "garlic", "ginger", "basil", "lime"],
-            "instructions": [
-                "Sauté onions, garlic, and ginger",
-                "Add curry paste and cook",
-                "Add coconut milk and bring to simmer",
-                "Add shrimp and peppers",
-                "Cook until shrimp are pink",
-                "Garnish with basil and lime"
-            ],
-            "cuisine": "Thai",
-            "difficulty": "medium",
-            "cooking_time": 25,
-            "serving_size": 4,
-            "dietary_tags": ["gluten-free", "high-protein"],
-            "nutrition": {"calories": 290, "protein": 28, "carbs": 14, "fat": 16, "fiber": 2}
-        },
-        {
-            "name": "Eggplant Parmesan",
-            "ingredients": ["eggplant", "marinara sauce", "mozzarella cheese", "parmesan cheese", "bread crumbs", "eggs", "basil"],
-            "instructions": [
-                "Slice eggplant and salt to remove moisture",
-                "Dip in egg then bread crumbs",
-                "Fry until golden",
-                "Layer eggplant with marinara and cheese",
-                "Bake at 375°F for 25 minutes",
-                "Garnish with fresh basil"
-            ],
-            "cuisine": "Italian",
-            "difficulty": "medium",
-            "cooking_time": 50,
-            "serving_size": 6,
-            "dietary_tags": ["vegetarian"],
-            "nutrition": {"calories": 320, "protein": 16, "carbs": 28, "fat": 18, "fiber": 6}
-        }
-    ]
+    initial_recipes = json.loads(SEED_RECIPES_PATH.read_text(encoding='utf-8'))
     
     recipes_to_insert = []
     for recipe_data in initial_recipes:
         recipe = Recipe(**recipe_data)
         doc = recipe.model_dump()
         doc['created_at'] = doc['created_at'].isoformat()
-        recipes_to_insert.append(doc)
+        recipes_to_insert.append(with_match_features(doc))
     
     if recipes_to_insert:
         await db.recipes.insert_many(recipes_to_insert)
-        logger.info(f"Successfully seeded {len(recipes_to_insert)} recipes")
\ No newline at end of file
+        logger.info(f"Successfully seeded {len(recipes_to_insert)} recipes")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Smart Recipe Generator API")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='profile imports and startup hooks, print the report and exit')
+    args = parser.parse_args()
+    
+    if args.profile_startup:
+        import asyncio
+        import pstats
+        async def run_startup():
+            await startup_db_client()
+            _startup_profiler.disable()
+            await shutdown_db_client()
+        asyncio.run(run_startup())
+        pstats.Stats(_startup_profiler).sort_stats('cumulative').print_stats(40)
+    else:
+        import uvicorn
+        uvicorn.run(app, host=args.host, port=args.port)
\ No newline at end of file
@@ -0,0 +1,135 @@
+from typing import List, Dict, Optional
+from collections import Counter
+from datetime import datetime, timezone
+import asyncio
+import math
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from services.recipe_features import normalize_ingredient
+
+logger = logging.getLogger(__name__)
+
+# Requests with fewer or more distinct ingredients are not tracked; they are too
+# generic or too specific to be worth generating ahead of time
+MIN_COMBO_SIZE = 2
+MAX_COMBO_SIZE = 8
+
+# Counts are kept in memory and added to the ingredient_combos collection this often
+COMBO_FLUSH_INTERVAL = 30.0  # seconds
+
+# Popularity halves every this many days. Rather than decaying every stored score,
+# new requests are weighted 2 ** (days since COMBO_SCORE_EPOCH / half-life), which
+# ranks combos the same. Scores are stored as log2 of that sum, so they grow
+# linearly with time instead of overflowing.
+COMBO_HALF_LIFE_DAYS = 7.0
+COMBO_SCORE_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def canonical_ingredients(ingredients: List[str]) -> List[str]:
+    """Sorted, de-duplicated normalized ingredient names"""
+    return sorted({name for name in (normalize_ingredient(ing) for ing in ingredients) if name})
+
+
+def log_weight(when: datetime) -> float:
+    """log2 of the score a single request made at `when` adds to its combo"""
+    days = (when - COMBO_SCORE_EPOCH).total_seconds() / 86400
+    return days / COMBO_HALF_LIFE_DAYS
+
+
+def _log2_add(field: str, value: float) -> Dict:
+    """Aggregation expression for log2(2 ** $field + 2 ** value); a missing field is a zero score"""
+    return {"$let": {
+        "vars": {"old": {"$ifNull": [f"${field}", None]}},
+        "in": {"$cond": [
+            {"$eq": ["$$old", None]},
+            value,
+            # Factored around the larger term, so that 2 ** x never overflows
+            {"$add": [
+                {"$max": ["$$old", value]},
+                {"$log": [{"$add": [1, {"$pow": [2, {"$subtract": [
+                    {"$min": ["$$old", value]}, {"$max": ["$$old", value]}
+                ]}]}]}, 2]},
+            ]},
+        ]},
+    }}
+
+
+def generation_key(ingredients: List[str]) -> str:
+    """Key shared by every request for the same ingredient set, whatever the order or spelling"""
+    return '|'.join(canonical_ingredients(ingredients))
+
+
+class ComboTracker:
+    """Counts the ingredient sets requested from /find and /generate.
+
+    Counts are aggregated in memory and flushed with $inc upserts, so recording a
+    request costs no database round trip. Besides the lifetime count, each combo has
+    an exponentially decayed score, so that recent demand outranks old totals.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, flush_interval: float = COMBO_FLUSH_INTERVAL):
+        self.db = db
+        self.flush_interval = flush_interval
+        self._counts: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, ingredients: List[str], source: str):
+        names = canonical_ingredients(ingredients)
+        if MIN_COMBO_SIZE <= len(names) <= MAX_COMBO_SIZE:
+            self._counts[('|'.join(names), source)] += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the flush task and write the counts still held in memory"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._counts:
+            return
+        counts, self._counts = self._counts, Counter()
+        now = datetime.now(timezone.utc)
+        weight = log_weight(now)
+        # Pipeline updates, since a log-space sum cannot be expressed with $inc
+        updates = [
+            UpdateOne(
+                {"key": key},
+                [{"$set": {
+                    "count": {"$add": [{"$ifNull": ["$count", 0]}, count]},
+                    f"sources.{source}": {"$add": [{"$ifNull": [f"$sources.{source}", 0]}, count]},
+                    "log_score": _log2_add("log_score", weight + math.log2(count)),
+                    "last_seen": now.isoformat(),
+                    "ingredients": {"$ifNull": ["$ingredients", key.split('|')]},
+                }}],
+                upsert=True,
+            )
+            for (key, source), count in counts.items()
+        ]
+        try:
+            await self.db.ingredient_combos.bulk_write(updates, ordered=False)
+        except Exception as e:
+            logger.error(f"Error recording ingredient combos: {str(e)}")
+
+    async def top_combos(self, limit: int, since: datetime) -> List[Dict]:
+        """The ingredient sets seen since `since` with the highest decayed score"""
+        return await self.db.ingredient_combos.find(
+            {"last_seen": {"$gte": since.isoformat()}},
+            {"_id": 0, "key": 1, "ingredients": 1, "count": 1}
+        ).sort("log_score", -1).limit(limit).to_list(limit)
@@ -0,0 +1,101 @@
+from typing import List, Dict, Optional, Tuple
+import re
+import zlib
+import logging
+
+import numpy as np
+
+from services.recipe_features import get_match_features, normalize_ingredient
+
+logger = logging.getLogger(__name__)
+
+# 16 bands of 8 rows: pairs with a Jaccard similarity around 0.7 or more become
+# candidates with high probability, and candidates are then checked against
+# DUPLICATE_THRESHOLD on the full signatures.
+NUM_PERMUTATIONS = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+DUPLICATE_THRESHOLD = 0.8
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240601)  # fixed, so that signatures are stable across processes
+_A = _rng.integers(1, _PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+# Fields of a recipe document a signature is computed from
+DEDUP_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "ingredients": 1,
+    "match_features.version": 1, "match_features.ingredient_tokens": 1,
+}
+
+_WORD_RE = re.compile(r'[a-z]+')
+
+
+def recipe_shingles(recipe: Dict) -> List[str]:
+    """Normalized ingredient items and name words that make up a recipe's identity"""
+    shingles = {f"ing:{token}" for token in get_match_features(recipe)['ingredient_tokens']}
+    shingles.update(f"name:{word}" for word in _WORD_RE.findall(normalize_ingredient(recipe.get('name') or '')))
+    return sorted(shingles)
+
+
+def minhash_signature(shingles: List[str]) -> np.ndarray:
+    """MinHash signature of a shingle set under NUM_PERMUTATIONS universal hash functions"""
+    if not shingles:
+        return np.full(NUM_PERMUTATIONS, _PRIME, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+    hashes %= _PRIME
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def recipe_signature(recipe: Dict) -> np.ndarray:
+    return minhash_signature(recipe_shingles(recipe))
+
+
+class DedupIndex:
+    """LSH index over MinHash signatures for near-duplicate recipe lookups"""
+
+    def __init__(self):
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, recipe_id: str) -> bool:
+        return recipe_id in self._signatures
+
+    @staticmethod
+    def _band_keys(signature: np.ndarray) -> List[bytes]:
+        return [signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes() for band in range(BANDS)]
+
+    def add(self, recipe_id: str, signature: np.ndarray):
+        if recipe_id in self._signatures:
+            return
+        self._signatures[recipe_id] = signature
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(key, []).append(recipe_id)
+
+    def remove(self, recipe_id: str):
+        signature = self._signatures.pop(recipe_id, None)
+        if signature is None:
+            return
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket and recipe_id in bucket:
+                bucket.remove(recipe_id)
+                if not bucket:
+                    del buckets[key]
+
+    def find_duplicate(self, signature: np.ndarray,
+                       threshold: float = DUPLICATE_THRESHOLD) -> Optional[Tuple[str, float]]:
+        """The most similar indexed recipe with an estimated Jaccard similarity >= threshold"""
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+
+        best = None
+        for recipe_id in candidates:
+            similarity = float(np.mean(self._signatures[recipe_id] == signature))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (recipe_id, similarity)
+        return best
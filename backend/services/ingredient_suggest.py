@@ -0,0 +1,153 @@
+from typing import List, Dict, Iterable, Optional, Tuple
+from bisect import bisect_left, insort
+import asyncio
+import heapq
+import re
+import time
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services.recipe_features import normalize_ingredient
+
+logger = logging.getLogger(__name__)
+
+# Full rebuild from the database this often, to pick up recipes written by other
+# processes and imports; recipes generated here are added as they are created
+SUGGEST_REFRESH_INTERVAL = 600.0  # seconds
+
+# Short prefixes match a large part of the vocabulary, so their best names are
+# precomputed and kept up to date as names are added
+TOP_PREFIX_LENGTH = 2
+MAX_SUGGESTIONS = 50
+
+MAX_NAME_LENGTH = 40
+_NAME_RE = re.compile(r"^[a-z][a-z '&-]*$")
+
+
+class IngredientSuggester:
+    """Prefix search over the catalog's ingredient names, ranked by frequency.
+
+    Names are kept in one sorted array of (key, name) pairs, where the keys are the
+    name itself and the name from each later word on, so "spin" finds both
+    "spinach" and "fresh spinach leaves". A lookup is a binary search to the first
+    key with the prefix and a scan over the keys sharing it; prefixes of up to
+    TOP_PREFIX_LENGTH characters are answered from precomputed lists instead.
+    """
+
+    def __init__(self, counts: Optional[Dict[str, int]] = None):
+        self._counts: Dict[str, int] = {}
+        self._keys: List[Tuple[str, str]] = []
+        self._top: Dict[str, List[str]] = {}
+        self.built_at = time.monotonic()
+        if counts:
+            self._counts = {name: count for name, count in counts.items() if self._valid(name)}
+            self._keys = sorted(key for name in self._counts for key in self._name_keys(name))
+            prefixes = {key[:length] for key, _ in self._keys for length in range(1, TOP_PREFIX_LENGTH + 1)}
+            self._top = {prefix: self._scan(prefix, MAX_SUGGESTIONS) for prefix in prefixes}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    @staticmethod
+    def _valid(name: str) -> bool:
+        return len(name) <= MAX_NAME_LENGTH and bool(_NAME_RE.match(name))
+
+    @staticmethod
+    def _name_keys(name: str) -> List[Tuple[str, str]]:
+        keys = [(name, name)]
+        for match in re.finditer(r' (?=[a-z])', name):
+            keys.append((name[match.end():], name))
+        return keys
+
+    def _rank(self, name: str, prefix: str) -> Tuple[int, bool, int]:
+        # Most used first; names that start with the prefix win ties
+        return self._counts[name], name.startswith(prefix), -len(name)
+
+    def _scan(self, prefix: str, limit: int) -> List[str]:
+        names = set()
+        for index in range(bisect_left(self._keys, (prefix, '')), len(self._keys)):
+            key, name = self._keys[index]
+            if not key.startswith(prefix):
+                break
+            names.add(name)
+        return heapq.nlargest(limit, names, key=lambda name: self._rank(name, prefix))
+
+    def add(self, names: Iterable[str], weight: int = 1):
+        """Count recipe ingredient names, inserting the ones not seen before"""
+        for name in names:
+            if name in self._counts:
+                self._counts[name] += weight
+            elif self._valid(name):
+                self._counts[name] = weight
+                for key in self._name_keys(name):
+                    insort(self._keys, key)
+            else:
+                continue
+            # Counts only grow, so the name can only move up in the lists it is in
+            for key, _ in self._name_keys(name):
+                for length in range(1, min(len(key), TOP_PREFIX_LENGTH) + 1):
+                    prefix = key[:length]
+                    top = self._top.setdefault(prefix, [])
+                    if name in top:
+                        top.remove(name)
+                    top.append(name)
+                    top.sort(key=lambda other: self._rank(other, prefix), reverse=True)
+                    del top[MAX_SUGGESTIONS:]
+
+    def suggest(self, query: str, limit: int = 10) -> List[str]:
+        prefix = normalize_ingredient(query)
+        if not prefix:
+            return []
+        if len(prefix) <= TOP_PREFIX_LENGTH:
+            return self._top.get(prefix, [])[:limit]
+        return self._scan(prefix, limit)
+
+
+async def build_ingredient_suggester(db: AsyncIOMotorDatabase) -> IngredientSuggester:
+    """Count every ingredient name in the catalog; popular searches (ingredient_stats) add weight"""
+    counts: Dict[str, int] = {}
+    pipeline = [
+        {"$project": {"_id": 0, "token": "$match_features.ingredient_tokens"}},
+        {"$unwind": "$token"},
+        {"$group": {"_id": "$token", "count": {"$sum": 1}}},
+    ]
+    async for row in db.recipes.aggregate(pipeline):
+        counts[row['_id']] = row['count']
+    async for row in db.ingredient_stats.find({"_id": {"$in": list(counts)}}, {"count": 1}):
+        counts[row['_id']] += row['count']
+    return IngredientSuggester(counts)
+
+
+_suggester: Optional[IngredientSuggester] = None
+_build_lock = asyncio.Lock()
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def loaded_ingredient_suggester() -> Optional[IngredientSuggester]:
+    """The suggester if it has been built, for incremental updates"""
+    return _suggester
+
+
+async def get_ingredient_suggester(db: AsyncIOMotorDatabase) -> IngredientSuggester:
+    """The process-wide suggester: built on first use, rebuilt in the background when stale"""
+    global _suggester, _refresh_task
+    if _suggester is None:
+        async with _build_lock:
+            if _suggester is None:
+                _suggester = await build_ingredient_suggester(db)
+                logger.info(f"Built ingredient suggester with {len(_suggester)} names")
+    elif time.monotonic() - _suggester.built_at > SUGGEST_REFRESH_INTERVAL and _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh(db))
+    return _suggester
+
+
+async def _refresh(db: AsyncIOMotorDatabase):
+    global _suggester, _refresh_task
+    try:
+        _suggester = await build_ingredient_suggester(db)
+    except Exception as e:
+        logger.error(f"Error refreshing ingredient suggester: {str(e)}")
+        _suggester.built_at = time.monotonic()
+    finally:
+        _refresh_task = None
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional
+from abc import ABC, abstractmethod
+from pathlib import Path
+import asyncio
+import json
+import os
+import random
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 'emergent' calls the real model; 'fake' answers locally, for load tests and development
+LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'emergent').lower()
+
+
+class LLMProviderError(Exception):
+    """A failed completion, as raised by the fake provider's injected errors"""
+
+
+class LLMProvider(ABC):
+    """Chat completion backend behind OpenAIService"""
+
+    @abstractmethod
+    async def complete(self, session_id: str, system_message: str, text: str,
+                       image_base64: Optional[str] = None) -> str:
+        """The model's reply to `text`, with an optional base64-encoded image"""
+
+
+class EmergentLLMProvider(LLMProvider):
+    """GPT-4o through emergentintegrations' LlmChat"""
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o"):
+        self.api_key = api_key or os.environ.get('EMERGENT_LLM_KEY')
+        if not self.api_key:
+            raise ValueError("EMERGENT_LLM_KEY not found in environment")
+        self.model = model
+
+    async def complete(self, session_id: str, system_message: str, text: str,
+                       image_base64: Optional[str] = None) -> str:
+        # Deferred: the LLM client is slow to import and only needed once a request arrives
+        from emergentintegrations.llm.chat import LlmChat, UserMessage, ImageContent
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=session_id,
+            system_message=system_message
+        ).with_model("openai", self.model)
+        file_contents = [ImageContent(image_base64=image_base64)] if image_base64 else None
+        return await chat.send_message(UserMessage(text=text, file_contents=file_contents))
+
+
+_INGREDIENTS_RE = re.compile(r'using these ingredients: (.*)')
+_CUISINE_RE = re.compile(r'Preferred cuisine: (.*)')
+_DIFFICULTY_RE = re.compile(r'Difficulty level: (.*)')
+_DIETARY_RE = re.compile(r'Dietary preferences: (.*)')
+
+_FAKE_STAPLES = ['salt', 'black pepper', 'olive oil', 'garlic', 'onion', 'butter', 'lemon juice', 'fresh parsley']
+_FAKE_RECOGNIZED = ['tomato', 'onion', 'garlic', 'bell pepper', 'carrot', 'eggs', 'cheddar cheese', 'spinach',
+                    'chicken breast', 'potato', 'mushrooms', 'lemon']
+
+
+class FakeLLMProvider(LLMProvider):
+    """Local stand-in that answers with recorded or templated responses.
+
+    Latency is drawn from a log-normal distribution with the given median and sigma,
+    and `error_rate` of the calls raise LLMProviderError after that delay. Recordings
+    are a JSON object mapping a session id ("recipe_generation",
+    "ingredient_recognition") to a list of response texts; sessions without
+    recordings get templated responses built from the prompt.
+    """
+
+    def __init__(self, latency_median: float = 1.0, latency_sigma: float = 0.5, error_rate: float = 0.0,
+                 recordings: Optional[Dict[str, List[str]]] = None, seed: Optional[int] = None):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.recordings = recordings or {}
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> 'FakeLLMProvider':
+        recordings_path = os.environ.get('FAKE_LLM_RECORDINGS')
+        return cls(
+            latency_median=float(os.environ.get('FAKE_LLM_LATENCY_MEDIAN', '1.0')),
+            latency_sigma=float(os.environ.get('FAKE_LLM_LATENCY_SIGMA', '0.5')),
+            error_rate=float(os.environ.get('FAKE_LLM_ERROR_RATE', '0')),
+            recordings=json.loads(Path(recordings_path).read_text()) if recordings_path else None,
+        )
+
+    async def complete(self, session_id: str, system_message: str, text: str,
+                       image_base64: Optional[str] = None) -> str:
+        if self.latency_median > 0:
+            await asyncio.sleep(self._rng.lognormvariate(0, self.latency_sigma) * self.latency_median)
+        if self._rng.random() < self.error_rate:
+            raise LLMProviderError(f"Injected failure for {session_id}")
+        recorded = self.recordings.get(session_id)
+        if recorded:
+            return self._rng.choice(recorded)
+        if image_base64 is not None:
+            return '\n'.join(self._rng.sample(_FAKE_RECOGNIZED, self._rng.randint(3, 7)))
+        return self._recipe(text)
+
+    def _recipe(self, prompt: str) -> str:
+        def field(pattern: re.Pattern, default: str) -> str:
+            match = pattern.search(prompt)
+            return match.group(1).strip() if match else default
+
+        ingredients = [ing.strip() for ing in field(_INGREDIENTS_RE, '').split(',') if ing.strip()]
+        ingredients += self._rng.sample(_FAKE_STAPLES, self._rng.randint(2, 4))
+        cuisine = field(_CUISINE_RE, self._rng.choice(['Italian', 'Mexican', 'Indian', 'Thai', 'French']))
+        main = ingredients[0].title() if ingredients else 'Vegetable'
+        lines = [
+            f"NAME: {cuisine} {main} {self._rng.choice(['Skillet', 'Bowl', 'Bake', 'Stew', 'Salad', 'Stir-Fry'])}",
+            f"CUISINE: {cuisine}",
+            f"DIFFICULTY: {field(_DIFFICULTY_RE, self._rng.choice(['easy', 'medium', 'hard']))}",
+            f"COOKING_TIME: {self._rng.choice([15, 20, 30, 45, 60])}",
+            f"SERVING_SIZE: {self._rng.choice([2, 4, 6])}",
+            f"DIETARY_TAGS: {field(_DIETARY_RE, '')}",
+            "",
+            "INGREDIENTS:",
+            *[f"- {self._rng.choice(['1', '2', '1/2'])} {self._rng.choice(['cup', 'tbsp', 'tsp'])} {ing}" for ing in ingredients],
+            "",
+            "INSTRUCTIONS:",
+            *[f"{step}. Prepare the {ing}." for step, ing in enumerate(ingredients[:4], start=1)],
+            f"{min(len(ingredients), 4) + 1}. Combine everything and cook until done.",
+            "",
+            "NUTRITION (per serving):",
+            f"Calories: {self._rng.randint(200, 800)}",
+            f"Protein: {self._rng.randint(5, 50)}g",
+            f"Carbs: {self._rng.randint(10, 90)}g",
+            f"Fat: {self._rng.randint(3, 40)}g",
+            f"Fiber: {self._rng.randint(1, 12)}g",
+        ]
+        return '\n'.join(lines)
+
+
+def get_llm_provider(name: str = LLM_PROVIDER) -> LLMProvider:
+    """The provider selected by LLM_PROVIDER"""
+    if name == 'fake':
+        logger.warning("Using the fake LLM provider; responses are not real model output")
+        return FakeLLMProvider.from_env()
+    if name == 'emergent':
+        return EmergentLLMProvider()
+    raise ValueError(f"Unknown LLM_PROVIDER: {name}")
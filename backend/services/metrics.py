@@ -0,0 +1,276 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+import os
+import threading
+import time
+import logging
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Everything below is a no-op when this is off: the middleware and the Mongo listener
+# are not installed, decorators return the undecorated function and /metrics is absent.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no', 'off')
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Updates also arrive from the Motor executor threads
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the (label-less) value from `function` at scrape time"""
+        self._function = function
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {float(self._function())}"]
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    return '\n'.join(line for metric in REGISTRY for line in metric.render()) + '\n'
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route template, method and status',
+    ('route', 'method', 'status'),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests currently being handled')
+LLM_REQUEST_DURATION = Histogram(
+    'llm_request_duration_seconds', 'LLM call latency by OpenAIService operation and outcome', ('operation', 'status'),
+)
+LLM_REQUESTS_IN_FLIGHT = Gauge('llm_requests_in_flight', 'LLM calls currently waiting for a response', ('operation',))
+LLM_TOKENS = Counter('llm_tokens_total', 'Tokens sent to and received from the LLM', ('operation', 'direction'))
+MONGO_COMMAND_DURATION = Histogram(
+    'mongo_command_duration_seconds', 'MongoDB command latency by controller method, command and collection',
+    ('operation', 'command', 'collection'),
+)
+MONGO_COMMANDS_IN_FLIGHT = Gauge('mongo_commands_in_flight', 'MongoDB commands currently running')
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ('cache', 'result'))
+RECIPE_WRITE_QUEUE_DEPTH = Gauge('recipe_write_queue_depth', 'Generated recipes waiting to be written')
+
+# Controller method a MongoDB command is issued for; Motor copies the context into its
+# executor threads, so the command listener sees the value of the calling task.
+_current_operation: ContextVar[str] = ContextVar('current_operation', default='other')
+
+
+def track_operation(fn):
+    """Attribute the MongoDB commands of an async controller method to it"""
+    if not METRICS_ENABLED:
+        return fn
+    name = fn.__qualname__
+
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = _current_operation.set(name)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _current_operation.reset(token)
+    return wrapper
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    if METRICS_ENABLED:
+        CACHE_REQUESTS.inc(cache, 'hit' if hit else 'miss')
+
+
+_token_encoder = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count of a prompt or completion; falls back to ~4 characters per token"""
+    global _token_encoder
+    if _token_encoder is None:
+        try:
+            import tiktoken
+            _token_encoder = tiktoken.get_encoding('o200k_base')
+        except Exception:
+            _token_encoder = False
+    if _token_encoder:
+        return len(_token_encoder.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+async def observe_llm_call(operation: str, prompt_tokens: int, call) -> Tuple[str, int]:
+    """Await an LLM call, recording its latency, outcome and token counts.
+
+    Returns the response with its completion token count, so callers need not count it again.
+    """
+    if not METRICS_ENABLED:
+        response = await call
+        return response, count_tokens(response)
+    LLM_REQUESTS_IN_FLIGHT.inc(operation)
+    started = time.perf_counter()
+    status = 'error'
+    try:
+        response = await call
+        status = 'ok'
+        completion_tokens = count_tokens(response)
+        LLM_TOKENS.inc(operation, 'prompt', amount=prompt_tokens)
+        LLM_TOKENS.inc(operation, 'completion', amount=completion_tokens)
+        return response, completion_tokens
+    finally:
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - started, operation, status)
+        LLM_REQUESTS_IN_FLIGHT.dec(operation)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener feeding MONGO_COMMAND_DURATION"""
+
+    def __init__(self):
+        self._started: Dict[int, Tuple[str, str, str]] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._started[event.request_id] = (
+            _current_operation.get(),
+            event.command_name,
+            collection if isinstance(collection, str) else '',
+        )
+        MONGO_COMMANDS_IN_FLIGHT.inc()
+
+    def _finished(self, event):
+        labels = self._started.pop(event.request_id, None)
+        MONGO_COMMANDS_IN_FLIGHT.dec()
+        if labels is not None:
+            MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, *labels)
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency per route template, method and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The matched route template keeps label cardinality bounded
+            route = scope.get('route')
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                getattr(route, 'path', 'unmatched'),
+                scope['method'],
+                str(status['code']),
+            )
+            HTTP_REQUESTS_IN_FLIGHT.dec()
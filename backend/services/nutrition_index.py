@@ -0,0 +1,261 @@
+from array import array
+from typing import List, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from services.recipe_features import SCORING_PROJECTION, get_match_features
+
+NUTRIENTS = ['calories', 'protein', 'carbs', 'fat', 'fiber']
+
+# Distances are measured in daily values, so that 100 kcal weigh about as much as
+# 2.5 g of protein rather than being swamped by them
+NUTRIENT_SCALES = np.array([2000.0, 50.0, 275.0, 78.0, 28.0], dtype=np.float32)
+
+NUTRITION_PROJECTION = {**SCORING_PROJECTION, "nutrition": 1}
+
+# Recipes added since the last merge are kept in an unsorted tail, which every
+# query scans, and folded into the calorie-sorted arrays once it reaches this size.
+MERGE_THRESHOLD = 1024
+
+# A nearest-neighbour query first looks at this many times `limit` recipes closest
+# in calories, to bound the calorie band the full query has to cover
+PROBE_FACTOR = 8
+
+Ranges = Dict[str, Tuple[Optional[float], Optional[float]]]
+
+
+def _at_most_kth(keys: np.ndarray, k: int, unknown_last: bool = False) -> np.ndarray:
+    """Mask of the keys no greater than the k-th smallest, so only those need a full sort.
+
+    NaN keys never pass, unless `unknown_last` and fewer than k keys are known.
+    """
+    known = ~np.isnan(keys)
+    if known.sum() <= k:
+        return np.ones(len(keys), dtype=bool) if unknown_last else known
+    return keys <= np.partition(keys[known], k - 1)[k - 1]
+
+
+class NutritionIndex:
+    """Range and nearest-neighbour search over recipe nutrition, optionally combined with
+    ingredient matching.
+
+    Nutrition values are held as an (n, 5) float32 array. Rows are also kept sorted
+    by calories, so a calorie range is a binary search and the rest of the ranges
+    are checked on that slice only; a nearest-neighbour query with a calorie target
+    searches the band of calories that can still hold a closer recipe. Ingredient
+    tokens have per-token row postings, so the match scores of every recipe are
+    computed at once, with the same substring rule as RecipeMatchingService.
+    """
+
+    def __init__(self, cutoff_id: str = ''):
+        self.ids: List[str] = []
+        # Insertion cutoff (see catalog_cutoff) of the last scan
+        self.cutoff_id = cutoff_id
+        self._rows: Dict[str, int] = {}
+        self._values = np.zeros((1024, len(NUTRIENTS)), dtype=np.float32)
+        self._token_counts = array('i')
+        # Vocabulary of ingredient tokens, with the rows of each token by token id
+        self._vocabulary: List[str] = []
+        self._token_ids: Dict[str, int] = {}
+        self._token_rows: List[array] = []
+        self._max_token_length = 0
+        # The vocabulary joined by newlines, and the offset of each token in it, as of
+        # the last query; rebuilt when tokens were added since
+        self._blob = ''
+        self._blob_offsets = np.zeros(0, dtype=np.int64)
+        # Calorie-sorted rows and their values, covering every row added before the last merge
+        self._sorted_rows = np.zeros(0, dtype=np.int64)
+        self._sorted_values = np.zeros((0, len(NUTRIENTS)), dtype=np.float32)
+        self._sorted_calories = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, recipes: List[Dict], cutoff_id: str = '') -> 'NutritionIndex':
+        index = cls(cutoff_id)
+        for recipe in recipes:
+            index._append(recipe)
+        index._merge()
+        return index
+
+    def add(self, recipe: Dict):
+        """Add a single recipe incrementally"""
+        if recipe['id'] in self._rows:
+            return
+        self._append(recipe)
+        if len(self.ids) - len(self._sorted_rows) >= MERGE_THRESHOLD:
+            self._merge()
+
+    def search(
+        self,
+        ranges: Optional[Ranges] = None,
+        target: Optional[Dict[str, float]] = None,
+        available_normalized: Optional[List[str]] = None,
+        min_score: float = 0,
+        limit: int = 10
+    ) -> List[Tuple[str, Optional[float], Optional[float]]]:
+        """Best (recipe id, distance, match score) entries within the nutrient ranges.
+
+        With a target the nearest recipes come first (distance in daily values, over
+        the target's nutrients only), otherwise the best ingredient matches, otherwise
+        the lowest in calories. With ingredients, recipes must reach `min_score`.
+        """
+        ranges = dict(ranges or {})
+        target = target or {}
+        if limit <= 0 or not self.ids:
+            return []
+        scores = self._match_scores(available_normalized) if available_normalized else None
+
+        # Recipes without calories sort last
+        known = int(np.searchsorted(self._sorted_calories, np.inf, side='right'))
+        window = PROBE_FACTOR * limit
+        if 'calories' in target:
+            position = int(np.searchsorted(self._sorted_calories[:known], target['calories']))
+        # Nothing farther in calories than the k-th nearest of a probe can be closer; the
+        # probe widens while filters leave fewer than `limit` recipes in it
+        while 'calories' in target and window < known:
+            start = max(0, min(position - window // 2, known - window))
+            probe = self._rank(
+                self._narrow(ranges, float(self._sorted_calories[start]), float(self._sorted_calories[start + window - 1])),
+                target, scores, min_score, limit
+            )
+            if len(probe) == limit:
+                # Distances are rounded for the response, hence the margin
+                reach = (probe[-1][1] + 1e-3) * float(NUTRIENT_SCALES[0])
+                ranges = self._narrow(ranges, target['calories'] - reach, target['calories'] + reach)
+                break
+            window *= 4
+        return self._rank(ranges, target, scores, min_score, limit)
+
+    @staticmethod
+    def _narrow(ranges: Ranges, low: float, high: float) -> Ranges:
+        current_low, current_high = ranges.get('calories', (None, None))
+        narrowed = dict(ranges)
+        narrowed['calories'] = (
+            low if current_low is None else max(low, current_low),
+            high if current_high is None else min(high, current_high),
+        )
+        return narrowed
+
+    def _candidates(self, ranges: Ranges) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows whose nutrition is within every range (bounds are inclusive), with their values"""
+        low, high = ranges.get('calories', (None, None))
+        start = 0 if low is None else int(np.searchsorted(self._sorted_calories, low, side='left'))
+        end = len(self._sorted_rows) if high is None else int(np.searchsorted(self._sorted_calories, high, side='right'))
+        merged = len(self._sorted_rows)
+        rows = np.concatenate([self._sorted_rows[start:end], np.arange(merged, len(self.ids))])
+        # The calorie range is checked again for the unsorted tail
+        values = np.concatenate([self._sorted_values[start:end], self._values[merged:len(self.ids)]])
+        keep = np.ones(len(rows), dtype=bool)
+        for column, nutrient in enumerate(NUTRIENTS):
+            low, high = ranges.get(nutrient, (None, None))
+            if low is not None:
+                keep &= values[:, column] >= low
+            if high is not None:
+                keep &= values[:, column] <= high
+        return rows[keep], values[keep]
+
+    def _rank(self, ranges: Ranges, target: Dict[str, float], scores: Optional[np.ndarray],
+              min_score: float, limit: int) -> List[Tuple[str, Optional[float], Optional[float]]]:
+        rows, values = self._candidates(ranges)
+        if scores is not None:
+            keep = scores[rows] >= min_score
+            rows, values = rows[keep], values[keep]
+        distances = None
+        if target:
+            columns = [NUTRIENTS.index(nutrient) for nutrient in target]
+            wanted = np.array(list(target.values()), dtype=np.float32)
+            offsets = (values[:, columns] - wanted) / NUTRIENT_SCALES[columns]
+            distances = np.sqrt((offsets ** 2).sum(axis=1))
+            keep = _at_most_kth(distances, limit)
+            rows, distances = rows[keep], distances[keep]
+            order = np.lexsort((rows, -scores[rows], distances) if scores is not None else (rows, distances))
+        elif scores is not None:
+            keep = _at_most_kth(-scores[rows], limit)
+            rows, calories = rows[keep], values[keep, 0]
+            order = np.lexsort((rows, calories, -scores[rows]))
+        else:
+            keep = _at_most_kth(values[:, 0], limit, unknown_last=True)
+            rows, calories = rows[keep], values[keep, 0]
+            order = np.lexsort((rows, calories))
+        top = order[:limit]
+        return [
+            (
+                self.ids[row],
+                round(float(distances[i]), 4) if distances is not None else None,
+                float(scores[row]) if scores is not None else None,
+            )
+            for i, row in zip(top.tolist(), rows[top].tolist())
+        ]
+
+    def _match_scores(self, available_normalized: List[str]) -> np.ndarray:
+        count = len(self.ids)
+        matched = [np.frombuffer(self._token_rows[token_id], dtype=np.int32)
+                   for token_id in self._matching_tokens(available_normalized)]
+        matches = np.bincount(np.concatenate(matched), minlength=count) if matched else np.zeros(count)
+        lengths = np.frombuffer(self._token_counts, dtype=np.int32)
+        return np.round(np.divide(matches * 100.0, lengths, out=np.zeros(count), where=lengths > 0), 2)
+
+    def _matching_tokens(self, available_normalized: List[str]) -> Set[int]:
+        """Ids of the tokens that contain, or are contained in, any available ingredient.
+
+        Tokens containing an ingredient are found by scanning the joined vocabulary
+        and tokens contained in one by looking up its substrings, no longer than the
+        longest token, so the cost does not grow with the vocabulary in Python.
+        """
+        if len(self._blob_offsets) != len(self._vocabulary):
+            self._blob = '\n'.join(self._vocabulary)
+            lengths = np.fromiter((len(token) + 1 for token in self._vocabulary), dtype=np.int64,
+                                  count=len(self._vocabulary))
+            self._blob_offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+        matched: Set[int] = set()
+        for available in available_normalized:
+            if not available:
+                return set(range(len(self._vocabulary)))
+            positions = []
+            position = self._blob.find(available)
+            while position != -1:
+                positions.append(position)
+                position = self._blob.find(available, position + 1)
+            if positions:
+                matched.update((np.searchsorted(self._blob_offsets, positions, side='right') - 1).tolist())
+            longest = min(len(available), self._max_token_length)
+            for start in range(len(available)):
+                for end in range(start + 1, min(start + longest, len(available)) + 1):
+                    token_id = self._token_ids.get(available[start:end])
+                    if token_id is not None:
+                        matched.add(token_id)
+        return matched
+
+    def _append(self, recipe: Dict):
+        row = len(self.ids)
+        self._rows[recipe['id']] = row
+        self.ids.append(recipe['id'])
+
+        if row == len(self._values):
+            self._values = np.concatenate([self._values, np.zeros_like(self._values)])
+        nutrition = recipe.get('nutrition') or {}
+        self._values[row] = [
+            nutrition[nutrient] if isinstance(nutrition.get(nutrient), (int, float)) else np.nan
+            for nutrient in NUTRIENTS
+        ]
+        tokens = get_match_features(recipe)['ingredient_tokens']
+        self._token_counts.append(len(tokens))
+        # A token listed twice matches twice, as in calculate_match_score
+        for token in tokens:
+            token_id = self._token_ids.get(token)
+            if token_id is None:
+                token_id = self._token_ids[token] = len(self._vocabulary)
+                self._vocabulary.append(token)
+                self._token_rows.append(array('i'))
+                self._max_token_length = max(self._max_token_length, len(token))
+            self._token_rows[token_id].append(row)
+
+    def _merge(self):
+        """Re-sort the rows by calories so that the tail is empty"""
+        calories = self._values[:len(self.ids), 0]
+        self._sorted_rows = np.argsort(calories, kind='stable')
+        self._sorted_values = self._values[self._sorted_rows]
+        self._sorted_calories = self._sorted_values[:, 0].copy()
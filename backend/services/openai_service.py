@@ -1,35 +1,39 @@
-from emergentintegrations.llm.chat import LlmChat, UserMessage, ImageContent
-import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
 import base64
-from pathlib import Path
+
+from services.llm_provider import LLMProvider, get_llm_provider
+from services.metrics import count_tokens, observe_llm_call
 
 logger = logging.getLogger(__name__)
 
-class OpenAIService:
+class TokenUsage:
+    """Tokens spent by the calls a caller passed it to, failed calls included"""
+
     def __init__(self):
-        self.api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not self.api_key:
-            raise ValueError("EMERGENT_LLM_KEY not found in environment")
+        self.prompt = 0
+        self.completion = 0
+
+    @property
+    def total(self) -> int:
+        return self.prompt + self.completion
+
+class OpenAIService:
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        # LLM_PROVIDER picks the backend; see services/llm_provider.py
+        self.provider = provider or get_llm_provider()
     
     async def recognize_ingredients_from_image(self, image_base64: str) -> List[str]:
         """Recognize ingredients from an image using GPT-4 Vision"""
         try:
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id=f"ingredient_recognition",
-                system_message="You are an expert chef and ingredient recognition assistant. Analyze images and identify all visible ingredients with high accuracy."
-            ).with_model("openai", "gpt-4o")
-            
-            image_content = ImageContent(image_base64=image_base64)
+            text = "Please identify all the ingredients visible in this image. List them clearly, one per line. Only list the ingredient names, nothing else."
             
-            user_message = UserMessage(
-                text="Please identify all the ingredients visible in this image. List them clearly, one per line. Only list the ingredient names, nothing else.",
-                file_contents=[image_content]
-            )
-            
-            response = await chat.send_message(user_message)
+            response, _ = await observe_llm_call('recognize_ingredients', count_tokens(text), self.provider.complete(
+                session_id="ingredient_recognition",
+                system_message="You are an expert chef and ingredient recognition assistant. Analyze images and identify all visible ingredients with high accuracy.",
+                text=text,
+                image_base64=image_base64
+            ))
             
             # Parse the response to extract ingredients
             ingredients = [line.strip() for line in response.split('\n') if line.strip() and not line.strip().startswith('#')]
@@ -41,15 +45,10 @@ class OpenAIService:
             raise
     
     async def generate_recipe(self, ingredients: List[str], dietary_preferences: List[str] = [], 
-                             cuisine_preference: str = None, difficulty: str = None) -> Dict:
-        """Generate a recipe using available ingredients"""
+                             cuisine_preference: str = None, difficulty: str = None,
+                             usage: Optional[TokenUsage] = None) -> Dict:
+        """Generate a recipe using available ingredients; the call's tokens, even if it fails, are added to `usage`"""
         try:
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id=f"recipe_generation",
-                system_message="You are a professional chef and recipe creator. Generate creative, delicious, and practical recipes based on available ingredients."
-            ).with_model("openai", "gpt-4o")
-            
             prompt = f"""Create a detailed recipe using these ingredients: {', '.join(ingredients)}
             
 {'Dietary preferences: ' + ', '.join(dietary_preferences) if dietary_preferences else ''}
@@ -83,8 +82,17 @@ Fat: [number]g
 Fiber: [number]g
 """
             
-            user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+            # Prompt tokens are spent even when the call fails
+            prompt_tokens = count_tokens(prompt)
+            if usage is not None:
+                usage.prompt += prompt_tokens
+            response, completion_tokens = await observe_llm_call('generate_recipe', prompt_tokens, self.provider.complete(
+                session_id="recipe_generation",
+                system_message="You are a professional chef and recipe creator. Generate creative, delicious, and practical recipes based on available ingredients.",
+                text=prompt
+            ))
+            if usage is not None:
+                usage.completion += completion_tokens
             
             # Parse the response into structured data
             recipe_data = self._parse_recipe_response(response)
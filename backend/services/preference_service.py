@@ -0,0 +1,98 @@
+from typing import List, Dict, Optional, Tuple
+import logging
+
+import numpy as np
+from cachetools import TTLCache
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services.recipe_features import (
+    ALLERGEN_BITS, ALLERGY_ALIASES, RESTRICTION_MASK, cuisine_id, dietary_mask, normalize_ingredient
+)
+from services.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Ranking points added to recipes from one of the user's favorite cuisines
+FAVORITE_CUISINE_BOOST = 10.0
+
+# The cache is per process: preferences saved through another worker are seen here
+# only once the cached profile expires, so this bounds how stale a profile can be.
+PREFERENCE_CACHE_TTL = 60  # seconds
+
+# Shared by every controller in the process so that saving preferences invalidates
+# what /find sees. A missing preference document is cached as None, so a cache miss
+# needs its own marker.
+_profile_cache: TTLCache = TTLCache(maxsize=10000, ttl=PREFERENCE_CACHE_TTL)
+_MISSING = object()
+# Bumped by every invalidation; a profile read while it changed may be stale and is not cached
+_invalidations = 0
+
+
+class PreferenceProfile:
+    """User preferences compiled into masks that apply to whole candidate arrays at once"""
+
+    def __init__(self, preferences: Dict):
+        self.allergen_mask = 0
+        self.unknown_allergies: List[str] = []
+        for allergy in preferences.get('allergies', []):
+            allergen = ALLERGY_ALIASES.get(normalize_ingredient(allergy))
+            if allergen:
+                self.allergen_mask |= ALLERGEN_BITS[allergen]
+            elif allergy.strip():
+                self.unknown_allergies.append(normalize_ingredient(allergy))
+        self.required_dietary_mask = dietary_mask(preferences.get('dietary_restrictions', [])) & RESTRICTION_MASK
+        self.favorite_cuisine_ids = np.array(
+            [cuisine_id(cuisine) for cuisine in preferences.get('favorite_cuisines', [])], dtype=np.int64
+        )
+
+    def apply_masks(self, allergens: np.ndarray, dietary: np.ndarray,
+                    cuisines: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (keep, boost) arrays for aligned allergen mask, dietary mask and cuisine id arrays"""
+        keep = ((allergens & self.allergen_mask) == 0) & ((dietary & self.required_dietary_mask) == self.required_dietary_mask)
+        boost = np.isin(cuisines, self.favorite_cuisine_ids) * FAVORITE_CUISINE_BOOST
+        return keep, boost
+
+    def apply(self, features: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (keep, boost) arrays aligned with the given recipe match features"""
+        count = len(features)
+        keep, boost = self.apply_masks(
+            np.fromiter((f.get('allergen_mask', 0) for f in features), dtype=np.int64, count=count),
+            np.fromiter((f.get('dietary_mask', 0) for f in features), dtype=np.int64, count=count),
+            np.fromiter((f.get('cuisine_id', 0) for f in features), dtype=np.int64, count=count),
+        )
+
+        # Allergies outside the allergen vocabulary fall back to a word check, but only
+        # on recipes that survived the mask filters.
+        if self.unknown_allergies:
+            for row in np.flatnonzero(keep):
+                tokens = features[row].get('ingredient_tokens', [])
+                if any(allergy in token for allergy in self.unknown_allergies for token in tokens):
+                    keep[row] = False
+        return keep, boost
+
+
+class PreferenceService:
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def get_profile(self, user_session: str) -> Optional[PreferenceProfile]:
+        """Compiled preferences of a session, cached for PREFERENCE_CACHE_TTL seconds"""
+        # One lookup, so the entry cannot expire between a membership test and the read
+        profile = _profile_cache.get(user_session, _MISSING)
+        if profile is not _MISSING:
+            record_cache_lookup('preference_profile', True)
+            return profile
+        record_cache_lookup('preference_profile', False)
+        invalidations = _invalidations
+        prefs = await self.db.user_preferences.find_one({"user_session": user_session}, {"_id": 0})
+        profile = PreferenceProfile(prefs) if prefs else None
+        if invalidations == _invalidations:
+            _profile_cache[user_session] = profile
+        return profile
+
+    @staticmethod
+    def invalidate(user_session: str):
+        """Drop the cached profile of a session once its new preferences are written"""
+        global _invalidations
+        _invalidations += 1
+        _profile_cache.pop(user_session, None)
@@ -0,0 +1,152 @@
+from typing import Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import os
+import uuid
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from services.combo_tracker import ComboTracker
+from services.openai_service import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+PREGENERATION_ENABLED = os.environ.get('PREGENERATION_ENABLED', 'false').lower() in ('1', 'true', 'yes', 'on')
+# Off-peak window as "start-end" UTC hours, end exclusive; "22-5" wraps past midnight
+PREGENERATION_HOURS = os.environ.get('PREGENERATION_HOURS', '2-6')
+PREGENERATION_TOP_N = int(os.environ.get('PREGENERATION_TOP_N', '50'))
+# Prompt plus completion tokens spent per UTC day, shared by all workers
+PREGENERATION_TOKEN_BUDGET = int(os.environ.get('PREGENERATION_TOKEN_BUDGET', '100000'))
+# Only combos requested within this many days count as popular
+PREGENERATION_WINDOW_DAYS = int(os.environ.get('PREGENERATION_WINDOW_DAYS', '7'))
+PREGENERATION_CHECK_INTERVAL = 600.0  # seconds
+
+# A worker that dies holding the lease blocks the others for at most this long
+LEASE_SECONDS = 1800
+
+LEASE_ID = "pregeneration"
+
+
+def parse_hours(hours: str) -> Tuple[int, int]:
+    start, _, end = hours.partition('-')
+    window = int(start), int(end)
+    if not (0 <= window[0] <= 23 and 0 <= window[1] <= 24):
+        raise ValueError(f"Invalid PREGENERATION_HOURS: {hours}")
+    return window
+
+
+def in_window(hour: int, window: Tuple[int, int]) -> bool:
+    start, end = window
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+
+class PregenerationWorker:
+    """Generates recipes ahead of time for the most requested ingredient sets.
+
+    During the off-peak window, the top combos from ComboTracker that no recipe
+    answers yet are generated through the recipe controller, which stores them
+    under their generation key; later /generate requests for the same set are then
+    cache hits, and /find sees the new recipes in the catalog. Spending stops at the
+    daily token budget. With several server processes, a lease in the job_locks
+    collection lets one of them run at a time.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, controller, combo_tracker: ComboTracker,
+                 top_n: int = PREGENERATION_TOP_N, token_budget: int = PREGENERATION_TOKEN_BUDGET,
+                 hours: str = PREGENERATION_HOURS, window_days: int = PREGENERATION_WINDOW_DAYS,
+                 check_interval: float = PREGENERATION_CHECK_INTERVAL):
+        self.db = db
+        self.controller = controller
+        self.combo_tracker = combo_tracker
+        self.top_n = top_n
+        self.token_budget = token_budget
+        self.window = parse_hours(hours)
+        self.window_days = window_days
+        self.check_interval = check_interval
+        self.owner = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.db.job_locks.delete_one({"_id": LEASE_ID, "owner": self.owner})
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            if not in_window(datetime.now(timezone.utc).hour, self.window):
+                continue
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Error pre-generating recipes: {str(e)}")
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db.job_locks.find_one_and_update(
+                {"_id": LEASE_ID, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now.isoformat()}}]},
+                {"$set": {"owner": self.owner, "expires_at": (now + timedelta(seconds=LEASE_SECONDS)).isoformat()}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def run_once(self) -> int:
+        """Generate recipes for uncached popular combos until the budget runs out; returns how many"""
+        if not await self._acquire_lease():
+            return 0
+        # The counts of requests served since the last flush count too
+        await self.combo_tracker.flush()
+
+        day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        budget_id = f"{LEASE_ID}:{day}"
+        state = await self.db.job_locks.find_one({"_id": budget_id}) or {}
+        spent = state.get('tokens', 0)
+        if spent >= self.token_budget:
+            return 0
+
+        since = datetime.now(timezone.utc) - timedelta(days=self.window_days)
+        combos = await self.combo_tracker.top_combos(self.top_n, since)
+        cached = set(await self.db.recipes.distinct(
+            "generation_keys", {"generation_keys": {"$in": [combo['key'] for combo in combos]}}
+        ))
+
+        generated = 0
+        for combo in combos:
+            if combo['key'] in cached:
+                continue
+            if spent >= self.token_budget or not in_window(datetime.now(timezone.utc).hour, self.window):
+                break
+            # Counted per call, so requests served meanwhile are not charged to the budget,
+            # and not recorded as demand for the combo
+            usage = TokenUsage()
+            try:
+                recipe = await self.controller.generate_recipe_from_ingredients(
+                    combo['ingredients'], usage=usage, record_combo=False
+                )
+                if not recipe.get('cached') and not recipe.get('deduplicated'):
+                    generated += 1
+            except Exception as e:
+                logger.error(f"Error pre-generating a recipe for {combo['key']}: {str(e)}")
+            used = usage.total
+            spent += used
+            await self.db.job_locks.update_one({"_id": budget_id}, {"$inc": {"tokens": used}}, upsert=True)
+            if not await self._acquire_lease():
+                break
+
+        logger.info(f"Pre-generated {generated} recipes for popular ingredient combos "
+                    f"({spent}/{self.token_budget} tokens used today)")
+        return generated
@@ -0,0 +1,256 @@
+from typing import List, Dict, Optional, Tuple
+from fractions import Fraction
+import re
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# US measures, defined from each other so that 3 tsp is exactly 1 tbsp, 16 tbsp
+# exactly 1 cup and 16 oz exactly 1 lb
+TSP_ML = 4.92892159375
+TBSP_ML = 3 * TSP_ML
+CUP_ML = 16 * TBSP_ML
+OZ_G = 28.349523125
+LB_G = 16 * OZ_G
+
+# Canonical unit -> (dimension, size in the dimension's base unit).
+# Volume is based on millilitres and mass on grams.
+UNITS = {
+    'tsp': ('volume', TSP_ML),
+    'tbsp': ('volume', TBSP_ML),
+    'cup': ('volume', CUP_ML),
+    'ml': ('volume', 1.0),
+    'l': ('volume', 1000.0),
+    'g': ('mass', 1.0),
+    'kg': ('mass', 1000.0),
+    'oz': ('mass', OZ_G),
+    'lb': ('mass', LB_G),
+}
+
+# Ladders used to re-normalize a scaled amount. Each entry is (unit, minimum amount in
+# base units for the unit to be chosen); a ladder never leaves its measuring system.
+UNIT_LADDERS = {
+    'us_volume': [('tsp', 0.0), ('tbsp', TBSP_ML), ('cup', CUP_ML / 4)],
+    'metric_volume': [('ml', 0.0), ('l', 1000.0)],
+    'metric_mass': [('g', 0.0), ('kg', 1000.0)],
+    'us_mass': [('oz', 0.0), ('lb', LB_G)],
+}
+UNIT_SYSTEM = {
+    'tsp': 'us_volume', 'tbsp': 'us_volume', 'cup': 'us_volume',
+    'ml': 'metric_volume', 'l': 'metric_volume',
+    'g': 'metric_mass', 'kg': 'metric_mass',
+    'oz': 'us_mass', 'lb': 'us_mass',
+}
+
+UNIT_ALIASES = {
+    'teaspoon': 'tsp', 'teaspoons': 'tsp', 'tsp': 'tsp', 'tsps': 'tsp', 'tsp.': 'tsp',
+    'tablespoon': 'tbsp', 'tablespoons': 'tbsp', 'tbsp': 'tbsp', 'tbsps': 'tbsp', 'tbsp.': 'tbsp', 'tbs': 'tbsp',
+    'cup': 'cup', 'cups': 'cup', 'c.': 'cup',
+    'ml': 'ml', 'milliliter': 'ml', 'milliliters': 'ml', 'millilitre': 'ml', 'millilitres': 'ml',
+    'l': 'l', 'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l',
+    'g': 'g', 'gram': 'g', 'grams': 'g', 'gr': 'g',
+    'kg': 'kg', 'kilogram': 'kg', 'kilograms': 'kg', 'kgs': 'kg',
+    'oz': 'oz', 'ounce': 'oz', 'ounces': 'oz', 'oz.': 'oz',
+    'lb': 'lb', 'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb', 'lb.': 'lb', 'lbs.': 'lb',
+    # Countable units are kept as written and only their amount is scaled
+    'clove': 'clove', 'cloves': 'clove',
+    'can': 'can', 'cans': 'can',
+    'slice': 'slice', 'slices': 'slice',
+    'piece': 'piece', 'pieces': 'piece',
+    'pinch': 'pinch', 'pinches': 'pinch',
+    'bunch': 'bunch', 'bunches': 'bunch',
+    'sprig': 'sprig', 'sprigs': 'sprig',
+    'stalk': 'stalk', 'stalks': 'stalk',
+    'head': 'head', 'heads': 'head',
+    'package': 'package', 'packages': 'package',
+}
+UNIT_PLURALS = {
+    'cup': 'cups', 'clove': 'cloves', 'can': 'cans', 'slice': 'slices', 'piece': 'pieces',
+    'pinch': 'pinches', 'bunch': 'bunches', 'sprig': 'sprigs', 'stalk': 'stalks',
+    'head': 'heads', 'package': 'packages',
+}
+
+UNICODE_FRACTIONS = {
+    '½': '1/2', '⅓': '1/3', '⅔': '2/3', '¼': '1/4', '¾': '3/4',
+    '⅕': '1/5', '⅛': '1/8', '⅜': '3/8', '⅝': '5/8', '⅞': '7/8',
+}
+
+_UNICODE_FRACTION_RE = re.compile(rf"(\d?)([{''.join(UNICODE_FRACTIONS)}])")
+
+_NUMBER = r'(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)'
+_QUANTITY_RE = re.compile(
+    rf'^(?P<amount>{_NUMBER})(?:\s*(?:-|to|–)\s*(?P<amount_max>{_NUMBER}))?\s*'
+    r'(?P<size>\([^)]*\))?\s*'
+    r'(?P<rest>.*)$'
+)
+
+
+def _parse_number(text: str) -> float:
+    """Parse '2', '1.5', '1/2' or '1 1/2' into a float"""
+    total = 0.0
+    for part in text.split():
+        if '/' in part:
+            numerator, denominator = part.split('/', 1)
+            total += int(numerator) / int(denominator)
+        else:
+            total += float(part)
+    return total
+
+
+def parse_ingredient_line(line: str) -> Dict:
+    """Parse an ingredient line into a structured (amount, unit, item) form"""
+    # '1½' -> '1 1/2', '½' -> '1/2'
+    text = _UNICODE_FRACTION_RE.sub(
+        lambda m: f"{m.group(1) + ' ' if m.group(1) else ''}{UNICODE_FRACTIONS[m.group(2)]}",
+        line.strip()
+    )
+
+    parsed = {'amount': None, 'amount_max': None, 'unit': None, 'size': None, 'item': text, 'prep': None}
+
+    match = _QUANTITY_RE.match(text)
+    if match:
+        parsed['amount'] = _parse_number(match.group('amount'))
+        if match.group('amount_max'):
+            parsed['amount_max'] = _parse_number(match.group('amount_max'))
+        parsed['size'] = match.group('size')
+        rest = match.group('rest')
+
+        words = rest.split(None, 1)
+        if words:
+            unit = UNIT_ALIASES.get(words[0].lower())
+            if unit:
+                parsed['unit'] = unit
+                rest = words[1] if len(words) > 1 else ''
+        if rest.lower().startswith('of '):
+            rest = rest[3:]
+        parsed['item'] = rest.strip()
+
+    item, _, prep = parsed['item'].partition(',')
+    parsed['item'] = item.strip()
+    parsed['prep'] = prep.strip() or None
+    return parsed
+
+
+def parse_ingredients(lines: List[str]) -> List[Dict]:
+    """Parse all ingredient lines of a recipe"""
+    return [parse_ingredient_line(line) for line in lines]
+
+
+def format_amount(amount: float, unit: Optional[str] = None) -> str:
+    """Render an amount, as a kitchen-friendly mixed fraction for non-metric units"""
+    if UNIT_SYSTEM.get(unit, '').startswith('metric'):
+        return f"{amount:.2f}".rstrip('0').rstrip('.')
+    whole = int(amount)
+    remainder = amount - whole
+    fraction = Fraction(remainder).limit_denominator(8)
+    if fraction.denominator not in (1, 2, 3, 4, 8) or abs(float(fraction) - remainder) > 0.02:
+        return f"{amount:.2f}".rstrip('0').rstrip('.')
+    if fraction == 1:
+        whole, fraction = whole + 1, Fraction(0)
+    if fraction == 0:
+        return str(whole)
+    if whole == 0:
+        return f"{fraction.numerator}/{fraction.denominator}"
+    return f"{whole} {fraction.numerator}/{fraction.denominator}"
+
+
+def format_ingredient_line(parsed: Dict) -> str:
+    """Turn a structured ingredient back into a display line"""
+    parts = []
+    if parsed.get('amount') is not None:
+        unit = parsed.get('unit')
+        amount = format_amount(parsed['amount'], unit)
+        if parsed.get('amount_max') is not None:
+            amount = f"{amount}-{format_amount(parsed['amount_max'], unit)}"
+        parts.append(amount)
+        if unit:
+            largest = max(parsed['amount'], parsed.get('amount_max') or 0)
+            parts.append(UNIT_PLURALS.get(unit, unit) if largest > 1 else unit)
+    if parsed.get('size'):
+        parts.append(parsed['size'])
+    parts.append(parsed['item'])
+    line = ' '.join(part for part in parts if part)
+    if parsed.get('prep'):
+        line = f"{line}, {parsed['prep']}"
+    return line
+
+
+def _choose_units(base_amounts: np.ndarray, systems: List[Optional[str]]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """Pick the most readable unit on each quantity's ladder.
+
+    Returns the size of the chosen unit in base units (1.0 where there is no ladder)
+    together with the chosen unit names.
+    """
+    target_sizes = np.ones(len(systems))
+    units: List[Optional[str]] = [None] * len(systems)
+    system_array = np.array([s or '' for s in systems])
+    for system, ladder in UNIT_LADDERS.items():
+        rows = np.flatnonzero(system_array == system)
+        if not len(rows):
+            continue
+        thresholds = np.array([threshold for _, threshold in ladder])
+        sizes = np.array([UNITS[unit][1] for unit, _ in ladder])
+        steps = np.searchsorted(thresholds, base_amounts[rows] * (1 + 1e-9), side='right') - 1
+        target_sizes[rows] = sizes[steps]
+        for row, step in zip(rows, steps):
+            units[row] = ladder[step][0]
+    return target_sizes, units
+
+
+def scale_quantities_batch(quantity_lists: List[List[Dict]], multipliers: List[float]) -> List[List[Dict]]:
+    """Scale the quantities of many recipes at once with a single vectorized pass.
+
+    `quantity_lists[i]` holds the parsed ingredients of recipe i and `multipliers[i]` its
+    scaling factor. Quantities with a known measuring system are re-normalized along their
+    unit ladder (tsp -> tbsp -> cup, g -> kg, ...); countable units keep their unit.
+    """
+    if not np.all(np.isfinite(multipliers)):
+        raise ValueError("Scaling multipliers must be finite")
+    flat = [q for quantities in quantity_lists for q in quantities]
+    if not flat:
+        return [[] for _ in quantity_lists]
+
+    lengths = np.array([len(quantities) for quantities in quantity_lists])
+    line_multipliers = np.repeat(np.asarray(multipliers, dtype=np.float64), lengths)
+
+    has_amount = np.array([q.get('amount') is not None for q in flat])
+    has_max = np.array([q.get('amount_max') is not None for q in flat])
+    unit_sizes = np.array([UNITS[q['unit']][1] if q.get('unit') in UNITS else 1.0 for q in flat])
+    systems = [UNIT_SYSTEM.get(q.get('unit')) if q.get('amount') is not None else None for q in flat]
+    measured = np.array([system is not None for system in systems])
+
+    amounts = np.array([q.get('amount') or 0.0 for q in flat]) * line_multipliers
+    amount_maxes = np.array([q.get('amount_max') or 0.0 for q in flat]) * line_multipliers
+
+    # Convert measured quantities to base units, then into the most readable unit.
+    target_sizes, units = _choose_units(amounts * unit_sizes, systems)
+    unit_factor = np.where(measured, unit_sizes / target_sizes, 1.0)
+    amounts = amounts * unit_factor
+    amount_maxes = amount_maxes * unit_factor
+
+    scaled = []
+    for i, q in enumerate(flat):
+        item = dict(q)
+        if has_amount[i]:
+            item['amount'] = round(float(amounts[i]), 4)
+            item['amount_max'] = round(float(amount_maxes[i]), 4) if has_max[i] else None
+            if measured[i]:
+                item['unit'] = units[i]
+        scaled.append(item)
+
+    result = []
+    offset = 0
+    for length in lengths:
+        result.append(scaled[offset:offset + length])
+        offset += length
+    return result
+
+
+def scale_nutrition(nutrition: Dict, multiplier: float) -> Dict:
+    """Scale every numeric nutrition value by the given multiplier"""
+    return {
+        key: int(round(value * multiplier)) if isinstance(value, (int, float)) else value
+        for key, value in nutrition.items()
+    }
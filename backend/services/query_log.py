@@ -0,0 +1,106 @@
+from typing import List, Dict, Optional
+from collections import deque
+from datetime import datetime, timezone
+import asyncio
+import os
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import CollectionInvalid
+
+from services.combo_tracker import canonical_ingredients
+
+logger = logging.getLogger(__name__)
+
+QUERY_LOG_ENABLED = os.environ.get('QUERY_LOG_ENABLED', 'true').lower() not in ('0', 'false', 'no', 'off')
+# Size of the capped query_events collection; the oldest events are overwritten
+QUERY_LOG_COLLECTION_BYTES = int(os.environ.get('QUERY_LOG_COLLECTION_BYTES', str(256 * 1024 * 1024)))
+
+# Events held in memory between flushes; past this the oldest unflushed ones are dropped
+QUERY_LOG_CAPACITY = 10000
+QUERY_LOG_BATCH_SIZE = 500
+QUERY_LOG_FLUSH_INTERVAL = 2.0  # seconds
+
+
+class QueryLog:
+    """Ring buffer of query events, written in batches to the capped query_events collection.
+
+    Recording an event only appends to the buffer; a background task inserts them,
+    so a slow or unavailable database never delays a request.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, capacity: int = QUERY_LOG_CAPACITY,
+                 batch_size: int = QUERY_LOG_BATCH_SIZE, flush_interval: float = QUERY_LOG_FLUSH_INTERVAL):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._events: deque = deque(maxlen=capacity)
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_collection(self, size: int = QUERY_LOG_COLLECTION_BYTES):
+        try:
+            await self.db.create_collection('query_events', capped=True, size=size)
+        except CollectionInvalid:
+            pass  # already there
+        except Exception as e:
+            logger.error(f"Error creating the capped query_events collection: {str(e)}")
+
+    def record(self, kind: str, ingredients: List[str], latency_ms: float, results: int,
+               filters: Optional[Dict] = None, cache_hit: Optional[bool] = None, error: bool = False):
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        event = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "kind": kind,
+            "ingredients": canonical_ingredients(ingredients),
+            "latency_ms": round(latency_ms, 2),
+            "results": results,
+        }
+        # Only what is set, to keep events small
+        filters = {key: value for key, value in (filters or {}).items() if value not in (None, [], '')}
+        if filters:
+            event["filters"] = filters
+        if cache_hit is not None:
+            event["cache_hit"] = cache_hit
+        if error:
+            event["error"] = True
+        self._events.append(event)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the flush task and write what is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._events:
+            if not await self.flush():
+                break
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            while await self.flush() >= self.batch_size:
+                pass
+
+    async def flush(self) -> int:
+        """Insert up to one batch of buffered events; returns how many were written"""
+        batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+        if not batch:
+            return 0
+        if self.dropped:
+            logger.warning(f"Query log buffer was full, dropped {self.dropped} events")
+            self.dropped = 0
+        try:
+            await self.db.query_events.insert_many(batch, ordered=False)
+            return len(batch)
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} query events: {str(e)}")
+            return 0
@@ -0,0 +1,85 @@
+from typing import Dict, Optional, Sequence
+from collections import Counter
+
+import numpy as np
+
+from services.recipe_features import DIETARY_TAG_BITS
+
+# Cooking-time facet: how many recipes are ready within each of these many minutes,
+# the same cumulative cut-off as the max_cooking_time filter
+COOKING_TIME_BUCKETS = [15, 30, 45, 60, 90, 120]
+
+
+def _count_labels(counter: Counter, labels: np.ndarray, selected: np.ndarray,
+                  names: Optional[Dict] = None):
+    values, counts = np.unique(labels[selected], return_counts=True)
+    for value, count in zip(values.tolist(), counts.tolist()):
+        counter[names.get(value, '') if names is not None else value] += count
+
+
+class FacetCounts:
+    """Cuisine, difficulty, cooking-time and dietary tag counts over the recipes /find matched.
+
+    Each facet is counted with every filter of the request applied except its own,
+    so a count is the number of recipes the result would have with that choice
+    instead; cuisine has no filter and is counted over the result itself. Batches of
+    candidates are added as they are scored, so the counts need no extra query.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.cuisine: Counter = Counter()
+        self.difficulty: Counter = Counter()
+        self.cooking_time: Counter = Counter()
+        self.dietary_tags: Counter = Counter()
+
+    def add(
+        self,
+        matched: np.ndarray,
+        difficulty_ok: np.ndarray,
+        time_ok: np.ndarray,
+        dietary_ok: np.ndarray,
+        cuisines: np.ndarray,
+        difficulties: np.ndarray,
+        cooking_times: np.ndarray,
+        dietary_masks: np.ndarray,
+        cuisine_names: Optional[Dict[int, str]] = None,
+        difficulty_names: Optional[Sequence[str]] = None
+    ):
+        """Count a batch of candidates from aligned arrays.
+
+        `matched` marks the candidates that reach the minimum match score and pass the
+        user's profile; the *_ok arrays mark the ones passing each request filter.
+        Labels may be ids, translated through `cuisine_names` and `difficulty_names`.
+        """
+        result = matched & difficulty_ok & time_ok & dietary_ok
+        self.total += int(result.sum())
+        _count_labels(self.cuisine, cuisines, result, cuisine_names)
+
+        without_difficulty = matched & time_ok & dietary_ok
+        _count_labels(self.difficulty, difficulties, without_difficulty,
+                      dict(enumerate(difficulty_names)) if difficulty_names is not None else None)
+
+        without_time = matched & difficulty_ok & dietary_ok
+        times = cooking_times[without_time]
+        for minutes in COOKING_TIME_BUCKETS:
+            self.cooking_time[minutes] += int((times <= minutes).sum())
+
+        masks = dietary_masks[matched & difficulty_ok & time_ok]
+        for tag, bit in DIETARY_TAG_BITS.items():
+            self.dietary_tags[tag] += int(((masks & bit) != 0).sum())
+
+    def to_dict(self) -> Dict:
+        def ranked(counter: Counter) -> Dict[str, int]:
+            return {name: count for name, count in counter.most_common() if name and count}
+
+        return {
+            "total": self.total,
+            "cuisine": ranked(self.cuisine),
+            "difficulty": ranked(self.difficulty),
+            "cooking_time": [
+                {"max_cooking_time": minutes, "count": self.cooking_time[minutes]} for minutes in COOKING_TIME_BUCKETS
+            ],
+            "dietary_tags": ranked(self.dietary_tags),
+        }
+
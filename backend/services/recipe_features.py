@@ -0,0 +1,205 @@
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+import re
+import zlib
+import logging
+
+from bson import ObjectId
+
+from services.quantity_parser import parse_ingredients
+
+logger = logging.getLogger(__name__)
+
+# Slack for the clocks of other writers, whose ObjectIds may lag behind ours
+CATALOG_CUTOFF_MARGIN = timedelta(seconds=60)
+
+# Bump whenever the shape or the derivation of the stored features changes so
+# that readers can detect stale documents and the backfill migration can find them.
+FEATURES_VERSION = 3
+
+# Fixed dietary tag vocabulary. The position of a tag is its bit in `dietary_mask`,
+# so new tags must only ever be appended.
+DIETARY_TAG_VOCABULARY = [
+    'vegetarian',
+    'vegan',
+    'gluten-free',
+    'dairy-free',
+    'nut-free',
+    'low-carb',
+    'keto',
+    'paleo',
+    'high-protein',
+    'low-fat',
+    'low-calorie',
+    'pescatarian',
+]
+DIETARY_TAG_BITS = {tag: 1 << i for i, tag in enumerate(DIETARY_TAG_VOCABULARY)}
+
+# Only these tags describe whether an ingredient or dish may be eaten at all; tags such
+# as high-protein or low-calorie describe nutrition and never exclude anything.
+RESTRICTION_TAGS = ['vegetarian', 'vegan', 'gluten-free', 'dairy-free', 'nut-free', 'pescatarian']
+
+# Fixed allergen vocabulary, encoded the same way as dietary tags in `allergen_mask`.
+# Each allergen lists the ingredient words that contain it and patterns for phrases
+# that look like a hit but are not (coconut milk is not dairy).
+ALLERGENS = {
+    'dairy': (
+        ['milk', 'cheese', 'butter', 'cream', 'yogurt', 'yoghurt', 'ghee', 'whey', 'casein', 'buttermilk',
+         'mozzarella', 'parmesan', 'cheddar', 'feta', 'ricotta', 'mascarpone', 'gruyere', 'brie', 'paneer',
+         'halloumi', 'pecorino', 'provolone', 'gorgonzola', 'creme fraiche', 'half-and-half'],
+        ['coconut milk', 'coconut cream', 'almond milk', 'soy milk', 'oat milk', 'rice milk', 'cashew milk',
+         'peanut butter', 'almond butter', 'cashew butter', 'sunflower seed butter', 'cocoa butter',
+         r'vegan \w+', 'cashew cheese', 'cashew cream', 'coconut yogurt', 'soy yogurt', 'cream of tartar'],
+    ),
+    'eggs': (['egg', 'eggs', 'mayonnaise', 'meringue', 'aioli'], [r'vegan \w+', r'(?:flax|chia) eggs?']),
+    'peanuts': (['peanut', 'peanuts'], []),
+    'tree-nuts': (
+        ['almond', 'almonds', 'cashew', 'cashews', 'walnut', 'walnuts', 'pecan', 'pecans', 'pistachio',
+         'pistachios', 'hazelnut', 'hazelnuts', 'macadamia', 'pine nuts', 'brazil nuts', 'nutella'],
+        [],
+    ),
+    'shellfish': (
+        ['shrimp', 'prawn', 'prawns', 'crab', 'lobster', 'scallop', 'scallops', 'clam', 'clams', 'mussel',
+         'mussels', 'oyster', 'oysters', 'crawfish', 'langoustine', 'oyster sauce'],
+        ['oyster mushrooms', 'imitation crab'],
+    ),
+    'fish': (
+        ['fish', 'salmon', 'tuna', 'cod', 'tilapia', 'halibut', 'trout', 'anchovy', 'anchovies', 'sardine',
+         'sardines', 'mackerel', 'haddock', 'bass', 'snapper', 'swordfish', 'fish sauce', 'dashi'],
+        ['vegan fish sauce'],
+    ),
+    'soy': (['soy', 'soya', 'tofu', 'tempeh', 'edamame', 'miso', 'tamari'], []),
+    'gluten': (
+        ['flour', 'wheat', 'bread', 'pasta', 'spaghetti', 'linguine', 'fettuccine', 'penne', 'noodles',
+         'couscous', 'bulgur', 'barley', 'rye', 'seitan', 'croutons', 'panko', 'crumbs', 'tortillas',
+         'pita', 'naan', 'dough', 'crackers', 'soy sauce', 'beer', 'semolina', 'farro', 'spelt'],
+        ['rice noodles', 'glass noodles', 'rice flour', 'almond flour', 'coconut flour', r'gluten-free.*',
+         'corn tortillas', 'buckwheat noodles', 'rice paper', 'chickpea flour', 'tapioca flour'],
+    ),
+    'sesame': (['sesame', 'tahini'], []),
+}
+ALLERGEN_VOCABULARY = list(ALLERGENS)
+ALLERGEN_BITS = {allergen: 1 << i for i, allergen in enumerate(ALLERGEN_VOCABULARY)}
+
+# Free-text allergy names users enter, mapped onto the allergen vocabulary
+ALLERGY_ALIASES = {
+    'dairy': 'dairy', 'milk': 'dairy', 'lactose': 'dairy', 'cheese': 'dairy',
+    'egg': 'eggs', 'eggs': 'eggs',
+    'peanut': 'peanuts', 'peanuts': 'peanuts',
+    'nut': 'tree-nuts', 'nuts': 'tree-nuts', 'tree nut': 'tree-nuts', 'tree nuts': 'tree-nuts', 'tree-nuts': 'tree-nuts',
+    'shellfish': 'shellfish', 'crustacean': 'shellfish', 'crustaceans': 'shellfish', 'shrimp': 'shellfish',
+    'fish': 'fish', 'seafood': 'fish',
+    'soy': 'soy', 'soya': 'soy', 'soybean': 'soy', 'soybeans': 'soy',
+    'gluten': 'gluten', 'wheat': 'gluten', 'celiac': 'gluten', 'coeliac': 'gluten',
+    'sesame': 'sesame',
+}
+
+_ALLERGEN_PATTERNS = {
+    allergen: (
+        re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\b'),
+        re.compile(r'\b(?:' + '|'.join(exclusions) + r')\b') if exclusions else None,
+    )
+    for allergen, (words, exclusions) in ALLERGENS.items()
+}
+
+# Fields of a recipe document that derived indexes are computed from
+INDEX_PROJECTION = {"_id": 0, "id": 1, "ingredients": 1, "cuisine": 1, "dietary_tags": 1, "match_features": 1}
+
+# Fields needed to score a recipe in /find. Ingredients are only used when the stored
+# features are stale and have to be recomputed.
+SCORING_PROJECTION = {
+    "_id": 0, "id": 1, "ingredients": 1, "cuisine": 1, "dietary_tags": 1,
+    "match_features.version": 1, "match_features.ingredient_tokens": 1, "match_features.dietary_mask": 1,
+    "match_features.allergen_mask": 1, "match_features.cuisine_id": 1,
+}
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_ingredient(ingredient: str) -> str:
+    """Normalize an ingredient string for matching"""
+    return _WHITESPACE_RE.sub(' ', ingredient.lower().strip())
+
+
+def ingredient_id(normalized_ingredient: str) -> int:
+    """Stable numeric id for a normalized ingredient"""
+    return zlib.crc32(normalized_ingredient.encode('utf-8'))
+
+
+def dietary_mask(dietary_tags: List[str]) -> int:
+    """Encode dietary tags as a bitmask over DIETARY_TAG_VOCABULARY (unknown tags are ignored)"""
+    mask = 0
+    for tag in dietary_tags:
+        mask |= DIETARY_TAG_BITS.get(normalize_ingredient(tag), 0)
+    return mask
+
+
+RESTRICTION_MASK = dietary_mask(RESTRICTION_TAGS)
+
+
+def allergen_mask(ingredient_tokens: List[str]) -> int:
+    """Bitmask over ALLERGEN_VOCABULARY of the allergens found in a recipe's ingredients"""
+    mask = 0
+    for allergen, (pattern, exclusions) in _ALLERGEN_PATTERNS.items():
+        for token in ingredient_tokens:
+            if exclusions is not None:
+                token = exclusions.sub(' ', token)
+            if pattern.search(token):
+                mask |= ALLERGEN_BITS[allergen]
+                break
+    return mask
+
+
+def cuisine_id(cuisine: str) -> int:
+    """Stable numeric id for a cuisine name (0 for none)"""
+    normalized = normalize_ingredient(cuisine or '')
+    return zlib.crc32(normalized.encode('utf-8')) if normalized else 0
+
+
+def compute_match_features(recipe: Dict) -> Dict:
+    """Compute the derived match features stored alongside a recipe document"""
+    # Quantities are parsed once here so that scaling never has to re-parse text,
+    # and matching only looks at the item, not at "2 cups" or ", chopped".
+    quantities = parse_ingredients(recipe.get('ingredients', []))
+    tokens = [normalize_ingredient(q['item']) for q in quantities]
+    tokens = [token for token in tokens if token]
+    return {
+        'version': FEATURES_VERSION,
+        'ingredient_tokens': tokens,
+        'quantities': quantities,
+        'ingredient_ids': sorted({ingredient_id(token) for token in tokens}),
+        'dietary_mask': dietary_mask(recipe.get('dietary_tags', [])),
+        'allergen_mask': allergen_mask(tokens),
+        'cuisine_id': cuisine_id(recipe.get('cuisine', '')),
+    }
+
+
+def with_match_features(doc: Dict) -> Dict:
+    """Attach freshly computed match features to a recipe document before it is written"""
+    doc['match_features'] = compute_match_features(doc)
+    return doc
+
+
+def get_match_features(recipe: Dict) -> Dict:
+    """Return the stored features of a recipe, recomputing them only if missing or stale"""
+    features: Optional[Dict] = recipe.get('match_features')
+    if features and features.get('version') == FEATURES_VERSION:
+        return features
+    return compute_match_features(recipe)
+
+
+def is_stale(recipe: Dict) -> bool:
+    """Whether a stored recipe document needs its match features (re)written"""
+    features = recipe.get('match_features')
+    return not features or features.get('version') != FEATURES_VERSION
+
+
+def catalog_cutoff() -> str:
+    """Insertion cutoff for a catalog scan that is about to start, as an ObjectId hex string.
+
+    Every recipe inserted once the scan has started, whatever its created_at, has an
+    _id at or above the cutoff, so an index built from the scan catches up with
+    `{"_id": {"$gte": ObjectId(cutoff)}}`. Recipes just before the cutoff are
+    fetched again and have to be skipped by id.
+    """
+    return str(ObjectId.from_datetime(datetime.now(timezone.utc) - CATALOG_CUTOFF_MARGIN))
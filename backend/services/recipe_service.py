@@ -1,4 +1,7 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+import numpy as np
+from services.recipe_features import DIETARY_TAG_BITS, dietary_mask, normalize_ingredient
+from services.substitution_service import get_substitution_engine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,72 +10,137 @@ class RecipeMatchingService:
     @staticmethod
     def calculate_match_score(recipe_ingredients: List[str], available_ingredients: List[str]) -> float:
         """Calculate how well a recipe matches available ingredients"""
-        if not recipe_ingredients:
-            return 0.0
-        
         # Normalize ingredient names for better matching
-        available_normalized = [ing.lower().strip() for ing in available_ingredients]
+        return RecipeMatchingService.calculate_normalized_match_score(
+            [normalize_ingredient(ing) for ing in recipe_ingredients],
+            [normalize_ingredient(ing) for ing in available_ingredients]
+        )
+    
+    @staticmethod
+    def calculate_normalized_match_score(recipe_tokens: List[str], available_normalized: List[str]) -> float:
+        """Calculate the match score from already normalized ingredient tokens"""
+        if not recipe_tokens:
+            return 0.0
         
         matches = 0
-        for recipe_ing in recipe_ingredients:
-            recipe_ing_normalized = recipe_ing.lower().strip()
+        for recipe_ing_normalized in recipe_tokens:
             # Check if any available ingredient is mentioned in the recipe ingredient
             for avail_ing in available_normalized:
                 if avail_ing in recipe_ing_normalized or recipe_ing_normalized in avail_ing:
                     matches += 1
                     break
         
-        score = (matches / len(recipe_ingredients)) * 100
+        score = (matches / len(recipe_tokens)) * 100
         return round(score, 2)
     
+    @staticmethod
+    def calculate_match_score_at_least(
+        recipe_tokens: List[str],
+        available_normalized: List[str],
+        min_score: float
+    ) -> Optional[float]:
+        """Match score of a recipe, or None once it can no longer reach `min_score`.
+
+        The best still reachable score assumes every remaining ingredient matches, so
+        scanning stops at the miss that pushes it below the threshold.
+        """
+        total = len(recipe_tokens)
+        if not total:
+            return 0.0 if min_score <= 0 else None
+        
+        matches = 0
+        for position, recipe_ing_normalized in enumerate(recipe_tokens):
+            if any(avail_ing in recipe_ing_normalized or recipe_ing_normalized in avail_ing
+                   for avail_ing in available_normalized):
+                matches += 1
+            elif round((matches + total - position - 1) / total * 100, 2) < min_score:
+                return None
+        
+        score = round((matches / total) * 100, 2)
+        return score if score >= min_score else None
+    
+    @staticmethod
+    def dietary_keep_mask(
+        recipe_masks: np.ndarray,
+        dietary_tags: List[str],
+        match: str = 'all',
+        recipe_tags: Optional[List[List[str]]] = None
+    ) -> np.ndarray:
+        """Boolean array of the recipes whose dietary bitmask satisfies the requested tags.
+
+        With match='all' a recipe needs every requested tag, with 'any' at least one.
+        Tags outside DIETARY_TAG_VOCABULARY have no bit and are checked against
+        `recipe_tags` (the raw tag lists) instead.
+        """
+        requested = dietary_mask(dietary_tags)
+        unknown = {normalize_ingredient(tag) for tag in dietary_tags} - set(DIETARY_TAG_BITS)
+        if match == 'all':
+            keep = (recipe_masks & requested) == requested
+        else:
+            keep = (recipe_masks & requested) != 0
+        
+        if unknown and recipe_tags is not None:
+            for row, tags in enumerate(recipe_tags):
+                if match == 'all' and not keep[row]:
+                    continue
+                if match == 'any' and keep[row]:
+                    continue
+                normalized = {normalize_ingredient(tag) for tag in tags}
+                keep[row] = unknown <= normalized if match == 'all' else bool(unknown & normalized)
+        elif unknown and match == 'all':
+            keep[:] = False
+        return keep
+    
     @staticmethod
     def filter_recipes_by_criteria(
         recipes: List[Dict], 
         difficulty: str = None,
         max_cooking_time: int = None,
         dietary_tags: List[str] = None,
-        min_match_score: float = 0
+        min_match_score: float = 0,
+        dietary_match: str = 'all',
+        dietary_masks: Optional[List[int]] = None
     ) -> List[Dict]:
-        """Filter recipes based on various criteria"""
+        """Filter recipes based on various criteria.
+
+        `dietary_masks` are the recipes' stored dietary bitmasks; when omitted they are
+        computed from each recipe's tags.
+        """
         filtered = recipes
         
+        if dietary_tags:
+            if dietary_masks is None:
+                dietary_masks = [dietary_mask(r.get('dietary_tags', [])) for r in filtered]
+            # Raw tag lists are only needed for tags the vocabulary does not cover
+            has_unknown = any(normalize_ingredient(tag) not in DIETARY_TAG_BITS for tag in dietary_tags)
+            keep = RecipeMatchingService.dietary_keep_mask(
+                np.fromiter(dietary_masks, dtype=np.int64, count=len(filtered)),
+                dietary_tags,
+                match=dietary_match,
+                recipe_tags=[r.get('dietary_tags', []) for r in filtered] if has_unknown else None
+            )
+            filtered = [r for r, kept in zip(filtered, keep) if kept]
+        
         if difficulty:
             filtered = [r for r in filtered if r.get('difficulty', '').lower() == difficulty.lower()]
         
         if max_cooking_time:
             filtered = [r for r in filtered if r.get('cooking_time', 999) <= max_cooking_time]
         
-        if dietary_tags:
-            dietary_tags_lower = [tag.lower() for tag in dietary_tags]
-            filtered = [
-                r for r in filtered 
-                if any(tag.lower() in dietary_tags_lower for tag in r.get('dietary_tags', []))
-            ]
-        
         if min_match_score > 0:
             filtered = [r for r in filtered if r.get('match_score', 0) >= min_match_score]
         
         return filtered
     
     @staticmethod
-    def suggest_substitutions(missing_ingredients: List[str]) -> Dict[str, List[str]]:
+    def find_missing_ingredients(recipe_tokens: List[str], available_normalized: List[str]) -> List[str]:
+        """Return the recipe ingredients not covered by any available ingredient"""
+        return [
+            recipe_ing for recipe_ing in recipe_tokens
+            if not any(avail_ing in recipe_ing or recipe_ing in avail_ing for avail_ing in available_normalized)
+        ]
+    
+    @staticmethod
+    def suggest_substitutions(missing_ingredients: List[str], dietary_tags: List[str] = None) -> Dict[str, List[str]]:
         """Suggest substitutions for missing ingredients"""
-        substitution_map = {
-            'butter': ['margarine', 'coconut oil', 'olive oil'],
-            'milk': ['almond milk', 'soy milk', 'coconut milk', 'oat milk'],
-            'egg': ['flax egg', 'chia egg', 'applesauce', 'banana'],
-            'flour': ['almond flour', 'coconut flour', 'rice flour'],
-            'sugar': ['honey', 'maple syrup', 'agave nectar', 'stevia'],
-            'cream': ['coconut cream', 'cashew cream', 'greek yogurt'],
-            'cheese': ['nutritional yeast', 'cashew cheese', 'tofu'],
-        }
-        
-        suggestions = {}
-        for ingredient in missing_ingredients:
-            ingredient_lower = ingredient.lower()
-            for key, subs in substitution_map.items():
-                if key in ingredient_lower:
-                    suggestions[ingredient] = subs
-                    break
-        
-        return suggestions
\ No newline at end of file
+        return get_substitution_engine().suggest(missing_ingredients, dietary_tags)
\ No newline at end of file
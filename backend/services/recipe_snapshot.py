@@ -0,0 +1,357 @@
+from typing import List, Dict, Optional, Tuple
+from bisect import bisect_left
+from pathlib import Path
+import json
+import mmap
+import os
+import struct
+import time
+import logging
+
+import numpy as np
+from bson import ObjectId
+
+from services.recipe_features import FEATURES_VERSION, get_match_features, normalize_ingredient
+from services.recipe_service import RecipeMatchingService
+from services.recipe_facets import FacetCounts
+
+logger = logging.getLogger(__name__)
+
+# Offline-built snapshot (see scripts/build_recipe_snapshot.py); when it is missing
+# /find streams the whole catalog from the database instead.
+RECIPE_SNAPSHOT_PATH = Path(os.environ.get(
+    'RECIPE_SNAPSHOT_PATH', Path(__file__).parent.parent / 'data' / 'recipe_snapshot.bin'
+))
+
+# Bump whenever the file layout changes; files with another version are ignored
+SNAPSHOT_FORMAT_VERSION = 3
+
+# How often (in seconds) a worker checks whether the snapshot file was replaced
+SNAPSHOT_CHECK_INTERVAL = 5.0
+
+_MAGIC = b'RCPSNAP\0'
+_PREAMBLE = struct.Struct('<8sII')  # magic, format version, header length
+_ALIGNMENT = 64
+
+# Cooking time stored for recipes without one, so that no time limit ever matches them
+_NO_COOKING_TIME = np.iinfo(np.int32).max
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _string_table(strings: List[str], separator: bytes = b'') -> Tuple[bytes, np.ndarray]:
+    """Concatenate strings into one blob plus the offsets at which each one starts"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) + len(separator) for e in encoded], out=offsets[1:])
+    return b''.join(e + separator for e in encoded), offsets
+
+
+class _Vocabulary:
+    """Sequence view over the sorted token blob, so that `bisect` can search it in place"""
+
+    def __init__(self, buffer: mmap.mmap, start: int, offsets: np.ndarray):
+        self._buffer = buffer
+        self._start = start
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, token_id: int) -> str:
+        start = self._start + int(self._offsets[token_id])
+        end = self._start + int(self._offsets[token_id + 1]) - 1  # drop the newline
+        return self._buffer[start:end].decode('utf-8')
+
+
+class RecipeSnapshot:
+    """Read-only, memory-mapped matching data for the whole catalog.
+
+    The file holds a small JSON header followed by aligned arrays that are used in
+    place through the mapping, so every worker process shares one page-cache copy:
+
+    - vocabulary/vocab_offsets: sorted ingredient tokens, each followed by a newline
+    - token_ptr/posting_rows: CSR postings, one row entry per token occurrence
+    - doc_ptr/doc_tokens: CSR token ids of every recipe, in ingredient order
+    - dietary_masks, allergen_masks, cuisine_ids, cooking_times, difficulty_ids
+    - id_blob/id_offsets: the recipe ids
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            stat = os.fstat(f.fileno())
+        self.file_key = (stat.st_ino, stat.st_mtime_ns)
+
+        magic, format_version, header_length = _PREAMBLE.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or format_version != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a version {SNAPSHOT_FORMAT_VERSION} recipe snapshot")
+        header = json.loads(self._buffer[_PREAMBLE.size:_PREAMBLE.size + header_length])
+        self.features_version: int = header['features_version']
+        # Recipes inserted from this ObjectId on may be missing (see catalog_cutoff)
+        self.cutoff_id: str = header['cutoff_id']
+        # The recipes of the snapshot inserted from the cutoff on, the only ones the
+        # catch-up query for the missing recipes can return again
+        self._recent_ids = frozenset(header['recent_ids'])
+        self.difficulties: List[str] = header['difficulties']
+        # Normalized cuisine name of each cuisine id, for facet counts
+        self.cuisines: Dict[int, str] = {int(key): name for key, name in header.get('cuisines', {}).items()}
+
+        data_start = _align(_PREAMBLE.size + header_length)
+        sections = {
+            name: np.frombuffer(self._buffer, dtype=dtype, count=count, offset=data_start + offset)
+            for name, (dtype, offset, count) in header['sections'].items()
+        }
+        self._vocabulary_start = data_start + header['sections']['vocabulary'][1]
+        self._vocabulary_end = self._vocabulary_start + header['sections']['vocabulary'][2]
+        self._vocab_offsets = sections['vocab_offsets']
+        self._vocabulary = _Vocabulary(self._buffer, self._vocabulary_start, self._vocab_offsets)
+        self._token_ptr = sections['token_ptr']
+        self._posting_rows = sections['posting_rows']
+        self._doc_ptr = sections['doc_ptr']
+        self._doc_tokens = sections['doc_tokens']
+        self._id_blob = sections['id_blob']
+        self._id_offsets = sections['id_offsets']
+        self.dietary_masks = sections['dietary_masks']
+        self.allergen_masks = sections['allergen_masks']
+        self.cuisine_ids = sections['cuisine_ids']
+        self.cooking_times = sections['cooking_times']
+        self.difficulty_ids = sections['difficulty_ids']
+        # Longest token in bytes, which bounds the substrings worth looking up
+        self._max_token_length = int(np.diff(self._vocab_offsets).max()) - 1 if len(self._vocab_offsets) > 1 else 0
+
+    def __len__(self) -> int:
+        return len(self._doc_ptr) - 1
+
+    def __contains__(self, recipe_id: str) -> bool:
+        """Whether a recipe inserted from the cutoff on is in the snapshot already"""
+        return recipe_id in self._recent_ids
+
+    def recipe_id(self, row: int) -> str:
+        return self._id_blob[self._id_offsets[row]:self._id_offsets[row + 1]].tobytes().decode('utf-8')
+
+    def ingredient_tokens(self, row: int) -> List[str]:
+        return [self._vocabulary[int(t)] for t in self._doc_tokens[self._doc_ptr[row]:self._doc_ptr[row + 1]]]
+
+    def tokens_containing(self, text: str) -> List[int]:
+        """Ids of the vocabulary tokens that contain `text`, found by scanning the token blob"""
+        needle = text.encode('utf-8')
+        positions = []
+        position = self._buffer.find(needle, self._vocabulary_start, self._vocabulary_end)
+        while position != -1:
+            positions.append(position - self._vocabulary_start)
+            position = self._buffer.find(needle, position + 1, self._vocabulary_end)
+        token_ids = np.searchsorted(self._vocab_offsets, positions, side='right') - 1
+        return np.unique(token_ids).tolist()
+
+    def tokens_within(self, text: str) -> List[int]:
+        """Ids of the vocabulary tokens that are substrings of `text`, by binary search.
+
+        Only substrings up to the longest token's length can be tokens, which keeps
+        the lookups linear in the length of `text`.
+        """
+        token_ids = []
+        longest = self._max_token_length
+        substrings = {text[i:j] for i in range(len(text)) for j in range(i + 1, min(i + longest, len(text)) + 1)}
+        for substring in substrings:
+            token_id = bisect_left(self._vocabulary, substring)
+            if token_id < len(self._vocabulary) and self._vocabulary[token_id] == substring:
+                token_ids.append(token_id)
+        return token_ids
+
+    def rows_with_tokens(self, token_ids: List[int]) -> np.ndarray:
+        """Row of every occurrence of the given tokens (a row repeats once per occurrence)"""
+        if not token_ids:
+            return np.zeros(0, dtype=np.int32)
+        return np.concatenate([self._posting_rows[self._token_ptr[t]:self._token_ptr[t + 1]] for t in token_ids])
+
+    def rank(
+        self,
+        available_normalized: List[str],
+        limit: int,
+        min_score: float,
+        difficulty: Optional[str] = None,
+        max_cooking_time: Optional[int] = None,
+        dietary_tags: Optional[List[str]] = None,
+        dietary_match: str = 'all',
+        profile=None,
+        facets: Optional[FacetCounts] = None
+    ) -> List[Tuple[float, int, str, float, List[str]]]:
+        """Best `limit` recipes of the snapshot as (rank, -row, id, match_score, tokens) entries.
+
+        Uses the same substring matching as RecipeMatchingService, but computes the
+        match counts of every recipe at once from the postings of the matched tokens.
+        The matched recipes are added to `facets` when given.
+        """
+        count = len(self)
+        keep = np.ones(count, dtype=bool)
+        boost = np.zeros(count)
+        difficulty_ok = np.ones(count, dtype=bool)
+        time_ok = np.ones(count, dtype=bool)
+        dietary_ok = np.ones(count, dtype=bool)
+        if difficulty:
+            wanted = [i for i, d in enumerate(self.difficulties) if d == normalize_ingredient(difficulty)]
+            difficulty_ok = np.isin(self.difficulty_ids, wanted)
+        if max_cooking_time:
+            time_ok = self.cooking_times <= max_cooking_time
+        if dietary_tags:
+            dietary_ok = RecipeMatchingService.dietary_keep_mask(self.dietary_masks, dietary_tags, match=dietary_match)
+        if profile:
+            profile_keep, boost = profile.apply_masks(self.allergen_masks, self.dietary_masks, self.cuisine_ids)
+            keep &= profile_keep
+            for allergy in profile.unknown_allergies:
+                keep[self.rows_with_tokens(self.tokens_containing(allergy))] = False
+
+        matched = set()
+        for available in available_normalized:
+            matched.update(self.tokens_containing(available))
+            matched.update(self.tokens_within(available))
+        matches = np.bincount(self.rows_with_tokens(sorted(matched)), minlength=count)
+        lengths = np.diff(self._doc_ptr)
+        scores = np.round(np.divide(matches * 100.0, lengths, out=np.zeros(count), where=lengths > 0), 2)
+        keep &= scores >= min_score
+        if facets is not None:
+            facets.add(
+                keep, difficulty_ok, time_ok, dietary_ok,
+                self.cuisine_ids, self.difficulty_ids, self.cooking_times, self.dietary_masks,
+                cuisine_names=self.cuisines, difficulty_names=self.difficulties
+            )
+        keep &= difficulty_ok & time_ok & dietary_ok
+
+        rows = np.flatnonzero(keep)
+        ranks = scores[rows] + boost[rows]
+        top = rows[np.lexsort((rows, -ranks))[:limit]]
+        entries = []
+        for row in top.tolist():
+            score = round((int(matches[row]) / int(lengths[row])) * 100, 2)
+            entries.append((score + float(boost[row]), -row, self.recipe_id(row), score, self.ingredient_tokens(row)))
+        return entries
+
+    @staticmethod
+    def write(path: Path, recipes: List[Dict], cutoff_id: str) -> int:
+        """Write a snapshot of the given recipes, replacing any previous file atomically.
+
+        `cutoff_id` is the catalog_cutoff taken before the recipes were read, and the
+        recipes carry their `_id` so that the ones inserted from it on are recorded.
+        """
+        cutoff = ObjectId(cutoff_id)
+        recent_ids = [
+            recipe['id'] for recipe in recipes
+            if isinstance(recipe.get('_id'), ObjectId) and recipe['_id'] >= cutoff
+        ]
+        features = [get_match_features(recipe) for recipe in recipes]
+        token_lists = [f['ingredient_tokens'] for f in features]
+        vocabulary = sorted({token for tokens in token_lists for token in tokens})
+        token_ids = {token: i for i, token in enumerate(vocabulary)}
+
+        doc_lengths = np.array([len(tokens) for tokens in token_lists], dtype=np.int64)
+        doc_ptr = np.zeros(len(recipes) + 1, dtype=np.int64)
+        np.cumsum(doc_lengths, out=doc_ptr[1:])
+        doc_tokens = np.fromiter(
+            (token_ids[token] for tokens in token_lists for token in tokens), dtype=np.int32, count=int(doc_ptr[-1])
+        )
+        rows = np.repeat(np.arange(len(recipes), dtype=np.int32), doc_lengths)
+        posting_rows = rows[np.argsort(doc_tokens, kind='stable')]
+        token_ptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_tokens, minlength=len(vocabulary)), out=token_ptr[1:])
+
+        difficulty_names = [normalize_ingredient(recipe.get('difficulty') or '') for recipe in recipes]
+        difficulties = sorted(set(difficulty_names))
+        difficulty_index = {name: i for i, name in enumerate(difficulties)}
+        vocabulary_blob, vocab_offsets = _string_table(vocabulary, separator=b'\n')
+        id_blob, id_offsets = _string_table([recipe['id'] for recipe in recipes])
+
+        arrays = {
+            'vocabulary': np.frombuffer(vocabulary_blob, dtype=np.uint8),
+            'vocab_offsets': vocab_offsets,
+            'token_ptr': token_ptr,
+            'posting_rows': posting_rows,
+            'doc_ptr': doc_ptr,
+            'doc_tokens': doc_tokens,
+            'id_blob': np.frombuffer(id_blob, dtype=np.uint8),
+            'id_offsets': id_offsets,
+            'dietary_masks': np.array([f['dietary_mask'] for f in features], dtype=np.int64),
+            'allergen_masks': np.array([f['allergen_mask'] for f in features], dtype=np.int64),
+            'cuisine_ids': np.array([f['cuisine_id'] for f in features], dtype=np.int64),
+            'cooking_times': np.array([
+                recipe['cooking_time'] if isinstance(recipe.get('cooking_time'), int) else _NO_COOKING_TIME
+                for recipe in recipes
+            ], dtype=np.int32),
+            'difficulty_ids': np.array([difficulty_index[name] for name in difficulty_names], dtype=np.int16),
+        }
+
+        sections = {}
+        offset = 0
+        for name, array in arrays.items():
+            offset = _align(offset)
+            sections[name] = [array.dtype.str, offset, len(array)]
+            offset += array.nbytes
+        header = json.dumps({
+            'features_version': FEATURES_VERSION,
+            # Recipes inserted from the cutoff on are streamed from the database
+            'cutoff_id': cutoff_id,
+            'recent_ids': recent_ids,
+            'difficulties': difficulties,
+            'cuisines': {
+                str(f['cuisine_id']): normalize_ingredient(recipe.get('cuisine') or '')
+                for f, recipe in zip(features, recipes) if f['cuisine_id']
+            },
+            'sections': sections,
+        }).encode('utf-8')
+
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(_PREAMBLE.pack(_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header)))
+            f.write(header)
+            data_start = _align(f.tell())
+            for name, array in arrays.items():
+                f.write(b'\0' * (data_start + sections[name][1] - f.tell()))
+                f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return len(recipes)
+
+
+_snapshot: Optional[RecipeSnapshot] = None
+_snapshot_file_key = None
+_snapshot_checked_at = float('-inf')
+
+
+def get_recipe_snapshot() -> Optional[RecipeSnapshot]:
+    """The current snapshot of this process, reopened once the file has been replaced.
+
+    The file is swapped with an atomic rename, so requests still holding the previous
+    snapshot keep a valid mapping of the old file until they finish.
+    """
+    global _snapshot, _snapshot_file_key, _snapshot_checked_at
+    now = time.monotonic()
+    if now - _snapshot_checked_at < SNAPSHOT_CHECK_INTERVAL:
+        return _snapshot
+    _snapshot_checked_at = now
+
+    try:
+        stat = os.stat(RECIPE_SNAPSHOT_PATH)
+    except FileNotFoundError:
+        _snapshot, _snapshot_file_key = None, None
+        return None
+    file_key = (stat.st_ino, stat.st_mtime_ns)
+    if file_key == _snapshot_file_key:
+        return _snapshot
+
+    _snapshot_file_key = file_key
+    try:
+        snapshot = RecipeSnapshot(RECIPE_SNAPSHOT_PATH)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error opening recipe snapshot: {str(e)}")
+        return _snapshot
+    if snapshot.features_version != FEATURES_VERSION:
+        logger.warning(f"Ignoring recipe snapshot built with match features v{snapshot.features_version}")
+        _snapshot = None
+    else:
+        logger.info(f"Mapped recipe snapshot with {len(snapshot)} recipes")
+        _snapshot = snapshot
+    return _snapshot
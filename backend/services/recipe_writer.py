@@ -0,0 +1,155 @@
+from typing import List, Dict, Optional
+import asyncio
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# A batch is written once it reaches this many recipes, or FLUSH_INTERVAL seconds
+# after its first recipe was queued, whichever comes first
+WRITE_BATCH_SIZE = 100
+FLUSH_INTERVAL = 0.5
+
+# Generate requests wait for room in the queue once this many recipes are unwritten
+MAX_QUEUED = 1000
+
+WRITE_ATTEMPTS = 3
+DUPLICATE_KEY_ERROR = 11000
+
+# Queued by `close` behind the remaining recipes; the flush task writes what it holds and exits
+_CLOSE = object()
+
+
+class RecipeWriter:
+    """Write-behind queue that persists generated recipes in insert_many batches off the request path"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, batch_size: int = WRITE_BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, max_queued: int = MAX_QUEUED):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self._pending: Dict[str, Dict] = {}
+        # Generation key -> id of the queued recipe that answers it
+        self._pending_keys: Dict[str, str] = {}
+        # Values to add to array fields of queued recipes once they are written
+        self._links: Dict[str, Dict[str, List]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background flush task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, doc: Dict):
+        """Queue a recipe document for writing; it is readable through `get_pending` until written"""
+        self._pending[doc['id']] = doc
+        for key in doc.get('generation_keys', ()):
+            self._pending_keys[key] = doc['id']
+        await self._queue.put(doc)
+
+    @property
+    def queued(self) -> int:
+        """Recipes waiting in the queue for the next batch"""
+        return self._queue.qsize()
+
+    def get_pending(self, recipe_id: str) -> Optional[Dict]:
+        """A queued recipe that has not reached the database yet, without its match features"""
+        doc = self._pending.get(recipe_id)
+        if doc is None:
+            return None
+        return {key: value for key, value in doc.items() if key not in ('_id', 'match_features')}
+
+    def get_pending_by_key(self, key: str) -> Optional[Dict]:
+        """The queued recipe generated for, or linked to, a generation key"""
+        recipe_id = self._pending_keys.get(key)
+        return self.get_pending(recipe_id) if recipe_id is not None else None
+
+    def link(self, recipe_id: str, links: Dict) -> bool:
+        """Add each value of `links` to the array field it is keyed by, as $addToSet would,
+        once the queued recipe is written; False if the recipe is not queued"""
+        if recipe_id not in self._pending:
+            return False
+        if not links:
+            return True
+        if 'generation_keys' in links:
+            self._pending_keys[links['generation_keys']] = recipe_id
+        fields = self._links.setdefault(recipe_id, {})
+        for field, value in links.items():
+            if value not in fields.setdefault(field, []):
+                fields[field].append(value)
+        return True
+
+    async def close(self):
+        """Write everything still queued, without waiting for the flush interval, and stop"""
+        if self._task is None:
+            return
+        await self._queue.put(_CLOSE)
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            doc = await self._queue.get()
+            if doc is _CLOSE:
+                break
+            batch = [doc]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    doc = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if doc is _CLOSE:
+                    closing = True
+                    break
+                batch.append(doc)
+            links = {}
+            try:
+                await self._flush(batch)
+            finally:
+                # Once popped, links go straight to the database, so none arrive after these are taken
+                for doc in batch:
+                    self._pending.pop(doc['id'], None)
+                    if doc['id'] in self._links:
+                        links[doc['id']] = self._links.pop(doc['id'])
+                    for key in [*doc.get('generation_keys', ()), *links.get(doc['id'], {}).get('generation_keys', ())]:
+                        if self._pending_keys.get(key) == doc['id']:
+                            del self._pending_keys[key]
+                    self._queue.task_done()
+            if links:
+                await self._write_links(links)
+
+    async def _write_links(self, links: Dict[str, Dict[str, List]]):
+        try:
+            await self.db.recipes.bulk_write([
+                UpdateOne({"id": recipe_id}, {"$addToSet": {field: {"$each": values} for field, values in fields.items()}})
+                for recipe_id, fields in links.items()
+            ], ordered=False)
+        except Exception as e:
+            logger.error(f"Error linking generated recipes to {list(links)}: {str(e)}")
+
+    async def _flush(self, batch: List[Dict]):
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                await self.db.recipes.insert_many(batch, ordered=False)
+                return
+            except BulkWriteError as e:
+                # Recipes written by an earlier, partially failed attempt
+                if all(error['code'] == DUPLICATE_KEY_ERROR for error in e.details.get('writeErrors', [])):
+                    return
+                logger.error(f"Error writing generated recipes (attempt {attempt}): {str(e)}")
+            except Exception as e:
+                logger.error(f"Error writing generated recipes (attempt {attempt}): {str(e)}")
+            if attempt < WRITE_ATTEMPTS:
+                await asyncio.sleep(attempt * self.flush_interval)
+        logger.error(f"Dropped {len(batch)} generated recipes after {WRITE_ATTEMPTS} failed writes: "
+                     f"{[doc['id'] for doc in batch]}")
@@ -0,0 +1,111 @@
+from typing import Optional
+from pathlib import Path
+import asyncio
+import cProfile
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Off unless PROFILE_REQUESTS is set; the middleware is then not installed at all
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', 'false').lower() in ('1', 'true', 'yes', 'on')
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', Path(__file__).parent.parent / 'profiles'))
+# Fraction of requests profiled without being asked for
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+# A request carrying PROFILE_HEADER with this value is always profiled; with no
+# token configured the header is ignored, so clients cannot profile at will
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_HEADER = b'x-profile-token'
+REQUEST_ID_HEADER = b'x-request-id'
+
+_SLUG_RE = re.compile(r'[^A-Za-z0-9]+')
+
+
+class RequestProfilerMiddleware:
+    """ASGI middleware running sampled or explicitly requested requests under cProfile.
+
+    Each profile is written to PROFILE_DIR as `<time>_<method>_<route>_<id>.prof`
+    (load it with pstats or snakeviz), next to a .json file with the route, status,
+    duration and correlation id. The id is the request's X-Request-ID, or a new one,
+    and is returned in the X-Profile-Id response header.
+
+    cProfile follows the event loop thread, so other requests that run while a
+    profiled one awaits show up in its profile too; only one request is profiled
+    at a time.
+    """
+
+    def __init__(self, app, profile_dir: Path = PROFILE_DIR, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 token: str = PROFILE_TOKEN):
+        self.app = app
+        self.profile_dir = Path(profile_dir)
+        self.sample_rate = sample_rate
+        self.token = token.encode() if token else b''
+        self._busy = threading.Lock()
+
+    def _should_profile(self, scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.token:
+            for name, value in scope['headers']:
+                if name == PROFILE_HEADER:
+                    return value == self.token
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._should_profile(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next(
+            (value.decode('latin-1') for name, value in scope['headers'] if name == REQUEST_ID_HEADER),
+            uuid.uuid4().hex,
+        )
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                message['headers'] = list(message.get('headers', [])) + [(b'x-profile-id', request_id.encode('latin-1'))]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+        finally:
+            self._busy.release()
+            duration_ms = (time.perf_counter() - started) * 1000
+            route = getattr(scope.get('route'), 'path', scope['path'])
+            try:
+                await asyncio.to_thread(self._write, profiler, request_id, scope['method'], route,
+                                        status['code'], duration_ms)
+            except Exception as e:
+                logger.error(f"Error writing request profile {request_id}: {str(e)}")
+
+    def _write(self, profiler: cProfile.Profile, request_id: str, method: str, route: str,
+               status: int, duration_ms: float) -> Optional[Path]:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        slug = _SLUG_RE.sub('-', route).strip('-') or 'root'
+        stem = f"{time.strftime('%Y%m%dT%H%M%S')}_{method}_{slug}_{_SLUG_RE.sub('', request_id)[:36]}"
+        path = self.profile_dir / f"{stem}.prof"
+        profiler.dump_stats(path)
+        (self.profile_dir / f"{stem}.json").write_text(json.dumps({
+            "request_id": request_id,
+            "method": method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "profile": path.name,
+        }))
+        logger.info(f"Profiled {method} {route} ({duration_ms:.0f} ms) -> {path}")
+        return path
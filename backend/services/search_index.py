@@ -0,0 +1,183 @@
+from typing import List, Dict, Tuple
+from collections import Counter
+import math
+import re
+
+import numpy as np
+
+# Fields a recipe is searched by
+SEARCH_PROJECTION = {"_id": 0, "id": 1, "name": 1, "cuisine": 1, "instructions": 1}
+
+# A word counts this many times in a recipe's term frequency per field it appears in
+FIELD_WEIGHTS = {
+    'name': 3,
+    'cuisine': 2,
+    'instructions': 1,
+}
+
+# Standard BM25 parameters: term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# How often (in seconds) searches pick up recipes written by other processes
+SEARCH_SYNC_INTERVAL = 30.0
+
+# Recently added recipes are kept in a small unmerged tail and folded into the
+# term-major arrays once the tail reaches this size.
+MERGE_THRESHOLD = 1024
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_SUFFIXES = ('ing', 'ed', 'es', 's')
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from if in into is it its of on or so that the them then they '
+    'this to until up while with you your'.split()
+)
+
+
+def search_terms(text: str) -> List[str]:
+    """Lowercased words of `text` without stopwords, with common English suffixes stripped.
+
+    The stemming is deliberately naive ("grilled" and "grilling" both become
+    "grill"); queries go through the same function, so they meet the same stems.
+    """
+    terms = []
+    for word in _WORD_RE.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        terms.append(word)
+    return terms
+
+
+def recipe_terms(recipe: Dict) -> Counter:
+    """Field-weighted term frequencies of a recipe"""
+    frequencies: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = recipe.get(field) or ''
+        text = ' '.join(value) if isinstance(value, list) else str(value)
+        for term in search_terms(text):
+            frequencies[term] += weight
+    return frequencies
+
+
+class SearchIndex:
+    """In-memory inverted index ranking recipes by BM25 over name, cuisine and instructions.
+
+    Postings are term-major CSR arrays: the rows of each term as int32 and their
+    weighted term frequencies as uint16, about six bytes per posting. Recipes added
+    since the last merge are held in a per-term tail, as in SimilarityIndex.
+    """
+
+    def __init__(self, cutoff_id: str = ''):
+        self.ids: List[str] = []
+        # Insertion cutoff (see catalog_cutoff) of the last scan, to catch up with
+        # recipes written elsewhere
+        self.cutoff_id = cutoff_id
+        self._rows: Dict[str, int] = {}
+        self._terms: Dict[str, int] = {}
+        self._document_frequency: List[int] = []
+        self._lengths = np.zeros(1024, dtype=np.float32)
+        self._total_length = 0.0
+        # Term-major CSR over the merged rows
+        self._merged_rows = 0
+        self._term_ptr = np.zeros(1, dtype=np.int64)
+        self._posting_rows = np.zeros(0, dtype=np.int32)
+        self._posting_frequencies = np.zeros(0, dtype=np.uint16)
+        # Postings of the rows added since the last merge, per term id
+        self._tail: Dict[int, List[Tuple[int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, recipe_id: str) -> bool:
+        return recipe_id in self._rows
+
+    @classmethod
+    def build(cls, recipes: List[Dict], cutoff_id: str = '') -> 'SearchIndex':
+        index = cls(cutoff_id)
+        for recipe in recipes:
+            index._append(recipe)
+        index._merge()
+        return index
+
+    def add(self, recipe: Dict):
+        """Add a single recipe incrementally"""
+        if recipe['id'] in self._rows:
+            return
+        self._append(recipe)
+        if len(self.ids) - self._merged_rows >= MERGE_THRESHOLD:
+            self._merge()
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Top (recipe id, BM25 score) matches of any of the query's words"""
+        count = len(self.ids)
+        term_ids = {self._terms[term] for term in search_terms(query) if term in self._terms}
+        if not term_ids or limit <= 0:
+            return []
+
+        lengths = self._lengths[:count]
+        average_length = self._total_length / count
+        scores = np.zeros(count, dtype=np.float32)
+        for term_id in term_ids:
+            document_frequency = self._document_frequency[term_id]
+            idf = math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+            if term_id + 1 < len(self._term_ptr):
+                start, end = self._term_ptr[term_id], self._term_ptr[term_id + 1]
+                rows = self._posting_rows[start:end]
+                frequencies = self._posting_frequencies[start:end].astype(np.float32)
+                scores[rows] += idf * frequencies * (BM25_K1 + 1) / (
+                    frequencies + BM25_K1 * (1 - BM25_B + BM25_B * lengths[rows] / average_length)
+                )
+            for row, frequency in self._tail.get(term_id, ()):
+                scores[row] += idf * frequency * (BM25_K1 + 1) / (
+                    frequency + BM25_K1 * (1 - BM25_B + BM25_B * lengths[row] / average_length)
+                )
+
+        limit = min(limit, count)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(self.ids[row], round(float(scores[row]), 4)) for row in top if scores[row] > 0]
+
+    def _append(self, recipe: Dict):
+        row = len(self.ids)
+        self._rows[recipe['id']] = row
+        self.ids.append(recipe['id'])
+        frequencies = recipe_terms(recipe)
+        if row == len(self._lengths):
+            self._lengths = np.concatenate([self._lengths, np.zeros(row, dtype=np.float32)])
+        self._lengths[row] = sum(frequencies.values())
+        self._total_length += float(self._lengths[row])
+        for term, frequency in frequencies.items():
+            term_id = self._terms.setdefault(term, len(self._terms))
+            if term_id == len(self._document_frequency):
+                self._document_frequency.append(0)
+            self._document_frequency[term_id] += 1
+            self._tail.setdefault(term_id, []).append((row, min(frequency, 0xFFFF)))
+
+    def _merge(self):
+        """Rebuild the term-major arrays so that every row is covered by them"""
+        if not self._tail:
+            self._merged_rows = len(self.ids)
+            return
+        tail_terms = np.fromiter(
+            (term_id for term_id, postings in self._tail.items() for _ in postings), dtype=np.int64
+        )
+        tail_rows = np.fromiter(
+            (row for postings in self._tail.values() for row, _ in postings), dtype=np.int32
+        )
+        tail_frequencies = np.fromiter(
+            (frequency for postings in self._tail.values() for _, frequency in postings), dtype=np.uint16
+        )
+        merged_terms = np.repeat(np.arange(len(self._term_ptr) - 1), np.diff(self._term_ptr))
+        terms = np.concatenate([merged_terms, tail_terms])
+        # Stable, so rows stay in ascending order within each term
+        order = np.argsort(terms, kind='stable')
+        self._posting_rows = np.concatenate([self._posting_rows, tail_rows])[order]
+        self._posting_frequencies = np.concatenate([self._posting_frequencies, tail_frequencies])[order]
+        self._term_ptr = np.zeros(len(self._terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self._terms)), out=self._term_ptr[1:])
+        self._tail = {}
+        self._merged_rows = len(self.ids)
@@ -0,0 +1,220 @@
+from typing import List, Dict, Optional, Tuple
+from pathlib import Path
+import os
+import re
+import zlib
+import logging
+
+import numpy as np
+
+from services.recipe_features import get_match_features, normalize_ingredient
+
+logger = logging.getLogger(__name__)
+
+# Offline-built index (see scripts/build_similarity_index.py); when it is missing
+# the index is built from the database on first use instead.
+SIMILARITY_INDEX_PATH = Path(os.environ.get(
+    'SIMILARITY_INDEX_PATH', Path(__file__).parent.parent / 'data' / 'similarity_index.npz'
+))
+
+# Features are hashed into a fixed space so that new vocabulary never forces a re-layout
+HASH_DIMENSIONS = 1 << 20
+
+# Relative weight of each feature family before IDF weighting
+FIELD_WEIGHTS = {
+    'ing': 1.0,
+    'word': 0.5,
+    'cuisine': 0.75,
+    'tag': 0.5,
+}
+
+# Recently added recipes are kept in a small unmerged tail and folded into the
+# feature-major arrays once the tail reaches this size.
+MERGE_THRESHOLD = 1024
+
+_WORD_RE = re.compile(r'[a-z]+')
+
+
+def recipe_features(recipe: Dict) -> Dict[int, float]:
+    """Hashed feature -> field weight for a recipe's ingredients, cuisine and tags"""
+    features: Dict[int, float] = {}
+
+    def add(field: str, value: str):
+        if value:
+            features[zlib.crc32(f"{field}:{value}".encode('utf-8')) % HASH_DIMENSIONS] = FIELD_WEIGHTS[field]
+
+    for token in get_match_features(recipe)['ingredient_tokens']:
+        add('ing', token)
+        for word in _WORD_RE.findall(token):
+            add('word', word)
+    add('cuisine', normalize_ingredient(recipe.get('cuisine') or ''))
+    for tag in recipe.get('dietary_tags', []):
+        add('tag', normalize_ingredient(tag))
+    return features
+
+
+class SimilarityIndex:
+    """TF-IDF cosine similarity over hashed recipe features stored as compact CSR arrays"""
+
+    def __init__(self, cutoff_id: str = ''):
+        self.ids: List[str] = []
+        # catalog_cutoff taken before the recipes were read; empty when unknown
+        self.cutoff_id = cutoff_id
+        self._rows: Dict[str, int] = {}
+        self._document_frequency = np.zeros(HASH_DIMENSIONS, dtype=np.int32)
+        # Doc-major CSR: the (normalized) vector of every recipe
+        self._doc_ptr: List[int] = [0]
+        self._doc_features: List[np.ndarray] = []
+        self._doc_weights: List[np.ndarray] = []
+        # Feature-major CSR over the merged rows, used to score a query against everything
+        self._merged_rows = 0
+        self._feature_ptr = np.zeros(HASH_DIMENSIONS + 1, dtype=np.int64)
+        self._posting_rows = np.zeros(0, dtype=np.int32)
+        self._posting_weights = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, recipe_id: str) -> bool:
+        return recipe_id in self._rows
+
+    @classmethod
+    def build(cls, recipes: List[Dict], cutoff_id: str = '') -> 'SimilarityIndex':
+        """Build an index with exact IDF weights over a full catalog"""
+        index = cls(cutoff_id)
+        raw = [recipe_features(recipe) for recipe in recipes]
+        for features in raw:
+            index._document_frequency[list(features)] += 1
+        total = len(raw)
+        for recipe, features in zip(recipes, raw):
+            index._append(recipe['id'], features, total)
+        index._merge()
+        return index
+
+    def add(self, recipe: Dict):
+        """Add a single recipe incrementally, weighting it with the current IDF"""
+        if recipe['id'] in self._rows:
+            return
+        features = recipe_features(recipe)
+        self._document_frequency[list(features)] += 1
+        self._append(recipe['id'], features, len(self.ids) + 1)
+        if len(self.ids) - self._merged_rows >= MERGE_THRESHOLD:
+            self._merge()
+
+    def vectorize(self, recipe: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """Vector of a recipe that is not (or not yet) part of the index"""
+        return self._weigh(recipe_features(recipe), len(self.ids) + 1)
+
+    def vector(self, recipe_id: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        row = self._rows.get(recipe_id)
+        if row is None:
+            return None
+        return self._doc_features[row], self._doc_weights[row]
+
+    def most_similar(self, vector: Tuple[np.ndarray, np.ndarray], k: int = 5,
+                     exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top-k (recipe id, cosine similarity) neighbours of a vector"""
+        features, weights = vector
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+
+        for feature, weight in zip(features, weights):
+            start, end = self._feature_ptr[feature], self._feature_ptr[feature + 1]
+            if start != end:
+                scores[self._posting_rows[start:end]] += weight * self._posting_weights[start:end]
+
+        # Rows in the unmerged tail are scored directly from their own vectors
+        query = dict(zip(features.tolist(), weights.tolist()))
+        for row in range(self._merged_rows, len(self.ids)):
+            row_features = self._doc_features[row].tolist()
+            row_weights = self._doc_weights[row].tolist()
+            scores[row] = sum(query.get(f, 0.0) * w for f, w in zip(row_features, row_weights))
+
+        if exclude is not None and exclude in self._rows:
+            scores[self._rows[exclude]] = 0.0
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.ids[row], round(float(scores[row]), 4)) for row in top if scores[row] > 0]
+
+    def save(self, path: Path):
+        """Write the index to an .npz file, replacing any previous file atomically"""
+        self._merge()
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                ids=np.array(self.ids, dtype=str),
+                cutoff_id=np.array(self.cutoff_id),
+                document_frequency=self._document_frequency,
+                doc_ptr=np.array(self._doc_ptr, dtype=np.int64),
+                doc_features=np.concatenate(self._doc_features) if self._doc_features else np.zeros(0, dtype=np.int32),
+                doc_weights=np.concatenate(self._doc_weights) if self._doc_weights else np.zeros(0, dtype=np.float32),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'SimilarityIndex':
+        """Load an index written by `save`"""
+        with np.load(path) as data:
+            index = cls()
+            index.ids = data['ids'].tolist()
+            # Files from before the cutoff was recorded catch up with the whole catalog
+            index.cutoff_id = str(data['cutoff_id']) if 'cutoff_id' in data.files else ''
+            index._rows = {recipe_id: row for row, recipe_id in enumerate(index.ids)}
+            index._document_frequency = data['document_frequency']
+            doc_ptr = data['doc_ptr']
+            doc_features = data['doc_features']
+            doc_weights = data['doc_weights']
+            index._doc_ptr = doc_ptr.tolist()
+            index._doc_features = np.split(doc_features, doc_ptr[1:-1])
+            index._doc_weights = np.split(doc_weights, doc_ptr[1:-1])
+        index._merge()
+        return index
+
+    def _weigh(self, features: Dict[int, float], total: int) -> Tuple[np.ndarray, np.ndarray]:
+        feature_ids = np.fromiter(features, dtype=np.int32, count=len(features))
+        field_weights = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+        idf = np.log((total + 1) / (self._document_frequency[feature_ids] + 1)) + 1
+        weights = (field_weights * idf).astype(np.float32)
+        norm = np.linalg.norm(weights)
+        if norm > 0:
+            weights /= norm
+        return feature_ids, weights
+
+    def _append(self, recipe_id: str, features: Dict[int, float], total: int):
+        feature_ids, weights = self._weigh(features, total)
+        self._rows[recipe_id] = len(self.ids)
+        self.ids.append(recipe_id)
+        self._doc_features.append(feature_ids)
+        self._doc_weights.append(weights)
+        self._doc_ptr.append(self._doc_ptr[-1] + len(feature_ids))
+
+    def _merge(self):
+        """Fold the rows added since the last merge into the feature-major arrays.
+
+        The first merge sorts every posting by feature. Later ones sort only the new
+        rows' postings and insert each at the end of its feature's segment, which is
+        linear in the size of the arrays, so an add() that triggers a merge never
+        re-sorts the whole catalog.
+        """
+        if self._merged_rows == len(self.ids):
+            return
+        new_rows = np.arange(self._merged_rows, len(self.ids), dtype=np.int32)
+        features = np.concatenate(self._doc_features[self._merged_rows:])
+        weights = np.concatenate(self._doc_weights[self._merged_rows:])
+        rows = np.repeat(new_rows, np.diff(self._doc_ptr[self._merged_rows:]))
+        order = np.argsort(features, kind='stable')
+        features, rows, weights = features[order], rows[order], weights[order]
+        if self._merged_rows == 0:
+            self._posting_rows = rows
+            self._posting_weights = weights
+        else:
+            # New rows come after every merged one, so rows stay ascending within a feature
+            positions = self._feature_ptr[features.astype(np.int64) + 1]
+            self._posting_rows = np.insert(self._posting_rows, positions, rows)
+            self._posting_weights = np.insert(self._posting_weights, positions, weights)
+        self._feature_ptr[1:] += np.cumsum(np.bincount(features, minlength=HASH_DIMENSIONS))
+        self._merged_rows = len(self.ids)
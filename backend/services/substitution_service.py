@@ -0,0 +1,131 @@
+from typing import List, Dict, Optional, Iterator, Tuple
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+import csv
+import logging
+
+from services.recipe_features import RESTRICTION_MASK, dietary_mask, normalize_ingredient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUBSTITUTIONS_PATH = Path(__file__).parent.parent / 'data' / 'substitutions.csv'
+
+
+class AhoCorasickAutomaton:
+    """Multi-pattern matcher that finds every pattern occurrence in one pass over the text"""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                node = next_node
+            self._outputs[node].append(index)
+
+        # Breadth-first construction of failure links; outputs are merged along them
+        # so that matching never has to walk the failure chain to report results.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, end, pattern_index) for every occurrence of every pattern"""
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for index in self._outputs[node]:
+                yield position + 1 - len(self.patterns[index]), position + 1, index
+
+
+class SubstitutionEngine:
+    """Substitution lookups over a data-driven table compiled into an Aho-Corasick automaton"""
+
+    def __init__(self, table: Dict[str, List[Tuple[str, int]]]):
+        self._ingredients = sorted(table)
+        self._substitutes = table
+        self._automaton = AhoCorasickAutomaton(self._ingredients)
+
+    @property
+    def ingredients(self) -> List[str]:
+        """Every ingredient the table has substitutions for"""
+        return self._ingredients
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_SUBSTITUTIONS_PATH) -> 'SubstitutionEngine':
+        """Load the substitution table (ingredient, substitute, diets) from a CSV file"""
+        table: Dict[str, List[Tuple[str, int]]] = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                diets = {normalize_ingredient(d) for d in row['diets'].split('|') if d.strip()}
+                # Vegan food is vegetarian, and vegetarian food is fine for pescatarians
+                if 'vegan' in diets:
+                    diets.add('vegetarian')
+                if 'vegetarian' in diets:
+                    diets.add('pescatarian')
+                table.setdefault(normalize_ingredient(row['ingredient']), []).append(
+                    (row['substitute'].strip(), dietary_mask(list(diets)))
+                )
+        logger.info(f"Loaded {sum(len(s) for s in table.values())} substitutions for {len(table)} ingredients")
+        return cls(table)
+
+    def lookup(self, ingredient: str) -> Optional[str]:
+        """Return the table ingredient that best describes the given ingredient line.
+
+        Only whole-word occurrences count ("egg" does not match "eggplant"); the longest
+        occurrence wins, and among equally long ones the last, which is usually the head noun.
+        """
+        text = normalize_ingredient(ingredient)
+        best = None
+        for start, end, index in self._automaton.iter_matches(text):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            if best is None or end - start >= best[1] - best[0]:
+                best = (start, end, index)
+        return self._ingredients[best[2]] if best else None
+
+    def substitutes_for(self, ingredient: str, dietary_tags: Optional[List[str]] = None) -> List[str]:
+        """Substitutes for one ingredient that satisfy every requested dietary restriction"""
+        match = self.lookup(ingredient)
+        if match is None:
+            return []
+        required = dietary_mask(dietary_tags or []) & RESTRICTION_MASK
+        return [name for name, mask in self._substitutes[match] if mask & required == required]
+
+    def suggest(self, missing_ingredients: List[str], dietary_tags: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Suggest substitutions for each missing ingredient that has any"""
+        suggestions = {}
+        for ingredient in missing_ingredients:
+            substitutes = self.substitutes_for(ingredient, dietary_tags)
+            if substitutes:
+                suggestions[ingredient] = substitutes
+        return suggestions
+
+
+@lru_cache(maxsize=1)
+def get_substitution_engine() -> SubstitutionEngine:
+    """Load and compile the default substitution table once per process"""
+    return SubstitutionEngine.load()
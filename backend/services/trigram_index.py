@@ -0,0 +1,108 @@
+from typing import List, Dict, Optional, Iterable, Tuple
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z][a-z'-]*")
+
+# Words shorter than this are too ambiguous to correct ("oil" vs "oat")
+MIN_CORRECTABLE_LENGTH = 4
+
+
+def word_form(word: str) -> str:
+    """Singular form of an English plural ("tomatoes" -> "tomato", "berries" -> "berry"),
+    so that a word and its plural compare equal. Words ending in -us, -ss or -is, and
+    -sses words such as "molasses", are taken as singular already."""
+    if word.endswith(('us', 'ss', 'is', 'sses')):
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'xes')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def trigrams(word: str) -> List[str]:
+    """Character trigrams of a word, padded so that prefixes and suffixes count too"""
+    padded = f"  {word} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+class TrigramIndex:
+    """Inverted index from character trigrams to vocabulary words for typo correction"""
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._words: List[str] = []
+        self._trigram_counts: List[int] = []
+        self._word_ids: Dict[str, int] = {}
+        # Singular form -> a vocabulary word with that form
+        self._forms: Dict[str, str] = {}
+        self._postings: Dict[str, List[int]] = {}
+        self.add_words(words)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._word_ids
+
+    def add_words(self, words: Iterable[str]):
+        """Add words to the vocabulary; already known words are ignored"""
+        for word in words:
+            if word in self._word_ids:
+                continue
+            word_id = len(self._words)
+            self._word_ids[word] = word_id
+            self._words.append(word)
+            self._forms.setdefault(word_form(word), word)
+            grams = trigrams(word)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(word_id)
+
+    def add_phrases(self, phrases: Iterable[str]):
+        """Add every word of the given (already normalized) ingredient phrases"""
+        self.add_words(word for phrase in phrases for word in _WORD_RE.findall(phrase))
+
+    def nearest(self, word: str, threshold: float = 0.5) -> Optional[Tuple[str, float]]:
+        """Closest vocabulary word by trigram Jaccard similarity, if any reaches the threshold.
+
+        Only words sharing at least one trigram with the query are ever looked at.
+        """
+        grams = trigrams(word)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for word_id in self._postings.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+
+        best = None
+        for word_id, count in shared.items():
+            similarity = count / (len(grams) + self._trigram_counts[word_id] - count)
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (self._words[word_id], similarity)
+        return best
+
+    def correct_phrase(self, phrase: str, threshold: float = 0.5) -> Tuple[str, Dict[str, str]]:
+        """Replace unknown words of a normalized phrase with their nearest vocabulary word.
+
+        The singular or plural of a known word is not unknown, and is left as written.
+        """
+        corrections = {}
+
+        def replace(match):
+            word = match.group(0)
+            if len(word) < MIN_CORRECTABLE_LENGTH or word in self._word_ids:
+                return word
+            # "tomato" for "tomatoes" or "onions" for "onion"
+            if word_form(word) in self._forms:
+                return word
+            nearest = self.nearest(word, threshold)
+            if nearest is None:
+                return word
+            corrections[word] = nearest[0]
+            return nearest[0]
+
+        return _WORD_RE.sub(replace, phrase), corrections
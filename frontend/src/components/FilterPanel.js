@@ -2,7 +2,7 @@ import React from "react";
 import { X } from "lucide-react";
 import { Button } from "@/components/ui/button";
 
-const FilterPanel = ({ filters, setFilters, onApply }) => {
+const FilterPanel = ({ filters, setFilters, facets, onApply }) => {
   const dietaryOptions = [
     "vegetarian",
     "vegan",
@@ -26,6 +26,9 @@ const FilterPanel = ({ filters, setFilters, onApply }) => {
     }
   };
 
+  // Recipes matching the ingredients with this choice instead, from the last search
+  const countLabel = (count) => (facets ? ` (${count || 0})` : "");
+
   const clearFilters = () => {
     setFilters({
       difficulty: "",
@@ -58,9 +61,9 @@ const FilterPanel = ({ filters, setFilters, onApply }) => {
             data-testid="difficulty-filter"
           >
             <option value="">Any</option>
-            <option value="easy">Easy</option>
-            <option value="medium">Medium</option>
-            <option value="hard">Hard</option>
+            <option value="easy">Easy{countLabel(facets?.difficulty.easy)}</option>
+            <option value="medium">Medium{countLabel(facets?.difficulty.medium)}</option>
+            <option value="hard">Hard{countLabel(facets?.difficulty.hard)}</option>
           </select>
         </div>
 
@@ -75,6 +78,19 @@ const FilterPanel = ({ filters, setFilters, onApply }) => {
             className="w-full px-4 py-2 border-2 border-gray-200 rounded-xl focus:border-orange-400 focus:outline-none"
             data-testid="cooking-time-filter"
           />
+          {facets && (
+            <div className="flex flex-wrap gap-2 mt-2" data-testid="cooking-time-facets">
+              {facets.cooking_time.filter(bucket => bucket.max_cooking_time <= 60).map((bucket) => (
+                <button
+                  key={bucket.max_cooking_time}
+                  onClick={() => setFilters({...filters, maxCookingTime: String(bucket.max_cooking_time)})}
+                  className="px-2 py-1 rounded-full text-xs font-medium bg-gray-100 text-gray-700 hover:bg-gray-200"
+                >
+                  ≤{bucket.max_cooking_time}m{countLabel(bucket.count)}
+                </button>
+              ))}
+            </div>
+          )}
         </div>
 
         {/* Dietary Preferences */}
@@ -92,7 +108,7 @@ const FilterPanel = ({ filters, setFilters, onApply }) => {
                 }`}
                 data-testid={`dietary-tag-${option}`}
               >
-                {option}
+                {option}{countLabel(facets?.dietary_tags[option])}
               </button>
             ))}
           </div>
@@ -14,6 +14,36 @@ const HomePage = () => {
   const [recognizedIngredients, setRecognizedIngredients] = useState([]);
   const [isUploading, setIsUploading] = useState(false);
   const [selectedImage, setSelectedImage] = useState(null);
+  const [suggestions, setSuggestions] = useState([]);
+
+  // Suggest catalog ingredients for the term being typed (after the last comma)
+  useEffect(() => {
+    const term = ingredientInput.split(',').pop().trim();
+    if (!term) {
+      setSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${API}/ingredients/suggest`, { params: { q: term, limit: 6 } });
+        if (!cancelled) {
+          setSuggestions(response.data.suggestions.filter(s => s !== term.toLowerCase()));
+        }
+      } catch (error) {
+        if (!cancelled) setSuggestions([]);
+      }
+    }, 150);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [ingredientInput]);
+
+  const applySuggestion = (suggestion) => {
+    const parts = ingredientInput.split(',').slice(0, -1).map(i => i.trim()).filter(i => i.length > 0);
+    setIngredientInput([...parts, suggestion].join(', ') + ', ');
+  };
 
   const handleImageUpload = async (e) => {
     const file = e.target.files[0];
@@ -172,6 +202,21 @@ const HomePage = () => {
                 data-testid="ingredient-text-input"
               />
               
+              {suggestions.length > 0 && (
+                <div className="flex flex-wrap gap-2 mb-4 -mt-2" data-testid="ingredient-suggestions">
+                  {suggestions.map((suggestion, index) => (
+                    <button
+                      key={suggestion}
+                      onClick={() => applySuggestion(suggestion)}
+                      className="px-3 py-1 text-sm bg-orange-50 text-orange-800 border border-orange-200 rounded-full hover:bg-orange-100 transition-all"
+                      data-testid={`ingredient-suggestion-${index}`}
+                    >
+                      {suggestion}
+                    </button>
+                  ))}
+                </div>
+              )}
+              
               <button 
                 onClick={handleTextInput} 
                 className="btn btn-primary w-full"
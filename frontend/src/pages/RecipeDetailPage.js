@@ -5,6 +5,7 @@ import { Button } from "@/components/ui/button";
 import { toast } from "sonner";
 import axios from "axios";
 import NutritionInfo from "../components/NutritionInfo";
+import RecipeCard from "../components/RecipeCard";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -17,9 +18,11 @@ const RecipeDetailPage = () => {
   const [saving, setSaving] = useState(false);
   const [rating, setRating] = useState(0);
   const [servingSize, setServingSize] = useState(4);
+  const [similarRecipes, setSimilarRecipes] = useState([]);
 
   useEffect(() => {
     fetchRecipe();
+    fetchSimilarRecipes();
   }, [id]);
 
   const fetchRecipe = async () => {
@@ -39,6 +42,18 @@ const RecipeDetailPage = () => {
     }
   };
 
+  const fetchSimilarRecipes = async () => {
+    try {
+      const response = await axios.get(`${API}/recipes/${id}/similar`, { params: { limit: 3 } });
+      if (response.data.success) {
+        setSimilarRecipes(response.data.recipes);
+      }
+    } catch (error) {
+      console.error("Error fetching similar recipes:", error);
+      setSimilarRecipes([]);
+    }
+  };
+
   const saveRecipe = async () => {
     if (rating === 0) {
       toast.error("Please rate the recipe before saving");
@@ -229,6 +244,18 @@ const RecipeDetailPage = () => {
             <NutritionInfo nutrition={recipe.nutrition} />
           </div>
         </div>
+
+        {/* Similar Recipes */}
+        {similarRecipes.length > 0 && (
+          <div className="mt-12" data-testid="similar-recipes">
+            <h3 className="text-2xl font-bold mb-6">More Like This</h3>
+            <div className="grid sm:grid-cols-2 lg:grid-cols-3 gap-6">
+              {similarRecipes.map((similar) => (
+                <RecipeCard key={similar.id} recipe={similar} />
+              ))}
+            </div>
+          </div>
+        )}
       </div>
     </div>
   );
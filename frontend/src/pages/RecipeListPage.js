@@ -24,6 +24,9 @@ const RecipeListPage = () => {
     dietaryTags: []
   });
   const [showFilters, setShowFilters] = useState(false);
+  // Each facet is counted with the other active filters applied, so the counts are
+  // requested again with every filter change
+  const [facets, setFacets] = useState(null);
 
   useEffect(() => {
     if (ingredients.length > 0) {
@@ -40,11 +43,13 @@ const RecipeListPage = () => {
         ingredients,
         difficulty: filters.difficulty || undefined,
         max_cooking_time: filters.maxCookingTime ? parseInt(filters.maxCookingTime) : undefined,
-        dietary_tags: filters.dietaryTags.length > 0 ? filters.dietaryTags : undefined
+        dietary_tags: filters.dietaryTags.length > 0 ? filters.dietaryTags : undefined,
+        facets: true
       });
 
       if (response.data.success) {
         setRecipes(response.data.recipes);
+        setFacets(response.data.facets || null);
         if (response.data.recipes.length === 0) {
           toast.info("No matching recipes found. Try generating a new one!");
         }
@@ -177,6 +182,7 @@ const RecipeListPage = () => {
             <FilterPanel 
               filters={filters}
               setFilters={setFilters}
+              facets={facets}
               onApply={applyFilters}
             />
           </div>
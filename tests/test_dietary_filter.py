@@ -0,0 +1,27 @@
+import numpy as np
+
+from services.recipe_features import dietary_mask
+from services.recipe_service import RecipeMatchingService
+
+RECIPE_TAGS = [["vegetarian", "gluten-free"], ["vegetarian"], ["vegan", "keto-ish"], []]
+RECIPE_MASKS = np.array([dietary_mask(tags) for tags in RECIPE_TAGS], dtype=np.int64)
+
+
+def keep(dietary_tags, match, recipe_tags=None):
+    return RecipeMatchingService.dietary_keep_mask(RECIPE_MASKS, dietary_tags, match, recipe_tags).tolist()
+
+
+def test_all_needs_every_tag_and_any_needs_one():
+    assert keep(["vegetarian", "gluten-free"], 'all') == [True, False, False, False]
+    assert keep(["vegan", "gluten-free"], 'any') == [True, False, True, False]
+
+
+def test_unknown_tags_are_checked_against_the_raw_tags():
+    assert keep(["keto-ish"], 'all', RECIPE_TAGS) == [False, False, True, False]
+    assert keep(["Vegan", "keto-ish"], 'all', RECIPE_TAGS) == [False, False, True, False]
+    assert keep(["gluten-free", "keto-ish"], 'any', RECIPE_TAGS) == [True, False, True, False]
+
+
+def test_unknown_tags_without_raw_tags_match_nothing_under_all():
+    assert keep(["keto-ish"], 'all') == [False, False, False, False]
+    assert keep(["vegan", "keto-ish"], 'any') == [False, False, True, False]
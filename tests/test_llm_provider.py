@@ -0,0 +1,12 @@
+import pytest
+
+from services.llm_provider import FakeLLMProvider, LLMProvider
+
+
+def test_provider_without_complete_cannot_be_created():
+    class Unfinished(LLMProvider):
+        pass
+
+    with pytest.raises(TypeError):
+        Unfinished()
+    assert isinstance(FakeLLMProvider(latency_median=0), LLMProvider)
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from services.nutrition_index import NutritionIndex
+from services.recipe_features import with_match_features
+
+
+def recipe(recipe_id: str, calories, protein: float, ingredients=("1 cup rice",)):
+    return with_match_features({
+        "id": recipe_id,
+        "name": recipe_id,
+        "ingredients": list(ingredients),
+        "nutrition": {"calories": calories, "protein": protein, "carbs": 40, "fat": 10, "fiber": 3},
+    })
+
+
+RECIPES = [
+    recipe("light", 250, 10, ["1 cup rice", "1 zucchini"]),
+    recipe("medium", 500, 30, ["1 cup rice", "1 lb chicken"]),
+    recipe("hearty", 800, 45, ["1 lb beef", "2 potatoes"]),
+    recipe("unknown", None, 20, ["1 lb chicken"]),
+]
+
+
+@pytest.fixture(params=["built", "incremental"])
+def index(request):
+    if request.param == "built":
+        return NutritionIndex.build(RECIPES)
+    index = NutritionIndex()
+    for item in RECIPES:
+        index.add(item)
+    return index
+
+
+def test_ranges_are_inclusive_and_ordered_by_calories(index):
+    assert [entry[0] for entry in index.search({"calories": (250, 500)})] == ["light", "medium"]
+    assert [entry[0] for entry in index.search({"protein": (20, None)})] == ["medium", "hearty", "unknown"]
+
+
+def test_nearest_recipes_come_first(index):
+    entries = index.search(target={"calories": 700, "protein": 40}, limit=2)
+    assert [recipe_id for recipe_id, _, _ in entries] == ["hearty", "medium"]
+    assert entries[0][1] < entries[1][1]
+
+
+def test_ingredient_matching_uses_the_substring_rule(index):
+    entries = index.search(available_normalized=["chicken", "rice"], min_score=50)
+    assert [(recipe_id, score) for recipe_id, _, score in entries] == [("medium", 100.0), ("unknown", 100.0), ("light", 50.0)]
+    # "potato" is within "potatoes", and "beef" contains "bee"
+    assert [entry[0] for entry in index.search(available_normalized=["potato", "bee"], min_score=100)] == ["hearty"]
+
+
+def test_catch_up_finds_recipes_imported_with_an_old_created_at():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from controllers.recipe_controller import RecipeController
+
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['nutrition_test']
+        await db.recipes.insert_one({**recipe("recent", 400, 20), "created_at": "2025-06-01T00:00:00+00:00"})
+        controller = RecipeController(db)
+        await controller.get_nutrition_index()
+
+        await db.recipes.insert_one({**recipe("imported", 900, 60), "created_at": "2019-01-01T00:00:00+00:00"})
+        controller._nutrition_index_synced = float('-inf')
+        index = await controller.get_nutrition_index()
+        assert [entry[0] for entry in index.search({"calories": (800, None)})] == ["imported"]
+
+    asyncio.run(run())
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from cachetools import TTLCache
+
+import services.preference_service as preference_service
+from controllers.user_controller import UserController
+from models.user_preference import UserPreferenceCreate
+from services.preference_service import FAVORITE_CUISINE_BOOST, PreferenceProfile, PreferenceService
+from services.recipe_features import ALLERGEN_BITS, allergen_mask, cuisine_id
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(preference_service, '_profile_cache', TTLCache(maxsize=100, ttl=60))
+
+
+class HeldReads:
+    """user_preferences collection whose reads return only once released"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.released = asyncio.Event()
+
+    async def find_one(self, *args, **kwargs):
+        document = await self.collection.find_one(*args, **kwargs)
+        await self.released.wait()
+        return document
+
+
+def test_profile_read_during_a_save_is_not_cached():
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['preference_test']
+        users = UserController(db)
+        await users.save_user_preferences(UserPreferenceCreate(user_session="s", allergies=["peanuts"]))
+
+        held = HeldReads(db.user_preferences)
+        service = PreferenceService(type("Database", (), {"user_preferences": held})())
+        stale_read = asyncio.create_task(service.get_profile("s"))
+        await asyncio.sleep(0)
+        await users.save_user_preferences(UserPreferenceCreate(user_session="s", allergies=[]))
+        held.released.set()
+        assert (await stale_read).allergen_mask != 0
+
+        assert (await service.get_profile("s")).allergen_mask == 0
+
+    asyncio.run(run())
+
+
+def test_allergies_exclude_recipes_through_aliases_and_ingredient_words():
+    profile = PreferenceProfile({"allergies": ["Milk", "sesame seeds"], "favorite_cuisines": ["Thai"]})
+    keep, boost = profile.apply([
+        {"allergen_mask": allergen_mask(["1 cup whole milk"]), "ingredient_tokens": ["whole milk"]},
+        {"allergen_mask": 0, "ingredient_tokens": ["toasted sesame seeds"], "cuisine_id": cuisine_id("Thai")},
+        {"allergen_mask": 0, "ingredient_tokens": ["rice"], "cuisine_id": cuisine_id("Thai")},
+    ])
+    assert keep.tolist() == [False, False, True]
+    assert boost.tolist() == [0, FAVORITE_CUISINE_BOOST, FAVORITE_CUISINE_BOOST]
+
+
+def test_saved_preferences_are_cached_until_the_next_save():
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['preference_cache_test']
+        users = UserController(db)
+        service = PreferenceService(db)
+        assert await service.get_profile("s") is None
+
+        await users.save_user_preferences(UserPreferenceCreate(user_session="s", allergies=["eggs"]))
+        profile = await service.get_profile("s")
+        assert profile.allergen_mask == ALLERGEN_BITS['eggs']
+        await db.user_preferences.delete_many({})
+        assert await service.get_profile("s") is profile
+
+    asyncio.run(run())
@@ -0,0 +1,23 @@
+import pytest
+
+from services.quantity_parser import parse_ingredient_line, scale_quantities_batch
+
+
+@pytest.mark.parametrize("line, multiplier, amount, unit", [
+    ("1 tsp salt", 3, 1.0, "tbsp"),
+    ("1/3 tsp salt", 9, 1.0, "tbsp"),
+    ("2 tsp salt", 1, 2.0, "tsp"),
+    ("1 tbsp butter", 4, 0.25, "cup"),
+    ("1 tbsp butter", 16, 1.0, "cup"),
+    ("1 tsp sugar", 48, 1.0, "cup"),
+    ("1 oz cheese", 16, 1.0, "lb"),
+    ("250 ml milk", 4, 1.0, "l"),
+])
+def test_scaled_quantities_move_up_the_unit_ladder_at_exact_multiples(line, multiplier, amount, unit):
+    [[scaled]] = scale_quantities_batch([[parse_ingredient_line(line)]], [multiplier])
+    assert (scaled["amount"], scaled["unit"]) == (amount, unit)
+
+
+def test_batch_rejects_non_finite_multipliers():
+    with pytest.raises(ValueError):
+        scale_quantities_batch([[parse_ingredient_line("1 cup rice")]], [float("inf")])
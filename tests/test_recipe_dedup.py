@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from benchmarks.catalog import recipe_response_text
+from controllers.recipe_controller import RecipeController
+from services.combo_tracker import generation_key
+from services.llm_provider import FakeLLMProvider
+from services.openai_service import OpenAIService
+from services.recipe_writer import RecipeWriter
+
+
+def generated(name: str) -> str:
+    return recipe_response_text({
+        "name": name,
+        "cuisine": "Chinese",
+        "difficulty": "easy",
+        "cooking_time": 20,
+        "serving_size": 2,
+        "dietary_tags": ["vegetarian"],
+        "ingredients": ["2 cups cooked rice", "2 eggs", "1 onion", "2 tbsp soy sauce", "1 cup peas", "1 carrot"],
+        "instructions": ["Scramble the eggs.", "Fry everything together."],
+        "nutrition": {"calories": 450, "protein": 15, "carbs": 60, "fat": 14, "fiber": 4},
+    })
+
+
+def test_near_duplicate_of_a_queued_recipe_is_linked_once_written():
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['dedup_test']
+        writer = RecipeWriter(db, flush_interval=60)
+        writer.start()
+        provider = FakeLLMProvider(latency_median=0, recordings={"recipe_generation": [generated("Egg Fried Rice")]})
+        controller = RecipeController(db, recipe_writer=writer)
+        controller._openai_service = OpenAIService(provider)
+
+        first = await controller.generate_recipe_from_ingredients(["rice", "egg"])
+        assert writer.get_pending(first["id"]) is not None
+
+        provider.recordings["recipe_generation"] = [generated("Egg Fried Rice Bowl")]
+        second = await controller.generate_recipe_from_ingredients(["rice", "egg", "peas"])
+        assert second["deduplicated"] and second["id"] == first["id"]
+
+        await writer.close()
+        stored = await db.recipes.find({}, {"_id": 0}).to_list(None)
+        assert len(stored) == 1
+        assert stored[0]["aliases"] == ["Egg Fried Rice Bowl"]
+        assert stored[0]["generation_keys"] == [generation_key(["rice", "egg"]), generation_key(["rice", "egg", "peas"])]
+
+    asyncio.run(run())
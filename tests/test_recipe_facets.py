@@ -0,0 +1,29 @@
+import numpy as np
+
+from services.recipe_features import DIETARY_TAG_BITS
+from services.recipe_facets import FacetCounts
+
+VEGAN = DIETARY_TAG_BITS['vegan']
+
+
+def test_each_facet_ignores_its_own_filter():
+    facets = FacetCounts()
+    facets.add(
+        matched=np.array([True, True, True, True, False]),
+        difficulty_ok=np.array([True, False, True, True, True]),
+        time_ok=np.array([True, True, False, True, True]),
+        dietary_ok=np.array([True, True, True, False, True]),
+        cuisines=np.array(["Thai", "Thai", "Italian", "Thai", "Thai"]),
+        difficulties=np.array([0, 1, 0, 0, 0]),
+        cooking_times=np.array([20, 40, 100, 20, 20]),
+        dietary_masks=np.array([VEGAN, VEGAN, VEGAN, 0, VEGAN]),
+        difficulty_names=["easy", "hard"],
+    )
+    counts = facets.to_dict()
+    assert counts["total"] == 1
+    assert counts["cuisine"] == {"Thai": 1}
+    # Each count leaves out only its own filter: the hard recipe, the slow one, the non-vegan one
+    assert counts["difficulty"] == {"easy": 1, "hard": 1}
+    assert {b["max_cooking_time"]: b["count"] for b in counts["cooking_time"]}[120] == 2
+    assert {b["max_cooking_time"]: b["count"] for b in counts["cooking_time"]}[30] == 1
+    assert counts["dietary_tags"] == {"vegan": 1}
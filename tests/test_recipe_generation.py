@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import services.combo_tracker as combo_tracker
+from benchmarks.catalog import recipe_response_text
+from controllers.recipe_controller import RecipeController
+from services.combo_tracker import ComboTracker
+from services.llm_provider import FakeLLMProvider
+from services.openai_service import OpenAIService
+from services.pregeneration_worker import PregenerationWorker
+from services.recipe_writer import RecipeWriter
+
+
+RECIPE_TEXT = recipe_response_text({
+    "name": "Egg Fried Rice",
+    "cuisine": "Chinese",
+    "difficulty": "easy",
+    "cooking_time": 20,
+    "serving_size": 2,
+    "dietary_tags": [],
+    "ingredients": ["2 cups cooked rice", "2 eggs", "1 onion"],
+    "instructions": ["Fry everything together."],
+    "nutrition": {"calories": 450, "protein": 15, "carbs": 60, "fat": 14, "fiber": 4},
+})
+
+
+class CountingProvider(FakeLLMProvider):
+    def __init__(self):
+        super().__init__(latency_median=0)
+        self.calls = 0
+
+    async def complete(self, *args, **kwargs) -> str:
+        self.calls += 1
+        return await super().complete(*args, **kwargs)
+
+
+class PromptEchoProvider(FakeLLMProvider):
+    """Fixed recipe for egg and rice prompts, so their token counts are the same on every run"""
+
+    def __init__(self):
+        super().__init__(latency_median=0.01)
+
+    async def complete(self, session_id: str, system_message: str, text: str, image_base64=None) -> str:
+        response = await super().complete(session_id, system_message, text, image_base64)
+        return RECIPE_TEXT if "egg, rice" in text else response
+
+
+def controller_with(db, provider, **kwargs) -> RecipeController:
+    controller = RecipeController(db, **kwargs)
+    controller._openai_service = OpenAIService(provider)
+    return controller
+
+
+def test_repeat_generation_is_served_from_the_write_queue():
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['generation_test']
+        provider = CountingProvider()
+        controller = controller_with(db, provider, recipe_writer=RecipeWriter(db))
+
+        first = await controller.generate_recipe_from_ingredients(["rice", "egg"])
+        again = await controller.generate_recipe_from_ingredients(["egg", "rice"])
+        assert again["cached"] and again["id"] == first["id"]
+        assert provider.calls == 1
+
+    asyncio.run(run())
+
+
+def test_recent_requests_outrank_older_totals(monkeypatch):
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['combo_test']
+        tracker = ComboTracker(db)
+        now = datetime.now(timezone.utc)
+
+        class EightWeeksAgo(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now - timedelta(weeks=8)
+
+        monkeypatch.setattr(combo_tracker, 'datetime', EightWeeksAgo)
+        for _ in range(100):
+            tracker.record(["egg", "rice"], 'find')
+        await tracker.flush()
+        monkeypatch.undo()
+        for _ in range(5):
+            tracker.record(["egg", "ham"], 'find')
+            tracker.record(["egg", "ham"], 'generate')
+        await tracker.flush()
+
+        top = await tracker.top_combos(2, now - timedelta(weeks=10))
+        assert [(combo["key"], combo["count"]) for combo in top] == [("egg|ham", 10), ("egg|rice", 100)]
+
+    asyncio.run(run())
+
+
+def test_pregeneration_charges_only_its_own_calls_and_records_no_demand():
+    async def charged(concurrent_request: bool) -> int:
+        db = mongomock_motor.AsyncMongoMockClient()['pregeneration_test']
+        tracker = ComboTracker(db)
+        for _ in range(3):
+            tracker.record(["egg", "rice"], 'find')
+        provider = PromptEchoProvider()
+        controller = controller_with(db, provider, combo_tracker=tracker)
+        worker = PregenerationWorker(db, controller, tracker, hours="0-24")
+
+        if concurrent_request:
+            generated, _ = await asyncio.gather(
+                worker.run_once(), controller.generate_recipe_from_ingredients(["ham", "cheese"], ["vegan"])
+            )
+        else:
+            generated = await worker.run_once()
+        assert generated == 1
+        await tracker.flush()
+        combo = await db.ingredient_combos.find_one({"key": "egg|rice"})
+        assert combo["count"] == 3 and combo["sources"] == {"find": 3}
+
+        day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        return (await db.job_locks.find_one({"_id": f"pregeneration:{day}"}))["tokens"]
+
+    async def run():
+        alone = await charged(False)
+        assert alone > 0
+        # A user request served on the same service meanwhile is not charged to the budget
+        assert await charged(True) == alone
+
+    asyncio.run(run())
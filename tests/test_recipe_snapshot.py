@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from bson import ObjectId
+
+import services.recipe_snapshot as recipe_snapshot
+from controllers.recipe_controller import RecipeController
+from scripts.build_recipe_snapshot import SNAPSHOT_PROJECTION
+from services.recipe_features import catalog_cutoff, with_match_features
+
+
+def make_recipe(recipe_id: str, ingredients, created_at: str):
+    return with_match_features({
+        "id": recipe_id,
+        "name": recipe_id,
+        "ingredients": ingredients,
+        "instructions": ["Cook."],
+        "cuisine": "Italian",
+        "difficulty": "easy",
+        "cooking_time": 20,
+        "serving_size": 2,
+        "dietary_tags": [],
+        "nutrition": {"calories": 400, "protein": 20, "carbs": 40, "fat": 10, "fiber": 3},
+        "created_at": created_at,
+    })
+
+
+def test_find_streams_recipes_inserted_after_the_snapshot(tmp_path, monkeypatch):
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['snapshot_test']
+        await db.recipes.insert_many([
+            make_recipe("in-snapshot", ["2 cups rice", "1 onion"], "2025-01-02T00:00:00+00:00"),
+            make_recipe("other", ["1 lb beef", "2 carrots"], "2025-01-03T00:00:00+00:00"),
+        ])
+
+        path = tmp_path / "recipe_snapshot.bin"
+        cutoff_id = catalog_cutoff()
+        recipes = await db.recipes.find({}, SNAPSHOT_PROJECTION).to_list(None)
+        recipe_snapshot.RecipeSnapshot.write(path, recipes, cutoff_id)
+        monkeypatch.setattr(recipe_snapshot, 'RECIPE_SNAPSHOT_PATH', path)
+        monkeypatch.setattr(recipe_snapshot, '_snapshot_checked_at', float('-inf'))
+        assert recipe_snapshot.get_recipe_snapshot() is not None
+
+        # Imported after the build, but dated before every recipe in the snapshot
+        await db.recipes.insert_one(make_recipe("imported", ["1 cup rice", "1 onion"], "2020-06-01T00:00:00+00:00"))
+
+        found = await RecipeController(db).find_matching_recipes(["rice", "onion"])
+        ids = [recipe["id"] for recipe in found]
+        assert sorted(ids) == ["imported", "in-snapshot"]
+
+    asyncio.run(run())
+
+
+def test_snapshot_lists_only_recipes_inserted_from_the_cutoff_and_bounds_substrings(tmp_path):
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['snapshot_test']
+        old_id = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(hours=1))
+        await db.recipes.insert_one({**make_recipe("old", ["1 onion"], "2025-01-01T00:00:00+00:00"), "_id": old_id})
+        await db.recipes.insert_one(make_recipe("recent", ["2 cups rice"], "2025-01-02T00:00:00+00:00"))
+        path = tmp_path / "recipe_snapshot.bin"
+        recipe_snapshot.RecipeSnapshot.write(path, await db.recipes.find({}, SNAPSHOT_PROJECTION).to_list(None), catalog_cutoff())
+        snapshot = recipe_snapshot.RecipeSnapshot(path)
+
+        assert "recent" in snapshot and "old" not in snapshot
+        long_ingredient = "onion " + "x" * 100_000 + " rice"
+        assert sorted(snapshot.ingredient_tokens(0) + snapshot.ingredient_tokens(1)) == sorted(
+            snapshot._vocabulary[token_id] for token_id in snapshot.tokens_within(long_ingredient)
+        )
+
+    asyncio.run(run())
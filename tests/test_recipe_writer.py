@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from services.recipe_writer import RecipeWriter
+
+
+def recipe(recipe_id: str, key: str) -> dict:
+    return {"id": recipe_id, "name": recipe_id, "generation_keys": [key], "match_features": {"token_count": 1}}
+
+
+def test_put_waits_for_room_and_queued_recipes_are_readable():
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['writer_test']
+        writer = RecipeWriter(db, flush_interval=0.01, max_queued=2)
+        await writer.put(recipe("a", "egg|rice"))
+        await writer.put(recipe("b", "bean|rice"))
+
+        blocked = asyncio.create_task(writer.put(recipe("c", "corn")))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        assert writer.get_pending("a") == {"id": "a", "name": "a", "generation_keys": ["egg|rice"]}
+        assert writer.get_pending_by_key("bean|rice")["id"] == "b"
+        assert writer.link("a", {"generation_keys": "egg|rice|soy"})
+        assert writer.get_pending_by_key("egg|rice|soy")["id"] == "a"
+
+        writer.start()
+        await asyncio.wait_for(blocked, 1)
+        await writer.close()
+        assert writer.get_pending("a") is None and writer.get_pending_by_key("egg|rice|soy") is None
+        assert sorted(await db.recipes.distinct("id")) == ["a", "b", "c"]
+        written = await db.recipes.find_one({"id": "a"})
+        assert written["generation_keys"] == ["egg|rice", "egg|rice|soy"]
+
+    asyncio.run(run())
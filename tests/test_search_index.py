@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from services.search_index import SearchIndex, search_terms
+
+RECIPES = [
+    {"id": "soup", "name": "Tomato Soup", "cuisine": "Italian", "instructions": ["Simmer the tomatoes."]},
+    {"id": "salad", "name": "Garden Salad", "cuisine": "French", "instructions": ["Slice a tomato.", "Toss the greens."]},
+    {"id": "curry", "name": "Chicken Curry", "cuisine": "Indian", "instructions": ["Brown the chicken.", "Add the spices."]},
+    {"id": "roast", "name": "Roast Chicken", "cuisine": "French", "instructions": ["Roast the chicken for an hour."]},
+]
+
+
+def test_search_terms_drop_stopwords_and_stem():
+    assert search_terms("Grilled the tomatoes and grilling") == ["grill", "tomato", "grill"]
+
+
+def test_name_matches_outrank_instruction_matches():
+    index = SearchIndex.build(RECIPES)
+    assert [recipe_id for recipe_id, _ in index.search("tomato")] == ["soup", "salad"]
+    assert [recipe_id for recipe_id, _ in index.search("roast chicken")][:1] == ["roast"]
+    assert index.search("risotto") == []
+
+
+def test_incremental_additions_rank_like_a_build():
+    built = SearchIndex.build(RECIPES)
+    incremental = SearchIndex.build(RECIPES[:1])
+    for recipe in RECIPES[1:]:
+        incremental.add(recipe)
+    for query in ["tomato", "chicken", "french roast"]:
+        assert incremental.search(query) == built.search(query)
+
+
+def test_catch_up_finds_recipes_imported_with_an_old_created_at():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from controllers.recipe_controller import RecipeController
+    from tests.test_recipe_snapshot import make_recipe
+
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['search_test']
+        await db.recipes.insert_one({**make_recipe("recent", ["1 onion"], "2025-06-01T00:00:00+00:00"), "name": "Onion Tart"})
+        controller = RecipeController(db)
+        await controller.get_search_index()
+
+        await db.recipes.insert_one({**make_recipe("imported", ["1 leek"], "2019-01-01T00:00:00+00:00"), "name": "Leek Tart"})
+        controller._search_index_synced = float('-inf')
+        index = await controller.get_search_index()
+        assert [recipe_id for recipe_id, _ in index.search("leek")] == ["imported"]
+
+    asyncio.run(run())
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from controllers.recipe_controller import RecipeController
+from services.recipe_writer import RecipeWriter
+from tests.test_recipe_snapshot import make_recipe
+
+
+def test_recipe_still_queued_for_writing_can_be_scaled():
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['serving_test']
+        stored = make_recipe("stored", ["1 cup rice"], "2025-01-01T00:00:00+00:00")
+        await db.recipes.insert_one(stored)
+        writer = RecipeWriter(db)
+        await writer.put(make_recipe("queued", ["2 cups rice", "1 onion"], "2025-01-02T00:00:00+00:00"))
+
+        scaled = await RecipeController(db, recipe_writer=writer).adjust_serving_sizes([("queued", 4), ("stored", 6)])
+        assert [recipe["id"] for recipe in scaled] == ["queued", "stored"]
+        assert scaled[0]["ingredients"] == ["4 cups rice", "2 onion"]
+        assert scaled[0]["serving_size"] == 4
+        assert scaled[1]["ingredients"] == ["3 cups rice"]
+
+    asyncio.run(run())
+
+
+def test_recipe_without_a_serving_size_is_rejected():
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient()['serving_test']
+        await db.recipes.insert_one({**make_recipe("broken", ["1 cup rice"], "2025-01-01T00:00:00+00:00"), "serving_size": 0})
+        with pytest.raises(ValueError, match="broken has no serving size"):
+            await RecipeController(db).adjust_serving_sizes([("broken", 4)])
+
+    asyncio.run(run())
@@ -0,0 +1,28 @@
+import numpy as np
+
+import services.similarity_index as similarity_index
+from benchmarks.catalog import synthetic_catalog
+from services.recipe_features import with_match_features
+from services.similarity_index import SimilarityIndex
+
+
+def test_incremental_merges_match_a_full_merge(monkeypatch):
+    monkeypatch.setattr(similarity_index, 'MERGE_THRESHOLD', 50)
+    recipes = [with_match_features(recipe) for recipe in synthetic_catalog(400)]
+    index = SimilarityIndex.build(recipes[:200])
+    for recipe in recipes[200:]:
+        index.add(recipe)
+    index._merge()
+
+    rebuilt = SimilarityIndex.build(recipes[:200])
+    for recipe in recipes[200:]:
+        rebuilt.add(recipe)
+    rebuilt._merged_rows = 0
+    rebuilt._feature_ptr[:] = 0
+    rebuilt._merge()
+
+    assert np.array_equal(index._feature_ptr, rebuilt._feature_ptr)
+    assert np.array_equal(index._posting_rows, rebuilt._posting_rows)
+    assert np.array_equal(index._posting_weights, rebuilt._posting_weights)
+    vector = index.vector(recipes[300]['id'])
+    assert index.most_similar(vector, 5)[0] == (recipes[300]['id'], 1.0)
@@ -0,0 +1,23 @@
+from services.recipe_features import dietary_mask
+from services.substitution_service import AhoCorasickAutomaton, SubstitutionEngine
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasickAutomaton(["he", "she", "hers"])
+    matches = sorted((start, end, automaton.patterns[index]) for start, end, index in automaton.iter_matches("ushers"))
+    assert matches == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_lookup_prefers_the_longest_whole_word_match():
+    vegan = dietary_mask(["vegan", "vegetarian"])
+    engine = SubstitutionEngine({
+        "butter": [("margarine", vegan)],
+        "peanut butter": [("sunflower seed butter", vegan)],
+        "egg": [("flax egg", vegan)],
+        "milk": [("oat milk", vegan), ("goat milk", dietary_mask(["vegetarian"]))],
+    })
+    assert engine.lookup("2 tbsp creamy peanut butter") == "peanut butter"
+    assert engine.lookup("1 tbsp butter") == "butter"
+    assert engine.lookup("1 eggplant") is None
+    assert engine.substitutes_for("1 cup whole milk", ["vegan"]) == ["oat milk"]
+    assert engine.suggest(["1 eggplant", "2 egg"]) == {"2 egg": ["flax egg"]}
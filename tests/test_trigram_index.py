@@ -0,0 +1,25 @@
+from services.trigram_index import TrigramIndex, word_form
+
+
+def test_singular_and_plural_of_known_words_are_not_corrected():
+    index = TrigramIndex(["tomatoes", "onion", "berries", "peaches", "cheese"])
+    for phrase in ["tomato", "onions", "berry", "peach", "cheeses"]:
+        assert index.correct_phrase(phrase) == (phrase, {})
+
+
+def test_misspelled_words_are_corrected():
+    index = TrigramIndex(["tomatoes", "onion", "garlic"])
+    assert index.correct_phrase("2 tomatoe and garlik") == ("2 tomatoes and garlic", {"tomatoe": "tomatoes", "garlik": "garlic"})
+
+
+def test_typos_that_look_like_a_singular_are_corrected():
+    index = TrigramIndex(["asparagus", "molasses"])
+    assert index.correct_phrase("asparagu") == ("asparagus", {"asparagu": "asparagus"})
+    assert index.correct_phrase("molasse") == ("molasses", {"molasse": "molasses"})
+
+
+def test_singular_words_ending_in_s_keep_their_form():
+    assert [word_form(word) for word in ["molasses", "asparagus", "hummus", "glass", "anis"]] == [
+        "molasses", "asparagus", "hummus", "glass", "anis"
+    ]
+    assert [word_form(word) for word in ["tomatoes", "berries", "peaches", "onions"]] == ["tomato", "berry", "peach", "onion"]